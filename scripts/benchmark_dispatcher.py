@@ -0,0 +1,211 @@
+"""
+Dispatcher throughput benchmark.
+
+Runs the real `cybergov_dispatcher_flow` (on a throwaway local Prefect API) against:
+- a local fake sidecar serving `referendumCount`,
+- an in-memory S3 stand-in,
+- a stub RPC node answering the track/deadline reads,
+- a stub Prefect client recording `read_flow_runs` / `create_flow_run_from_deployment`.
+
+Reports proposals/sec and external calls per proposal for each batch size.
+
+Usage: python scripts/benchmark_dispatcher.py [--sizes 10 100 1000] [--network paseo]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import fsspec
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import cybergov_dispatcher  # noqa: E402
+from utils import credentials as credentials_module, endpoints, scheduling  # noqa: E402
+from utils import s3 as s3_module  # noqa: E402
+from utils.constants import CYBERGOV_PARAMS  # noqa: E402
+
+CALLS = Counter()
+
+
+class FakeSidecar(BaseHTTPRequestHandler):
+    referendum_count = 0
+
+    def do_GET(self):
+        CALLS["sidecar"] += 1
+        body = json.dumps({"value": str(self.referendum_count)}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class CountingMemoryS3:
+    """In-memory filesystem with the s3fs calls the dispatcher uses, counted."""
+
+    def __init__(self, *args, **kwargs):
+        self.fs = fsspec.filesystem("memory")
+
+    def open(self, path, mode="rb", **kwargs):
+        CALLS["s3"] += 1
+        return self.fs.open(path, mode, **kwargs)
+
+    def ls(self, path, detail=False, **kwargs):
+        CALLS["s3"] += 1
+        return self.fs.ls(path, detail=detail, **kwargs)
+
+    def rm(self, path, **kwargs):
+        CALLS["s3"] += 1
+        return self.fs.rm(path, **kwargs)
+
+
+class FakeSubstrate:
+    """Every referendum is ongoing on a delegated track, deciding since block 1000."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def create_storage_key(self, module, storage, params):
+        return SimpleNamespace(params=params)
+
+    def query_multi(self, storage_keys):
+        CALLS["rpc"] += 1
+        return [
+            (
+                key,
+                SimpleNamespace(
+                    value={"Ongoing": {"track": 33, "submitted": 900, "deciding": {"since": 1000, "confirming": None}}}
+                ),
+            )
+            for key in storage_keys
+        ]
+
+    def get_constant(self, module, name):
+        CALLS["rpc"] += 1
+        return SimpleNamespace(
+            value=[(33, {"prepare_period": 1200, "decision_period": 403200, "confirm_period": 14400})]
+        )
+
+    def get_block_number(self, block_hash):
+        CALLS["rpc"] += 1
+        return 2000
+
+
+class RecordingPrefectClient:
+    def __init__(self):
+        self.created = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read_flow_runs(self, **kwargs):
+        CALLS["prefect"] += 1
+        return []
+
+    async def create_flow_run_from_deployment(self, **kwargs):
+        CALLS["prefect"] += 1
+        self.created.append(kwargs["parameters"]["proposal_id"])
+
+
+def fake_block_loader(values):
+    async def load(name):
+        value = values.get(name, f"fake-{name}")
+        return SimpleNamespace(value=value, get=lambda: value)
+
+    return load
+
+
+def run_once(network: str, new_ids: int, sidecar_url: str) -> dict:
+    CALLS.clear()
+    fsspec.filesystem("memory").store.clear()
+    endpoints.reset_endpoint_pools()
+    credentials_module.credentials.clear()
+    s3_module.reset_s3_filesystems()
+
+    min_threshold = CYBERGOV_PARAMS.get("min_proposal_id", {}).get(network, 0)
+    # referendumCount is the next free id, so the dispatcher sees ids (min_threshold, count)
+    FakeSidecar.referendum_count = min_threshold + 1 + new_ids
+
+    client = RecordingPrefectClient()
+    block_loader = fake_block_loader(
+        {f"{network}-sidecar-url": sidecar_url, "scaleway-bucket-name": "bench-bucket"}
+    )
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(credentials_module.Secret, "load", side_effect=block_loader))
+        stack.enter_context(patch.object(credentials_module.String, "load", side_effect=block_loader))
+        stack.enter_context(patch.object(cybergov_dispatcher.s3fs, "S3FileSystem", CountingMemoryS3))
+        stack.enter_context(patch.object(endpoints, "SubstrateInterface", FakeSubstrate))
+        stack.enter_context(patch.object(scheduling, "get_client", return_value=client))
+        # The settle delay is a fixed sleep, not dispatcher work
+        stack.enter_context(patch.object(cybergov_dispatcher, "DISPATCHER_LEASE_SETTLE_SECONDS", 0))
+
+        started_at = time.perf_counter()
+        report = asyncio.run(cybergov_dispatcher.cybergov_dispatcher_flow(networks=[network]))
+        elapsed = time.perf_counter() - started_at
+
+    scheduled = len(client.created)
+    if scheduled != new_ids:
+        raise RuntimeError(f"Expected {new_ids} scheduled runs, got {scheduled}: {report}")
+
+    total_calls = sum(CALLS.values())
+    return {
+        "new_ids": new_ids,
+        "seconds": round(elapsed, 3),
+        "proposals_per_second": round(new_ids / elapsed, 1),
+        "calls_per_proposal": round(total_calls / new_ids, 2),
+        "calls": dict(CALLS),
+        "timings": report[network]["timings"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--network", default="paseo")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSidecar)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sidecar_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from prefect.testing.utilities import prefect_test_harness
+
+    results = []
+    with prefect_test_harness():
+        for size in args.sizes:
+            print(f"--- Dispatching {size} new referenda on '{args.network}' ---")
+            results.append(run_once(args.network, size, sidecar_url))
+    server.shutdown()
+
+    print(f"\n{'new ids':>8} {'seconds':>9} {'props/s':>9} {'calls/prop':>11}  calls")
+    for result in results:
+        print(
+            f"{result['new_ids']:>8} {result['seconds']:>9} {result['proposals_per_second']:>9} "
+            f"{result['calls_per_proposal']:>11}  {result['calls']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,10 @@ from prefect import flow, get_run_logger, task
 from substrateinterface import Keypair
 import json
 import time
-from prefect.blocks.system import String, Secret
-import s3fs
+from utils.proposal_index import record_stage_result
+from utils.rate_limit import rate_limited_client
+from utils.credentials import credentials
+from utils.s3 import s3_filesystem, cat_many
 
 
 @task
@@ -32,18 +34,12 @@ def get_infos_for_substrate_comment(
     subsquare_file_path = f"{base_path}/raw_subsquare_data.json"
 
     try:
-        s3 = s3fs.S3FileSystem(
-            key=access_key,
-            secret=secret_key,
-            client_kwargs={
-                "endpoint_url": endpoint_url,
-            },
-        )
+        s3 = s3_filesystem(access_key, secret_key, endpoint_url)
 
-        # Get proposal_height from raw_subsquare_data.json
-        logger.info(f"Loading subsquare data from {subsquare_file_path}")
-        with s3.open(subsquare_file_path, "rb") as f:
-            subsquare_data = json.load(f)
+        # Both files are fetched at once
+        logger.info(f"Loading {subsquare_file_path} and {vote_file_path}")
+        contents = cat_many(s3, [subsquare_file_path, vote_file_path])
+        subsquare_data = json.loads(contents[subsquare_file_path])
 
         proposal_height = subsquare_data.get("indexer", {}).get("blockHeight")
         if proposal_height is None:
@@ -54,9 +50,7 @@ def get_infos_for_substrate_comment(
             logger.info(f"Found proposal height: {proposal_height}")
 
         # Get vote_result and comment from vote.json
-        logger.info(f"Loading vote data from {vote_file_path}")
-        with s3.open(vote_file_path, "rb") as f:
-            vote_data = json.load(f)
+        vote_data = json.loads(contents[vote_file_path])
         logger.info(f"Successfully loaded vote data from {vote_file_path}")
 
         # Assuming the vote decision is stored under the key 'vote_decision'
@@ -94,7 +88,11 @@ def post_comment_to_subsquare(
         f"https://{network}-api.subsquare.io/sima/referenda/{proposal_id}/comments"
     )
 
-    cybergov_parent_pubkey = Secret.load(f"{network}-cybergov-parent-pubkey").get()
+    cybergov_parent_pubkey, cybergov_mnemonic, user_agent = credentials.secrets_sync(
+        f"{network}-cybergov-parent-pubkey",
+        f"{network}-cybergov-mnemonic",
+        "cybergov-scraper-user-agent",
+    )
 
     entity_payload = {
         "action": "comment",
@@ -120,13 +118,9 @@ def post_comment_to_subsquare(
         ensure_ascii=False
     )
 
-    cybergov_mnemonic = Secret.load(f"{network}-cybergov-mnemonic").get()
     keypair = Keypair.create_from_mnemonic(cybergov_mnemonic)
     signature = keypair.sign(message_to_sign)
 
-    user_agent_secret = Secret.load("cybergov-scraper-user-agent")
-    user_agent = user_agent_secret.get()
-
     final_request_body = {
         "entity": entity_payload,
         "address": keypair.ss58_address,
@@ -148,7 +142,8 @@ def post_comment_to_subsquare(
         # posting comment_manual='TEST Again using a short message and some quotes " \n test " " ' DOES NOT WORK
         # posting comment_manual='TEST Again using a short message' WORKS
         # previously we were sending json=final_request_body, but changing it to purely data and let the server figure things out works better
-        response = httpx.post(api_url, headers=headers, data=json.dumps(final_request_body, sort_keys=True, separators=(",", ":")))
+        with rate_limited_client() as client:
+            response = client.post(api_url, headers=headers, data=json.dumps(final_request_body, sort_keys=True, separators=(",", ":")))
         response.raise_for_status()
         logger.info(f"Success!: {response.json()}")
 
@@ -163,6 +158,22 @@ def post_comment_to_subsquare(
         raise
 
 
+@task
+def update_proposal_index(network: str, proposal_id: int, status: str):
+    """
+    Records the comment outcome in the network's proposal index. Needs the write
+    credentials; best-effort, a failure here never fails the comment.
+    """
+    logger = get_run_logger()
+    try:
+        s3_config = credentials.s3_sync(write=True)
+        s3 = s3_filesystem(s3_config.access_key, s3_config.secret_key, s3_config.endpoint_url)
+        record_stage_result(s3, s3_config.bucket, network, "comment", proposal_id, status)
+        logger.info(f"Proposal index updated: comment of {network}/{proposal_id} {status}.")
+    except Exception as e:
+        logger.warning(f"Could not update proposal index for {network}/{proposal_id}: {e}")
+
+
 @flow(name="Post comment on Subsquare", log_prints=True)
 def post_magi_comment_to_subsquare(
     network: str,
@@ -173,15 +184,11 @@ def post_magi_comment_to_subsquare(
     """
     logger = get_run_logger()
 
-    s3_bucket_block = String.load("scaleway-bucket-name")
-    endpoint_block = String.load("scaleway-s3-endpoint-url")
-    access_key_block = Secret.load("scaleway-access-key-id")
-    secret_key_block = Secret.load("scaleway-secret-access-key")
-
-    s3_bucket = s3_bucket_block.value
-    endpoint_url = endpoint_block.value
-    access_key = access_key_block.get()
-    secret_key = secret_key_block.get()
+    s3_config = credentials.s3_sync()
+    s3_bucket = s3_config.bucket
+    endpoint_url = s3_config.endpoint_url
+    access_key = s3_config.access_key
+    secret_key = s3_config.secret_key
 
     logger.info(
         f"Posting comment to Subsquare on network {network} for1 proposal {proposal_id}"
@@ -197,15 +204,21 @@ def post_magi_comment_to_subsquare(
     )
 
     if comment:
-        post_comment_to_subsquare(
-            network=network,
-            proposal_id=proposal_id,
-            proposed_height=proposal_height,
-            comment=comment,
-        )
+        try:
+            post_comment_to_subsquare(
+                network=network,
+                proposal_id=proposal_id,
+                proposed_height=proposal_height,
+                comment=comment,
+            )
+        except Exception:
+            update_proposal_index(network, proposal_id, "failed")
+            raise
+        update_proposal_index(network, proposal_id, "processed")
         logger.info(f"✅ Successfully posted comment for {proposal_id} on {network}")
     else:
         logger.error("Cannot post comment, no content provided.")
+        update_proposal_index(network, proposal_id, "failed")
         raise
 
 
@@ -1,32 +1,45 @@
+import asyncio
+import collections
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import firebase_admin
 from firebase_admin import credentials as fb_credentials
 from firebase_admin import firestore as admin_firestore  
 from google.cloud import firestore
 import httpx
+import s3fs
 from prefect import flow, task, get_run_logger
-from prefect.blocks.system import Secret
 from prefect.tasks import exponential_backoff
 from prefect.server.schemas.states import Completed, Failed
 import datetime
-from prefect.server.schemas.filters import (
-    FlowRunFilter,
-    FlowRunFilterState,
-    FlowRunFilterStateType,
-    DeploymentFilter,
-    DeploymentFilterId,
-    FlowRunFilterName,
-)
 from prefect.client.orchestration import get_client
-from prefect.client.schemas.objects import StateType
 from utils.constants import (
     NETWORK_MAP,
     INFERENCE_SCHEDULE_DELAY_MINUTES,
     INFERENCE_TRIGGER_DEPLOYMENT_ID,
     ALLOWED_TRACK_IDS,
+    BACKFILL_MAX_CONCURRENCY,
+)
+from utils.scheduling import (
+    is_already_scheduled,
+    flow_run_name,
+    stage_scheduled_state,
+)
+from utils.proposal_augmentation import generate_content_files_for_magis
+from utils.proposal_index import record_stage_result
+from utils.http_client import get_http_client
+from utils.proposal_sources import hedged_fetch_proposal, normalize_proposal_data, PRIMARY_SOURCE
+from utils.archive import archive_current_run
+from utils.credentials import credentials
+from utils.s3 import s3_filesystem
+from utils.scrape_metadata import proposal_content_hash, is_unchanged_scrape, write_scrape_metadata
+from utils.backfill import (
+    backfill_ids,
+    checkpoint_path,
+    load_checkpoint,
+    save_checkpoint,
+    pending_ids,
 )
-from utils.proposal_augmentation import generate_content_for_magis
 
 
 class ProposalFetchError(Exception):
@@ -44,10 +57,35 @@ class InvalidTrackError(Exception):
 
 async def load_firestore_credentials():
     """Load Firestore credentials from Prefect blocks."""
-    credentials_block = await Secret.load("firebase-credentials-json")
-    return json.loads(credentials_block.get())
+    return json.loads(await credentials.secret("firebase-credentials-json"))
+
+
+async def load_s3_credentials() -> Dict[str, str]:
+    """Load the write-enabled S3 credentials from Prefect blocks."""
+    return (await credentials.s3(write=True)).as_dict()
 
 
+def setup_s3_filesystem(access_key: str, secret_key: str, endpoint_url: str) -> s3fs.S3FileSystem:
+    return s3_filesystem(access_key, secret_key, endpoint_url)
+
+
+def record_scrape_result(s3_creds: Optional[Dict[str, str]], network: str, proposal_id: int, status: str):
+    """Best-effort update of the network's proposal index, never fails the scrape."""
+    logger = get_run_logger()
+    if s3_creds is None:
+        return
+
+    try:
+        s3 = setup_s3_filesystem(
+            access_key=s3_creds["access_key"],
+            secret_key=s3_creds["secret_key"],
+            endpoint_url=s3_creds["endpoint_url"],
+        )
+        record_stage_result(s3, s3_creds["s3_bucket"], network, "scrape", proposal_id, status)
+        logger.info(f"Proposal index updated: scrape of {network}/{proposal_id} {status}.")
+    except Exception as e:
+        logger.warning(f"Could not update proposal index for {network}/{proposal_id}: {e}")
+
 
 def validate_proposal_track(proposal_data: Dict[str, Any]) -> bool:
     """Validate that the proposal track is in the allowed list."""
@@ -72,25 +110,24 @@ def validate_proposal_track(proposal_data: Dict[str, Any]) -> bool:
     retry_delay_seconds=exponential_backoff(backoff_factor=10),
     retry_jitter_factor=0.2,
 )
-def fetch_subsquare_proposal_data(url: str) -> Dict[str, Any]:
+async def fetch_subsquare_proposal_data(url: str) -> Dict[str, Any]:
     """
-    Fetches and parses proposal data from a Subsquare JSON API endpoint.
+    Fetches and parses proposal data from a Subsquare JSON API endpoint,
+    over the process-wide HTTP client.
     """
     logger = get_run_logger()
-    user_agent_secret = Secret.load("cybergov-scraper-user-agent")
-    user_agent = user_agent_secret.get()
+    user_agent = await credentials.secret("cybergov-scraper-user-agent")
 
     headers = {"User-Agent": user_agent, "Accept": "application/json"}
 
     logger.info(f"Fetching JSON data from API: {url}")
 
     try:
-        with httpx.Client() as client:
-            response = client.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"Successfully fetched and parsed JSON from {url}")
-            return data
+        response = await get_http_client().get(url, headers=headers, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        logger.info(f"Successfully fetched and parsed JSON from {url}")
+        return data
 
     except httpx.RequestError as e:
         logger.error(f"HTTP Request failed for URL {url}: {e}")
@@ -101,44 +138,95 @@ def fetch_subsquare_proposal_data(url: str) -> Dict[str, Any]:
 
 
 
-
-@flow(name="Fetch and Store Raw Subsquare Data")
-def fetch_and_store_raw_subsquare_data(network: str, proposal_id: int) -> Optional[str]:
+@task(
+    name="Fetch Proposal JSON (hedged Polkassembly/Subsquare)",
+    retries=3,
+    retry_delay_seconds=exponential_backoff(backoff_factor=10),
+    retry_jitter_factor=0.2,
+)
+async def fetch_proposal_data_hedged(network: str, proposal_id: int) -> Dict[str, Any]:
     """
-    Subflow to handle fetching, parsing, and storing raw data for one proposal.
-    Returns the S3 path of the stored data, or None if skipped.
+    Fetches the proposal from the primary API, and from the secondary one too if
+    the primary is slower than usual. The first valid answer is normalized to the
+    common schema; `_source` records which API it came from.
     """
+    logger = get_run_logger()
+    user_agent = await credentials.secret("cybergov-scraper-user-agent")
+
+    headers = {"User-Agent": user_agent, "Accept": "application/json"}
+
+    try:
+        data = await hedged_fetch_proposal(get_http_client(), network, proposal_id, headers)
+    except (httpx.RequestError, httpx.HTTPStatusError, ValueError) as e:
+        logger.error(f"Both proposal sources failed for {network}/{proposal_id}: {e}")
+        raise ProposalFetchError(f"Failed to fetch {network}/{proposal_id} from any source") from e
+
+    logger.info(f"Fetched {network}/{proposal_id} from {data['_source']}")
+    return data
+
+
+@task(name="Save JSON to S3")
+def save_to_s3(
+    data: Dict[str, Any],
+    s3_bucket: str,
+    endpoint_url: str,
+    access_key: str,
+    secret_key: str,
+    full_s3_path: str,
+):
+    """Writes a JSON document to the given S3 path."""
+    logger = get_run_logger()
+    s3 = setup_s3_filesystem(access_key, secret_key, endpoint_url)
+
+    logger.info(f"Writing JSON to s3://{full_s3_path}")
+    with s3.open(full_s3_path, "w") as f:
+        json.dump(data, f, indent=2)
 
-    s3_bucket_block = Secret.load("scaleway-bucket-name")
-    endpoint_block = Secret.load("scaleway-s3-endpoint-url")
-    access_key_block = Secret.load("scaleway-write-access-key-id")
-    secret_key_block = Secret.load("scaleway-write-secret-access-key")
 
-    s3_bucket = s3_bucket_block.value
-    endpoint_url = endpoint_block.value
-    access_key = access_key_block.get()
-    secret_key = secret_key_block.get()
+async def fetch_raw_proposal_data(network: str, proposal_id: int, hedged: bool = True) -> Dict[str, Any]:
+    """Fetches one proposal. With `hedged`, a slow primary API is backed up by the secondary one."""
+    if hedged:
+        return await fetch_proposal_data_hedged(network=network, proposal_id=proposal_id)
+    # Same schema as the hedged path, so spends and content hash don't depend on the path
+    data = await fetch_subsquare_proposal_data(f"{NETWORK_MAP[network]}/{proposal_id}")
+    return normalize_proposal_data(data, PRIMARY_SOURCE, network)
 
-    base_url = NETWORK_MAP[network]
-    proposal_url = f"{base_url}/{proposal_id}"
+
+async def store_raw_proposal_data(
+    network: str, proposal_id: int, s3_creds: Dict[str, str], proposal_data: Dict[str, Any]
+) -> str:
+    """Stores a fetched proposal raw to S3 and returns its S3 path."""
     s3_output_path = (
-        f"{s3_bucket}/proposals/{network}/{proposal_id}/raw_subsquare_data.json"
+        f"{s3_creds['s3_bucket']}/proposals/{network}/{proposal_id}/raw_subsquare_data.json"
     )
 
-    proposal_data = fetch_subsquare_proposal_data(proposal_url)
-
-    save_to_s3(
+    # Sync task: off the event loop, so concurrent backfill fetches keep going
+    await asyncio.to_thread(
+        save_to_s3,
         data=proposal_data,
-        s3_bucket=s3_bucket,
-        endpoint_url=endpoint_url,
-        access_key=access_key,
-        secret_key=secret_key,
+        s3_bucket=s3_creds["s3_bucket"],
+        endpoint_url=s3_creds["endpoint_url"],
+        access_key=s3_creds["access_key"],
+        secret_key=s3_creds["secret_key"],
         full_s3_path=s3_output_path,
     )
 
     return s3_output_path
 
 
+@flow(name="Fetch and Store Raw Subsquare Data")
+async def fetch_and_store_raw_subsquare_data(
+    network: str, proposal_id: int, hedged: bool = True
+) -> Optional[str]:
+    """
+    Subflow to handle fetching, parsing, and storing raw data for one proposal.
+    Returns the S3 path of the stored data.
+    """
+    s3_creds = await load_s3_credentials()
+    proposal_data = await fetch_raw_proposal_data(network, proposal_id, hedged)
+    return await store_raw_proposal_data(network, proposal_id, s3_creds, proposal_data)
+
+
 @task
 async def check_if_already_scheduled(proposal_id: int, network: str) -> bool:
     """
@@ -150,29 +238,13 @@ async def check_if_already_scheduled(proposal_id: int, network: str) -> bool:
         f"Checking for existing flow runs for inference-{network}-{proposal_id}..."
     )
 
-    async with get_client() as client:
-        existing_runs = await client.read_flow_runs(
-            flow_run_filter=FlowRunFilter(
-                name=FlowRunFilterName(like_=f"inference-{network}-{proposal_id}"),
-                state=FlowRunFilterState(
-                    type=FlowRunFilterStateType(
-                        any_=[
-                            StateType.RUNNING,
-                            StateType.COMPLETED,
-                            StateType.PENDING,
-                            StateType.SCHEDULED,
-                        ]
-                    )
-                ),
-            ),
-            deployment_filter=DeploymentFilter(
-                id=DeploymentFilterId(any_=[INFERENCE_TRIGGER_DEPLOYMENT_ID])
-            ),
-        )
+    is_scheduled = await is_already_scheduled(
+        stage="inference", network=network, proposal_id=proposal_id
+    )
 
-    if existing_runs:
+    if is_scheduled:
         logger.warning(
-            f"Found {len(existing_runs)} existing inference run(s) for proposal {proposal_id} on '{network}'. Skipping scheduling."
+            f"Found an existing inference run for proposal {proposal_id} on '{network}'. Skipping scheduling."
         )
         return True
 
@@ -188,7 +260,8 @@ async def schedule_inference_task(proposal_id: int, network: str):
     logger = get_run_logger()
 
     delay = datetime.timedelta(minutes=INFERENCE_SCHEDULE_DELAY_MINUTES)
-    scheduled_time = datetime.datetime.now(datetime.timezone.utc) + delay
+    state = await stage_scheduled_state(network, proposal_id, delay, logger)
+    scheduled_time = state.state_details.scheduled_time
     logger.info(
         f"Scheduling MAGI inference for proposal {proposal_id} on '{network}' "
         f"to run at {scheduled_time.isoformat()}"
@@ -196,15 +269,15 @@ async def schedule_inference_task(proposal_id: int, network: str):
 
     async with get_client() as client:
         await client.create_flow_run_from_deployment(
-            name=f"inference-{network}-{proposal_id}",
+            name=flow_run_name("inference", network, proposal_id),
             deployment_id=INFERENCE_TRIGGER_DEPLOYMENT_ID,
             parameters={"proposal_id": proposal_id, "network": network},
-            # state=Scheduled(scheduled_time=scheduled_time)
+            state=state,
         )
 
 
 @task(name="Archive Previous Run Data")
-def archive_previous_run(network: str, proposal_id: int):
+def archive_previous_run(network: str, proposal_id: int, s3_creds: Dict[str, str]):
     """
     Checks for existing data for a proposal. If found, archives it into a
     versioned 'vote_archive_{index}' subfolder before the new run proceeds.
@@ -213,69 +286,20 @@ def archive_previous_run(network: str, proposal_id: int):
     """
     logger = get_run_logger()
 
-    s3_bucket_block = Secret.load("scaleway-bucket-name")
-    endpoint_block = Secret.load("scaleway-s3-endpoint-url")
-    access_key_block = Secret.load("scaleway-write-access-key-id")
-    secret_key_block = Secret.load("scaleway-write-secret-access-key")
+    base_path = f"{s3_creds['s3_bucket']}/proposals/{network}/{proposal_id}"
 
-    s3_bucket = s3_bucket_block.value
-    endpoint_url = endpoint_block.value
-    access_key = access_key_block.get()
-    secret_key = secret_key_block.get()
-
-    base_path = f"{s3_bucket}/proposals/{network}/{proposal_id}"
-
-    s3 = s3fs.S3FileSystem(
-        key=access_key,
-        secret=secret_key,
-        client_kwargs={
-            "endpoint_url": endpoint_url,
-        },
+    s3 = setup_s3_filesystem(
+        access_key=s3_creds["access_key"],
+        secret_key=s3_creds["secret_key"],
+        endpoint_url=s3_creds["endpoint_url"],
     )
 
-    if not s3.exists(base_path):
-        logger.info(f"Base path {base_path} does not exist yet. Skipping archive step.")
-        return
-
-    # 1. Check if the base directory has any contents
-    existing_contents = s3.ls(base_path, detail=False)
-    logger.info(f"Found {len(existing_contents)} items in {base_path}.")
-    if not existing_contents:
+    archive_path = archive_current_run(s3, base_path)
+    if archive_path is None:
         logger.info(f"No previous data found at {base_path}. This is the first run.")
         return
 
-    logger.info(f"Found {len(existing_contents)} items in {base_path}. Archiving...")
-
-    # 2. Find the next available vote_archive_index
-    vote_archive_index = 0
-    while True:
-        archive_path = f"{base_path}/vote_archive_{vote_archive_index}"
-        if not s3.exists(archive_path):
-            logger.info(f"Next available archive folder is: {archive_path}")
-            break
-        vote_archive_index += 1
-
-    # 3. Identify items to move (everything except existing 'vote_archive_' folders)
-    items_to_move = [
-        item
-        for item in existing_contents
-        if not item.split("/")[-1].startswith("vote_archive_")
-    ]
-
-    # 4. Move the identified items into the new archive folder
-    if items_to_move:
-        logger.info(f"Moving {len(items_to_move)} items to {archive_path}...")
-        for source_path in items_to_move:
-            # Extract the base name (file or folder name) from the source path
-            base_name = source_path.split("/")[-1]
-            destination_path = f"{archive_path}/{base_name}"
-            logger.info(f"Moving {source_path} -> {destination_path}")
-            s3.mv(source_path, destination_path, recursive=True)
-        logger.info("✅ Move operation completed.")
-    else:
-        logger.info(
-            "No new items to archive (only found existing vote_archive_* folders)."
-        )
+    logger.info(f"✅ Previous run archived to {archive_path}")
 
 
 @task(name="Enrich data with on-chain infos and misc stuff")
@@ -289,49 +313,46 @@ def enrich_proposal_data(network: str, proposal_id: int):
 
 
 @task(name="Enrich data with on-chain infos and misc stuff")
-def generate_prompt_content(network: str, proposal_id: int):
+def generate_prompt_content(
+    network: str,
+    proposal_id: int,
+    proposal_data: Optional[Dict[str, Any]] = None,
+    s3_creds: Optional[Dict[str, str]] = None,
+):
     """
-    Reads raw proposal data from S3, generates a markdown file with dummy content,
-    and writes it back to S3.
+    Generates the markdown prompt content of a proposal and writes it to S3.
+    The scraper hands over the data it just fetched; the raw data is only read
+    back from S3 when run on its own (retry, resume).
     """
     logger = get_run_logger()
     logger.info(f"Starting content generation for {network} proposal {proposal_id}.")
 
-    # TODO clean up all this S3 mess
-    s3_bucket_block = Secret.load("scaleway-bucket-name")
-    endpoint_block = Secret.load("scaleway-s3-endpoint-url")
-    access_key_block = Secret.load("scaleway-write-access-key-id")
-    secret_key_block = Secret.load("scaleway-write-secret-access-key")
-    openrouter_api_key_block = Secret.load("openrouter-api-key")
-
-    s3_bucket = s3_bucket_block.value
-    endpoint_url = endpoint_block.value
-    access_key = access_key_block.get()
-    secret_key = secret_key_block.get()
-    openrouter_api_key = openrouter_api_key_block.get()
-
-    input_s3_path = (
-        f"{s3_bucket}/proposals/{network}/{proposal_id}/raw_subsquare_data.json"
-    )
-    output_s3_path = f"{s3_bucket}/proposals/{network}/{proposal_id}/content.md"
-    logger.info(f"Reading from: {input_s3_path}")
+    if s3_creds is None:
+        s3_creds = credentials.s3_sync(write=True).as_dict()
+    openrouter_api_key = credentials.secret_sync("openrouter-api-key")
+    s3_bucket = s3_creds["s3_bucket"]
+
+    proposal_s3_path = f"{s3_bucket}/proposals/{network}/{proposal_id}"
+    input_s3_path = f"{proposal_s3_path}/raw_subsquare_data.json"
+    output_s3_path = f"{proposal_s3_path}/content.md"
     logger.info(f"Writing to: {output_s3_path}")
 
     try:
-        s3 = s3fs.S3FileSystem(
-            key=access_key,
-            secret=secret_key,
-            client_kwargs={
-                "endpoint_url": endpoint_url,
-            },
+        s3 = setup_s3_filesystem(
+            access_key=s3_creds["access_key"],
+            secret_key=s3_creds["secret_key"],
+            endpoint_url=s3_creds["endpoint_url"],
         )
 
-        logger.info(f"Reading source file {input_s3_path}...")
-        with s3.open(input_s3_path, "r") as f:
-            input_data = json.load(f)
-        logger.info("✅ Source data read successfully.")
+        if proposal_data is not None:
+            input_data = proposal_data
+        else:
+            logger.info(f"Reading source file {input_s3_path}...")
+            with s3.open(input_s3_path, "r") as f:
+                input_data = json.load(f)
+            logger.info("✅ Source data read successfully.")
 
-        content_md = generate_content_for_magis(
+        content_files = generate_content_files_for_magis(
             proposal_data=input_data,
             logger=logger,
             openrouter_model="openrouter/anthropic/claude-sonnet-4",  # TODO make this a variable later
@@ -339,10 +360,11 @@ def generate_prompt_content(network: str, proposal_id: int):
             network=network
         )
 
-        # Write the new content.md file
-        logger.info(f"Writing markdown to {output_s3_path}...")
-        with s3.open(output_s3_path, "w") as f:
-            f.write(content_md)
+        # Write the new content.md file (and content_full.md when the content was digested)
+        for file_name, text in content_files.items():
+            logger.info(f"Writing markdown to {proposal_s3_path}/{file_name}...")
+            with s3.open(f"{proposal_s3_path}/{file_name}", "w") as f:
+                f.write(text)
 
         logger.info(f"✅ Success! Prompt content saved to {output_s3_path}")
 
@@ -356,60 +378,94 @@ def generate_prompt_content(network: str, proposal_id: int):
         raise
 
 
-@flow(name="Fetch Proposal Data")
-async def fetch_proposal_data(
-    network: str, 
-    proposal_id: int, 
-    schedule_inference: bool = True
-):
+async def scrape_proposal(
+    network: str,
+    proposal_id: int,
+    s3_creds: Dict[str, str],
+    schedule_inference: bool = True,
+    hedged_fetch: bool = True,
+) -> Dict[str, str]:
     """
-    Fetch relevant data for a proposal, parse its data, and save it to S3.
+    Fetches the proposal and, if its content changed since the stored run,
+    archives that run, stores the new data and prepares its prompt content;
+    then schedules its inference. Works on already-loaded credentials and is
+    shared by the single-proposal flow and backfills. Never raises: returns
+    {"status": "processed" | "skipped" | "failed", "message": ...}.
     """
     logger = get_run_logger()
-
-    if network not in NETWORK_MAP:
-        logger.error(
-            f"Invalid network '{network}'. Must be one of {list(NETWORK_MAP.keys())}"
-        )
-        return
+    base_path = f"{s3_creds['s3_bucket']}/proposals/{network}/{proposal_id}"
 
     try:
-        logger.info("Check if new run")
-        archive_previous_run(
-            network=network,
-            proposal_id=proposal_id,
-        )
-
         logger.info(f"Fetching data for proposal {proposal_id} on {network}")
-        raw_data_s3_path = fetch_and_store_raw_subsquare_data(
-            network=network,
-            proposal_id=proposal_id,
-        )
+        raw_proposal_data = await fetch_raw_proposal_data(network, proposal_id, hedged_fetch)
+        content_hash = proposal_content_hash(raw_proposal_data)
 
-        logger.info(f"Raw data is available at: {raw_data_s3_path}")
-        
-        logger.info("Validating proposal track...")
-        s3_creds = await load_s3_credentials()
         s3 = setup_s3_filesystem(
             access_key=s3_creds["access_key"],
             secret_key=s3_creds["secret_key"],
-            endpoint_url=s3_creds["endpoint_url"]
+            endpoint_url=s3_creds["endpoint_url"],
         )
-        
-        with s3.open(raw_data_s3_path, "r") as f:
-            raw_proposal_data = json.load(f)
-        
-        if not validate_proposal_track(raw_proposal_data):
+        unchanged = await asyncio.to_thread(is_unchanged_scrape, s3, base_path, content_hash)
+
+        logger.info("Validating proposal track...")
+        track_is_valid = validate_proposal_track(raw_proposal_data)
+
+        if unchanged:
+            logger.info(
+                f"Content of {network}/{proposal_id} unchanged since the last scrape ({content_hash[:12]}), "
+                "keeping the stored run and its content.md"
+            )
+        else:
+            logger.info("Check if new run")
+            await asyncio.to_thread(
+                archive_previous_run,
+                network=network,
+                proposal_id=proposal_id,
+                s3_creds=s3_creds,
+            )
+
+            # Write-behind: the raw data is uploaded while the prompt is generated
+            # from the copy in memory. Awaited before the metadata marks the run complete.
+            upload = asyncio.create_task(
+                store_raw_proposal_data(
+                    network=network,
+                    proposal_id=proposal_id,
+                    s3_creds=s3_creds,
+                    proposal_data=raw_proposal_data,
+                )
+            )
+            try:
+                if track_is_valid:
+                    logger.info("Placeholder for enrichment tasks.")
+                    await asyncio.to_thread(enrich_proposal_data, network=network, proposal_id=proposal_id)
+
+                    logger.info("Placeholder for LLM prompt generation.")
+                    await asyncio.to_thread(
+                        generate_prompt_content,
+                        network=network,
+                        proposal_id=proposal_id,
+                        proposal_data=raw_proposal_data,
+                        s3_creds=s3_creds,
+                    )
+            finally:
+                raw_data_s3_path = await upload
+            logger.info(f"Raw data is available at: {raw_data_s3_path}")
+
+            # Written last: a run that failed halfway is never mistaken for a complete one
+            await asyncio.to_thread(
+                write_scrape_metadata,
+                s3,
+                base_path,
+                content_hash,
+                prompt_generated=track_is_valid,
+                source=raw_proposal_data.get("_source"),
+            )
+
+        if not track_is_valid:
             track_id = raw_proposal_data.get("track", "unknown")
             message = f"Not scheduling inference for this proposal, track_id {track_id} is not delegated to CyberGov"
             logger.warning(message)
-            return Completed(message=message)
-
-        logger.info("Placeholder for enrichment tasks.")
-        enrich_proposal_data(network=network, proposal_id=proposal_id)
-
-        logger.info("Placeholder for LLM prompt generation.")
-        generate_prompt_content(network=network, proposal_id=proposal_id)
+            return {"status": "skipped", "message": message}
 
         if schedule_inference:
             logger.info(
@@ -424,23 +480,129 @@ async def fetch_proposal_data(
         else:
             logger.info("✅ Data fetching completed! Skipping inference scheduling (schedule_inference=False)")
 
-    except ProposalFetchError as e:
+        return {"status": "processed", "message": f"Processed {network} proposal {proposal_id}"}
+
+    except ProposalFetchError:
         message = f"Failed to fetch proposal data for {network} proposal {proposal_id}"
-        logger.error(message)
-        return Failed(message=message)
-    except ProposalParseError as e:
+    except ProposalParseError:
         message = f"Failed to parse proposal data for {network} proposal {proposal_id}"
-        logger.error(message)
-        return Failed(message=message)
     except Exception as e:
         message = f"Unexpected error processing {network} proposal {proposal_id}: {str(e)}"
+    logger.error(message)
+    return {"status": "failed", "message": message}
+
+
+@flow(name="Fetch Proposal Data")
+async def fetch_proposal_data(
+    network: str, 
+    proposal_id: int, 
+    schedule_inference: bool = True,
+    hedged_fetch: bool = True,
+):
+    """
+    Fetch relevant data for a proposal, parse its data, and save it to S3.
+    """
+    logger = get_run_logger()
+
+    if network not in NETWORK_MAP:
+        logger.error(
+            f"Invalid network '{network}'. Must be one of {list(NETWORK_MAP.keys())}"
+        )
+        return
+
+    try:
+        s3_creds = await load_s3_credentials()
+    except Exception as e:
+        message = f"Could not load S3 credentials for {network} proposal {proposal_id}: {str(e)}"
         logger.error(message)
         return Failed(message=message)
 
+    result = await scrape_proposal(
+        network=network,
+        proposal_id=proposal_id,
+        s3_creds=s3_creds,
+        schedule_inference=schedule_inference,
+        hedged_fetch=hedged_fetch,
+    )
+    # Proposals on non-delegated tracks are done as far as the index is concerned
+    index_status = "failed" if result["status"] == "failed" else "processed"
+    record_scrape_result(s3_creds, network, proposal_id, index_status)
+
+    if result["status"] == "failed":
+        return Failed(message=result["message"])
+    return Completed(message=result["message"])
+
+
+@flow(name="Backfill Proposal Data")
+async def backfill_proposal_data(
+    network: str,
+    start_id: Optional[int] = None,
+    end_id: Optional[int] = None,
+    proposal_ids: Optional[List[int]] = None,
+    max_concurrency: int = BACKFILL_MAX_CONCURRENCY,
+    schedule_inference: bool = False,
+    hedged_fetch: bool = True,
+    resume: bool = True,
+) -> Dict[int, Dict[str, str]]:
+    """
+    Scrapes many proposals in one run: the inclusive range [start_id, end_id],
+    or an explicit list of ids. Credentials are loaded once and the HTTP client
+    is shared; at most `max_concurrency` proposals are in flight.
+
+    Every result is checkpointed to S3 as soon as it is known. With `resume`,
+    a re-run of the same backfill skips the ids already processed (or skipped)
+    and retries the failed ones. Returns the result of every id.
+    """
+    logger = get_run_logger()
+
+    if network not in NETWORK_MAP:
+        raise ValueError(f"Invalid network '{network}'. Must be one of {list(NETWORK_MAP.keys())}")
+    ids = backfill_ids(start_id, end_id, proposal_ids)
+
+    s3_creds = await load_s3_credentials()
+    s3 = setup_s3_filesystem(
+        access_key=s3_creds["access_key"],
+        secret_key=s3_creds["secret_key"],
+        endpoint_url=s3_creds["endpoint_url"],
+    )
+    checkpoint = checkpoint_path(s3_creds["s3_bucket"], network, ids)
+    results = load_checkpoint(s3, checkpoint) if resume else {}
+    todo = pending_ids(ids, results)
+    logger.info(
+        f"Backfilling {len(todo)} of {len(ids)} {network} proposals "
+        f"(max {max_concurrency} in flight), checkpoint at {checkpoint}"
+    )
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # The checkpoint and the proposal index are read-modify-write objects: one writer at a time
+    write_lock = asyncio.Lock()
+
+    async def run_one(proposal_id: int):
+        async with semaphore:
+            result = await scrape_proposal(
+                network=network,
+                proposal_id=proposal_id,
+                s3_creds=s3_creds,
+                schedule_inference=schedule_inference,
+                hedged_fetch=hedged_fetch,
+            )
+        logger.info(f"Backfill {network}/{proposal_id}: {result['status']}")
+        async with write_lock:
+            results[str(proposal_id)] = result
+            index_status = "failed" if result["status"] == "failed" else "processed"
+            await asyncio.to_thread(record_scrape_result, s3_creds, network, proposal_id, index_status)
+            await asyncio.to_thread(save_checkpoint, s3, checkpoint, network, ids, results)
+
+    await asyncio.gather(*(run_one(proposal_id) for proposal_id in todo))
+
+    report = {proposal_id: results[str(proposal_id)] for proposal_id in ids if str(proposal_id) in results}
+    counts = collections.Counter(result["status"] for result in report.values())
+    logger.info(f"Backfill of {network} done: {dict(counts)}")
+    return report
+
 
 if __name__ == "__main__":
     import sys
-    import asyncio
 
     if len(sys.argv) != 3:
         print("Usage: python cybergov_data_scraper.py <network> <proposal_id>")
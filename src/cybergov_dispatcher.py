@@ -1,76 +1,71 @@
+import asyncio
 import datetime
-from typing import List, Optional, Dict
+import socket
+import time
+from typing import Any, List, Optional, Dict, Set, Tuple
 from prefect import flow, task, get_run_logger
+from prefect.runtime import flow_run
 import s3fs
 import httpx
-import os
-from prefect.blocks.system import String, Secret
-from prefect.server.schemas.filters import (
-    FlowRunFilter,
-    FlowRunFilterState,
-    FlowRunFilterStateType,
-    DeploymentFilter,
-    DeploymentFilterId,
-    FlowRunFilterName,
-)
 from prefect.client.orchestration import get_client
 from prefect.states import Scheduled
-from prefect.client.schemas.objects import StateType
+from substrateinterface import SubstrateInterface
 from utils.constants import (
     SCRAPING_SCHEDULE_DELAY_DAYS,
+    SCHEDULING_MAX_CONCURRENCY,
     DATA_SCRAPER_DEPLOYMENT_ID,
     CYBERGOV_PARAMS,
+    ALLOWED_TRACK_IDS,
+    DISPATCHER_LEASE_TTL_SECONDS,
+    DISPATCHER_LEASE_SETTLE_SECONDS,
+)
+from utils.scheduling import fetch_scheduled_proposal_ids, flow_run_name, schedule_flow_runs
+from utils.proposal_index import (
+    ProposalIndex,
+    proposal_index_path,
+    load_current_proposal_index,
+    compact_proposal_index,
+    record_stage_results,
+)
+from utils.endpoints import async_sidecar_request, run_with_substrate
+from utils.credentials import credentials
+from utils.s3 import s3_filesystem
+from utils.leases import try_acquire_lease, release_lease, read_lease
+from utils.referenda import (
+    fetch_referendum_infos,
+    fetch_referendum_deadlines,
+    referendum_track,
 )
 
 
 @task
-async def get_last_processed_id_from_s3(
+async def load_network_proposal_index(
     network: str, s3_bucket: str, access_key: str, secret_key: str, endpoint_url: str
-) -> int:
+) -> ProposalIndex:
     """
-    Checks S3-compatible storage (like Scaleway) using credentials and a specific endpoint_url.
+    Reads the per-network proposal index object (high-watermark + processed/failed
+    bitmaps) from S3-compatible storage (like Scaleway), with a single GET, plus
+    the outcome markers the other flows recorded since the last compaction (one LIST).
+
+    Falls back to listing the proposal folders when the index was never written;
+    the next compaction persists it.
     """
     logger = get_run_logger()
-    s3_path = f"{s3_bucket}/proposals/{network}/"
-    logger.info(
-        f"Checking for existing proposals in S3-compatible storage path: s3://{s3_path}"
-    )
+    index_path = proposal_index_path(s3_bucket, network)
+    logger.info(f"Reading proposal index s3://{index_path}")
     logger.info(f"Using S3 endpoint: {endpoint_url}")
 
     try:
-        s3 = s3fs.S3FileSystem(
-            key=access_key,
-            secret=secret_key,
-            client_kwargs={
-                "endpoint_url": endpoint_url,
-            },
-        )
+        s3 = s3_filesystem(access_key, secret_key, endpoint_url)
 
-        existing_proposal_paths = s3.ls(s3_path, detail=False)
+        index, marker_paths = load_current_proposal_index(s3, s3_bucket, network)
+        logger.info(f"Applied {len(marker_paths)} pending outcome marker(s) to the '{network}' index.")
 
-        proposal_ids = []
-        for path in existing_proposal_paths:
-            last_component = os.path.basename(path.rstrip("/"))
-            if last_component.isdigit():
-                proposal_ids.append(int(last_component))
+        logger.info(f"Highest proposal ID processed for '{network}' is {index.high_watermark}.")
+        return index
 
-        if not proposal_ids:
-            logger.info(
-                f"No existing proposals found for '{network}'. Starting from 0."
-            )
-            return 0
-
-        max_id = max(proposal_ids)
-        logger.info(f"Highest proposal ID found for '{network}' is {max_id}.")
-        return max_id
-
-    except FileNotFoundError:
-        logger.info(
-            f"S3 path s3://{s3_path} does not exist. Assuming first run for '{network}'."
-        )
-        return 0
     except Exception as e:
-        logger.error(f"Failed to list S3 directory 's3://{s3_path}': {e}")
+        logger.error(f"Failed to read proposal index for '{network}': {e}")
         raise
 
 
@@ -84,32 +79,36 @@ async def find_new_proposals(network: str, last_known_id: int) -> List[Dict]:
 
     try:
         # Using sidacar, am lazy, also this will allow to automatically be ready for the migration. nice
-        network_sidecar_block = await Secret.load(f"{network}-sidecar-url")
-        network_sidecar_url = network_sidecar_block.get()
+        sidecar = await credentials.sidecar(network)
     except Exception as e:
         logger.error(f"Failed to load secret for network '{network}': {e}")
         raise
 
-    url = f"{network_sidecar_url}/pallets/referenda/storage/referendumCount"
+    url = "/pallets/referenda/storage/referendumCount"
 
     headers = {"Accept": "application/json"}
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, timeout=15.0)
-            response.raise_for_status()
-
-            data = response.json()
-            last_proposal_id = data.get("value", None)
-
-            if last_proposal_id is not None:
-                last_proposal_id = int(last_proposal_id)
-                logger.info(
-                    f"Successfully fetched last proposal ID for '{network}': {last_proposal_id}"
-                )
-            else:
-                logger.warning(f"No 'value' found in JSON response: {data}")
-                raise
+        response = await async_sidecar_request(
+            network,
+            sidecar.urls,
+            "GET",
+            url,
+            headers=headers,
+            timeout=15.0,
+        )
+
+        data = response.json()
+        last_proposal_id = data.get("value", None)
+
+        if last_proposal_id is not None:
+            last_proposal_id = int(last_proposal_id)
+            logger.info(
+                f"Successfully fetched last proposal ID for '{network}': {last_proposal_id}"
+            )
+        else:
+            logger.warning(f"No 'value' found in JSON response: {data}")
+            raise
 
     except httpx.RequestError as e:
         logger.error(f"HTTP request failed for {url}: {e}")
@@ -138,49 +137,122 @@ async def find_new_proposals(network: str, last_known_id: int) -> List[Dict]:
 
 
 @task
-async def check_if_already_scheduled(proposal_id: int, network: str) -> bool:
+async def load_scheduled_scrape_index(network: str) -> Set[int]:
     """
-    Checks the Prefect API to see if a scraper run for this proposal
-    already exists (in a non-failed state).
+    Fetches all existing (non-failed) scraper runs for a network in one paginated
+    query, and returns the proposal ids they cover.
     """
     logger = get_run_logger()
-    logger.info(f"Checking for existing flow runs for {network}-{proposal_id}...")
+    logger.info(f"Loading existing scrape-{network}-* flow runs...")
 
-    async with get_client() as client:
-        existing_runs = await client.read_flow_runs(
-            flow_run_filter=FlowRunFilter(
-                name=FlowRunFilterName(like_=f"scrape-{network}-{proposal_id}"),
-                state=FlowRunFilterState(
-                    type=FlowRunFilterStateType(
-                        any_=[
-                            StateType.RUNNING,
-                            StateType.COMPLETED,  # If automatically triggered, we don't re-scape. Gotta be done manually.
-                            StateType.PENDING,
-                            StateType.SCHEDULED,
-                        ]
-                    )
-                ),
-            ),
-            deployment_filter=DeploymentFilter(
-                id=DeploymentFilterId(any_=[DATA_SCRAPER_DEPLOYMENT_ID])
-            ),
-        )
+    scheduled_ids = await fetch_scheduled_proposal_ids(stage="scrape", network=network)
 
-    if existing_runs:
-        logger.warning(
-            f"Found {len(existing_runs)} existing run(s) for proposal {proposal_id} on '{network}'. Skipping scheduling."
-        )
-        return True
+    logger.info(f"Found {len(scheduled_ids)} proposal(s) already scheduled on '{network}'.")
+    return scheduled_ids
+
+
+@task
+async def split_by_delegated_track(
+    network: str, proposal_ids: List[int]
+) -> Tuple[List[int], List[int], Dict[int, Optional[datetime.datetime]]]:
+    """
+    Reads `Referenda.ReferendumInfoFor` for all candidates in one multi-key storage
+    request, and splits them into (to_schedule, skipped, deadlines). Referenda whose
+    track is not in ALLOWED_TRACK_IDS are skipped before any scraping happens.
+    Referenda with no readable track (e.g. already finished) are left to the scraper.
+    The same read gives each referendum's voting deadline.
+    """
+    logger = get_run_logger()
+
+    rpc = await credentials.rpc(network)
+
+    def query_infos(substrate: SubstrateInterface):
+        infos = fetch_referendum_infos(substrate, proposal_ids)
+        return infos, fetch_referendum_deadlines(substrate, proposal_ids, infos=infos)
+
+    infos, deadlines = await asyncio.to_thread(
+        run_with_substrate, network, rpc.urls, query_infos
+    )
+
+    to_schedule, skipped = [], []
+    for p_id in proposal_ids:
+        track = referendum_track(infos.get(p_id))
+        if track is not None and track not in ALLOWED_TRACK_IDS:
+            skipped.append(p_id)
+        else:
+            to_schedule.append(p_id)
 
     logger.info(
-        f"No existing runs found for proposal {proposal_id} on '{network}'. It's safe to schedule."
+        f"Track filter on '{network}': {len(to_schedule)} to schedule, "
+        f"{len(skipped)} on non-delegated tracks skipped: {skipped}"
     )
-    return False
+    return to_schedule, skipped, {p_id: deadlines.get(p_id) for p_id in to_schedule}
+
+
+@task
+async def compact_network_proposal_index(network: str):
+    """
+    Folds the outcome markers into the index object. Only called while holding the
+    network's lease, which makes the dispatcher the index object's single writer.
+    Needs the write credentials; best-effort, the markers just wait for the next run.
+    """
+    logger = get_run_logger()
+    try:
+        s3_config = await credentials.s3(write=True)
+        s3 = s3_filesystem(s3_config.access_key, s3_config.secret_key, s3_config.endpoint_url)
+        await asyncio.to_thread(compact_proposal_index, s3, s3_config.bucket, network)
+    except Exception as e:
+        logger.warning(f"Could not compact the proposal index of '{network}': {e}")
+
+
+@task
+async def record_skipped_proposals(network: str, proposal_ids: List[int]):
+    """
+    Marks skipped proposals in the proposal index, so they are neither scheduled
+    nor backfilled again. Needs the write credentials; best-effort.
+    """
+    logger = get_run_logger()
+    try:
+        s3_config = await credentials.s3(write=True)
+        s3 = s3_filesystem(s3_config.access_key, s3_config.secret_key, s3_config.endpoint_url)
+        await asyncio.to_thread(
+            record_stage_results, s3, s3_config.bucket, network, "scrape", proposal_ids, "skipped"
+        )
+    except Exception as e:
+        logger.warning(f"Could not record skipped proposals {proposal_ids} on '{network}': {e}")
+
+
+async def drop_undelegated_proposals(
+    network: str, proposal_ids: List[int]
+) -> Tuple[List[int], Dict[int, Optional[datetime.datetime]]]:
+    """
+    Filters candidates down to delegated tracks and records the others as skipped.
+    Returns the kept ids with their deadlines. If the chain can't be queried, every
+    candidate is kept without a deadline and the scraper's own track validation applies.
+    """
+    logger = get_run_logger()
+    if not proposal_ids:
+        return proposal_ids, {}
+
+    try:
+        to_schedule, skipped, deadlines = await split_by_delegated_track(
+            network=network, proposal_ids=proposal_ids
+        )
+    except Exception as e:
+        logger.warning(f"On-chain track filter failed for '{network}', scheduling all candidates: {e}")
+        return proposal_ids, {}
+
+    if skipped:
+        await record_skipped_proposals(network=network, proposal_ids=skipped)
+    return to_schedule, deadlines
 
 
 @task
 async def schedule_scraping_task(proposal_id: int, network: str):
-    """Schedules the cybergov_scraper flow to run in the future."""
+    """
+    Schedules the cybergov_scraper flow to run in the future. Used for manual
+    overrides, so it deliberately carries no idempotency key.
+    """
     logger = get_run_logger()
 
     delay = datetime.timedelta(days=SCRAPING_SCHEDULE_DELAY_DAYS)
@@ -192,7 +264,7 @@ async def schedule_scraping_task(proposal_id: int, network: str):
 
     async with get_client() as client:
         await client.create_flow_run_from_deployment(
-            name=f"scrape-{network}-{proposal_id}",
+            name=flow_run_name("scrape", network, proposal_id),
             deployment_id=DATA_SCRAPER_DEPLOYMENT_ID,
             parameters={"proposal_id": proposal_id, "network": network},
             state=Scheduled(),
@@ -200,6 +272,173 @@ async def schedule_scraping_task(proposal_id: int, network: str):
         )
 
 
+@task
+async def schedule_scraping_tasks(
+    proposal_ids: List[int],
+    network: str,
+    key_suffix: Optional[str] = None,
+    deadlines: Optional[Dict[int, Optional[datetime.datetime]]] = None,
+) -> Dict[str, Any]:
+    """
+    Schedules the cybergov_scraper flow for many proposals at once, with bounded
+    concurrency and one idempotency key per proposal. Referenda closest to their
+    deadline are scheduled first, and their scraping delay is shortened.
+    """
+    logger = get_run_logger()
+    logger.info(
+        f"Scheduling scrapers for {len(proposal_ids)} proposal(s) on '{network}' "
+        f"(max {SCHEDULING_MAX_CONCURRENCY} in flight)"
+    )
+
+    result = await schedule_flow_runs(
+        stage="scrape",
+        network=network,
+        proposal_ids=proposal_ids,
+        key_suffix=key_suffix,
+        default_delay=datetime.timedelta(days=SCRAPING_SCHEDULE_DELAY_DAYS),
+        deadlines=deadlines,
+    )
+
+    for p_id, error in result["failed"].items():
+        logger.error(f"Failed to schedule scraper for proposal {p_id} on '{network}': {error}")
+    logger.info(f"Scheduled scrapers on '{network}' for: {result['scheduled']}")
+    return result
+
+
+async def acquire_network_lease(s3: s3fs.S3FileSystem, s3_bucket: str, network: str, owner: str) -> bool:
+    """
+    Claims `network` for this dispatcher worker. Workers that lose the claim skip
+    the network; a dead worker's lease expires after DISPATCHER_LEASE_TTL_SECONDS.
+    If the lease store can't be reached, the network is skipped too: the lease
+    makes its holder the index compaction's single writer, so it can't be assumed.
+    """
+    logger = get_run_logger()
+    try:
+        acquired = await asyncio.to_thread(
+            try_acquire_lease,
+            s3,
+            s3_bucket,
+            network,
+            owner,
+            DISPATCHER_LEASE_TTL_SECONDS,
+            DISPATCHER_LEASE_SETTLE_SECONDS,
+        )
+    except Exception as e:
+        logger.error(f"Lease store unavailable for '{network}', skipping it this run: {e}")
+        return False
+
+    if acquired:
+        logger.info(f"Worker '{owner}' holds the lease on '{network}'.")
+    else:
+        lease = await asyncio.to_thread(read_lease, s3, s3_bucket, network)
+        logger.info(
+            f"'{network}' is leased by '{lease.get('owner') if lease else 'unknown'}' "
+            f"until {lease.get('expires_at') if lease else 'unknown'}, skipping it."
+        )
+    return acquired
+
+
+async def release_network_lease(s3: s3fs.S3FileSystem, s3_bucket: str, network: str, owner: str):
+    logger = get_run_logger()
+    try:
+        await asyncio.to_thread(release_lease, s3, s3_bucket, network, owner)
+    except Exception as e:
+        # It expires on its own
+        logger.warning(f"Could not release the lease on '{network}': {e}")
+
+
+async def dispatch_network(
+    network: str,
+    s3_bucket: str,
+    access_key: str,
+    secret_key: str,
+    endpoint_url: str,
+    backfill_gaps: bool = False,
+) -> Dict[str, Any]:
+    """
+    Finds and schedules new proposals for a single network. With `backfill_gaps`,
+    also re-schedules proposals below the high-watermark that were never scraped
+    or whose scrape failed.
+    Returns a small report with the per-step timings, so slow upstreams are visible.
+    """
+    logger = get_run_logger()
+    timings = {}
+    scheduled = []
+
+    started_at = time.monotonic()
+    proposal_index = await load_network_proposal_index(
+        network=network,
+        s3_bucket=s3_bucket,
+        access_key=access_key,
+        secret_key=secret_key,
+        endpoint_url=endpoint_url,
+    )
+    last_known_id = proposal_index.high_watermark
+    timings["s3_seconds"] = round(time.monotonic() - started_at, 3)
+
+    step_started_at = time.monotonic()
+    new_proposals = await find_new_proposals(
+        network=network, last_known_id=last_known_id
+    )
+    timings["sidecar_seconds"] = round(time.monotonic() - step_started_at, 3)
+
+    gap_ids = []
+    if backfill_gaps:
+        min_threshold = CYBERGOV_PARAMS.get("min_proposal_id", {}).get(network, 0)
+        gap_ids = proposal_index.gaps("scrape", min_threshold + 1, last_known_id)
+        logger.info(f"Backfilling {len(gap_ids)} unprocessed proposal(s) on '{network}': {gap_ids}")
+
+    step_started_at = time.monotonic()
+    scheduled_ids = set()
+    if not new_proposals and not gap_ids:
+        logger.info(f"No new proposals to schedule for '{network}'.")
+    else:
+        scheduled_ids = await load_scheduled_scrape_index(network=network)
+
+    new_ids = [p["proposalIndex"] for p in new_proposals if p["proposalIndex"] not in scheduled_ids]
+    gap_ids = [p_id for p_id in gap_ids if p_id not in scheduled_ids]
+    skipped = len(new_proposals) - len(new_ids)
+    if skipped:
+        logger.warning(f"{skipped} proposal(s) on '{network}' already have a scraper run. Skipping them.")
+
+    candidate_count = len(new_ids) + len(gap_ids)
+    delegated_ids, deadlines = await drop_undelegated_proposals(network, new_ids + gap_ids)
+    delegated_ids = set(delegated_ids)
+    new_ids = [p_id for p_id in new_ids if p_id in delegated_ids]
+    gap_ids = [p_id for p_id in gap_ids if p_id in delegated_ids]
+    skipped_tracks = candidate_count - len(new_ids) - len(gap_ids)
+
+    failed = {}
+    if new_ids:
+        result = await schedule_scraping_tasks(
+            proposal_ids=new_ids, network=network, deadlines=deadlines
+        )
+        scheduled += result["scheduled"]
+        failed.update(result["failed"])
+    if gap_ids:
+        # A failed run keeps its idempotency key, so backfills get one fresh key per day
+        backfill_suffix = "backfill-" + datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d")
+        result = await schedule_scraping_tasks(
+            proposal_ids=gap_ids, network=network, key_suffix=backfill_suffix, deadlines=deadlines
+        )
+        scheduled += result["scheduled"]
+        failed.update(result["failed"])
+    timings["prefect_seconds"] = round(time.monotonic() - step_started_at, 3)
+
+    await compact_network_proposal_index(network=network)
+    timings["total_seconds"] = round(time.monotonic() - started_at, 3)
+
+    return {
+        "status": "ok",
+        "last_known_id": last_known_id,
+        "new_proposals": len(new_proposals),
+        "scheduled": scheduled,
+        "skipped_tracks": skipped_tracks,
+        "failed": failed,
+        "timings": timings,
+    }
+
+
 # --- The Main Dispatcher Flow ---
 @flow(name="Cybergov Proposal Dispatcher", log_prints=True)
 async def cybergov_dispatcher_flow(
@@ -207,21 +446,28 @@ async def cybergov_dispatcher_flow(
     networks: List[str] = ["paseo"],
     proposal_id: Optional[int] = None,
     network: Optional[str] = None,
-):
+    backfill_gaps: bool = False,
+    worker_id: Optional[str] = None,
+) -> Optional[Dict[str, Dict[str, Any]]]:
     """
     Checks for new proposals using Scaleway S3, then schedules scraping tasks.
+
+    Networks are dispatched concurrently; a failure on one network is logged and
+    reported without aborting the others. Returns a per-network report.
+    Set `backfill_gaps` to also re-schedule unprocessed proposals below each
+    network's high-watermark.
+
+    Several dispatcher workers can run side by side: each network is only
+    dispatched by the worker holding its lease. `worker_id` defaults to the
+    host and flow run id.
     """
     logger = get_run_logger()
 
-    s3_bucket_block = await String.load("scaleway-bucket-name")
-    endpoint_block = await String.load("scaleway-s3-endpoint-url")
-    access_key_block = await Secret.load("scaleway-access-key-id")
-    secret_key_block = await Secret.load("scaleway-secret-access-key")
-
-    s3_bucket = s3_bucket_block.value
-    endpoint_url = endpoint_block.value
-    access_key = access_key_block.get()
-    secret_key = secret_key_block.get()
+    s3_config = await credentials.s3()
+    s3_bucket = s3_config.bucket
+    endpoint_url = s3_config.endpoint_url
+    access_key = s3_config.access_key
+    secret_key = s3_config.secret_key
 
     if proposal_id is not None and network is not None:
         logger.warning(
@@ -231,33 +477,60 @@ async def cybergov_dispatcher_flow(
         return
 
     logger.info(f"Running in scheduled mode for networks: {networks}")
-    for net in networks:
-        last_known_id = await get_last_processed_id_from_s3(
-            network=net,
-            s3_bucket=s3_bucket,
-            access_key=access_key,
-            secret_key=secret_key,
-            endpoint_url=endpoint_url,
-        )
-        new_proposals = await find_new_proposals(
-            network=net, last_known_id=last_known_id
-        )
-        if not new_proposals:
-            logger.info(f"No new proposals to schedule for '{net}'.")
-            continue
-
-        for proposal in new_proposals:
-            p_id = proposal["proposalIndex"]
-            is_already_scheduled = await check_if_already_scheduled(
-                proposal_id=p_id, network=net
+
+    owner = worker_id or f"{socket.gethostname()}-{flow_run.id}"
+    write_s3_config = await credentials.s3(write=True)
+    lease_s3 = s3_filesystem(write_s3_config.access_key, write_s3_config.secret_key, endpoint_url)
+
+    async def timed_dispatch(net: str) -> Dict[str, Any]:
+        started_at = time.monotonic()
+        if not await acquire_network_lease(s3=lease_s3, s3_bucket=s3_bucket, network=net, owner=owner):
+            return {
+                "status": "leased",
+                "timings": {
+                    "total_seconds": round(time.monotonic() - started_at, 3)
+                },
+            }
+
+        try:
+            return await dispatch_network(
+                network=net,
+                s3_bucket=s3_bucket,
+                access_key=access_key,
+                secret_key=secret_key,
+                endpoint_url=endpoint_url,
+                backfill_gaps=backfill_gaps,
             )
-            if not is_already_scheduled:
-                await schedule_scraping_task(proposal_id=p_id, network=net)
+        except Exception as e:
+            logger.error(f"Dispatching failed for '{net}': {e}")
+            return {
+                "status": "failed",
+                "error": str(e),
+                "timings": {
+                    "total_seconds": round(time.monotonic() - started_at, 3)
+                },
+            }
+        finally:
+            await release_network_lease(s3=lease_s3, s3_bucket=s3_bucket, network=net, owner=owner)
+
+    results = await asyncio.gather(*(timed_dispatch(net) for net in networks))
+    report = dict(zip(networks, results))
+
+    for net, result in report.items():
+        logger.info(
+            f"'{net}' dispatch {result['status']} in "
+            f"{result['timings']['total_seconds']}s: {result['timings']}"
+        )
+
+    failed_networks = [net for net, result in report.items() if result["status"] == "failed"]
+    if failed_networks and len(failed_networks) == len(networks):
+        raise RuntimeError(f"Dispatching failed for all networks: {failed_networks}")
+
+    return report
 
 
 if __name__ == "__main__":
     import sys
-    import asyncio
 
     if len(sys.argv) != 3:
         print("Usage: python cybergov_dispatcher.py <network> <proposal_id>")
@@ -6,7 +6,9 @@ import os
 import hashlib
 
 from utils.helpers import setup_logging, get_config_from_env, hash_file
+from utils.s3 import check_connection
 from utils.run_magi_eval import run_single_inference, setup_compiled_agent
+from utils.llm_cache import get_response_cache
 from pathlib import Path
 from collections import Counter
 
@@ -380,7 +382,7 @@ def setup_s3_and_workspace(config):
             asynchronous=False,
             loop=None,
         )
-        s3.ls(s3_bucket, detail=False, refresh=True) # Test connection
+        check_connection(s3, s3_bucket)  # One HEAD on the bucket, not a listing of its root
     except Exception as e:
         logger.error("Something went wrong during S3 initialization")
         sys.exit(1)
@@ -484,6 +486,7 @@ def main():
 
         local_analysis_files = run_magi_evaluations(magi_models, local_workspace)
         last_good_step = "magi_evaluation"
+        logger.info(f"LLM response cache: {get_response_cache().stats()}")
 
         local_vote_file = consolidate_vote(
             local_analysis_files, local_workspace, proposal_id, network
@@ -1,18 +1,8 @@
 from prefect import flow, task, get_run_logger
-from prefect.blocks.system import Secret
 import httpx
 from datetime import datetime, timedelta, timezone
 import time
-from prefect.server.schemas.filters import (
-    FlowRunFilter,
-    FlowRunFilterState,
-    FlowRunFilterStateType,
-    DeploymentFilter,
-    DeploymentFilterId,
-    FlowRunFilterName,
-)
 from prefect.client.orchestration import get_client
-from prefect.client.schemas.objects import StateType
 
 # To ensure transparency, this has to run on GitHub actions
 # That way it is public, and the data + logic used to vote are transparent
@@ -25,6 +15,12 @@ from utils.constants import (
     INFERENCE_FIND_RUN_TIMEOUT_SECONDS,
     GH_WORKFLOW_NETWORK_MAPPING,
 )
+from utils.scheduling import (
+    is_already_scheduled,
+    flow_run_name,
+    stage_scheduled_state,
+)
+from utils.credentials import credentials
 
 
 @task
@@ -39,7 +35,7 @@ def trigger_github_action_worker(proposal_id: int, network: str):
     )
 
     try:
-        github_pat = Secret.load("github-pat").get()
+        github_pat = credentials.secret_sync("github-pat")
     except ValueError:
         logger.error("Could not load 'github-pat' Secret block from Prefect.")
         raise
@@ -83,7 +79,7 @@ def find_workflow_run(
     logger = get_run_logger()
     logger.info(f"Searching for new workflow run for '{workflow_file_name}'...")
 
-    github_pat = Secret.load("github-pat").get()
+    github_pat = credentials.secret_sync("github-pat")
     # API https://docs.github.com/en/rest/actions/workflow-runs?apiVersion=2022-11-28#list-workflow-runs-for-a-workflow
     url = f"https://api.github.com/repos/{GITHUB_REPO}/actions/workflows/{workflow_file_name}/runs"
     headers = {
@@ -129,7 +125,7 @@ def poll_workflow_run_status(run_id: int):
     logger = get_run_logger()
     logger.info(f"Polling status for workflow run ID: {run_id}")
 
-    github_pat = Secret.load("github-pat").get()
+    github_pat = credentials.secret_sync("github-pat")
     url = f"https://api.github.com/repos/{GITHUB_REPO}/actions/runs/{run_id}"
     headers = {
         "Accept": "application/vnd.github.v3+json",
@@ -175,29 +171,13 @@ async def check_if_voting_already_scheduled(proposal_id: int, network: str) -> b
     logger = get_run_logger()
     logger.info(f"Checking for existing flow runs for vote-{network}-{proposal_id}...")
 
-    async with get_client() as client:
-        existing_runs = await client.read_flow_runs(
-            flow_run_filter=FlowRunFilter(
-                name=FlowRunFilterName(like_=f"vote-{network}-{proposal_id}"),
-                state=FlowRunFilterState(
-                    type=FlowRunFilterStateType(
-                        any_=[
-                            StateType.RUNNING,
-                            StateType.COMPLETED,
-                            StateType.PENDING,
-                            StateType.SCHEDULED,
-                        ]
-                    )
-                ),
-            ),
-            deployment_filter=DeploymentFilter(
-                id=DeploymentFilterId(any_=[VOTING_DEPLOYMENT_ID])
-            ),
-        )
+    is_scheduled = await is_already_scheduled(
+        stage="vote", network=network, proposal_id=proposal_id
+    )
 
-    if existing_runs:
+    if is_scheduled:
         logger.warning(
-            f"Found {len(existing_runs)} existing vote run(s) for proposal {proposal_id} on '{network}'. Skipping scheduling."
+            f"Found an existing vote run for proposal {proposal_id} on '{network}'. Skipping scheduling."
         )
         return True
 
@@ -213,7 +193,8 @@ async def schedule_voting_task(proposal_id: int, network: str):
     logger = get_run_logger()
 
     delay = timedelta(minutes=VOTING_SCHEDULE_DELAY_MINUTES)
-    scheduled_time = datetime.now(timezone.utc) + delay
+    state = await stage_scheduled_state(network, proposal_id, delay, logger)
+    scheduled_time = state.state_details.scheduled_time
     logger.info(
         f"Scheduling MAGI vote for proposal {proposal_id} on '{network}' "
         f"to run at {scheduled_time.isoformat()}"
@@ -221,10 +202,10 @@ async def schedule_voting_task(proposal_id: int, network: str):
 
     async with get_client() as client:
         await client.create_flow_run_from_deployment(
-            name=f"vote-{network}-{proposal_id}",
+            name=flow_run_name("vote", network, proposal_id),
             deployment_id=VOTING_DEPLOYMENT_ID,
             parameters={"proposal_id": proposal_id, "network": network},
-            # state=Scheduled(scheduled_time=scheduled_time)
+            state=state,
         )
 
 
@@ -1,17 +1,7 @@
 import httpx
 from prefect import flow, get_run_logger, task
 from substrateinterface import Keypair, SubstrateInterface
-from prefect.server.schemas.filters import (
-    FlowRunFilter,
-    FlowRunFilterState,
-    FlowRunFilterStateType,
-    DeploymentFilter,
-    DeploymentFilterId,
-    FlowRunFilterName,
-)
 from prefect.client.orchestration import get_client
-from prefect.client.schemas.objects import StateType
-from prefect.blocks.system import String, Secret
 import s3fs
 import hashlib
 import datetime
@@ -25,6 +15,15 @@ from utils.constants import (
     voting_power,
     ALLOWED_TRACK_IDS,
 )
+from utils.scheduling import (
+    is_already_scheduled,
+    flow_run_name,
+    stage_scheduled_state,
+)
+from utils.endpoints import sidecar_request, run_with_substrate
+from utils.credentials import credentials
+from utils.s3 import s3_filesystem
+from utils.proposal_index import record_stage_result
 
 CONVICTION_UNANIMOUS = 6
 CONVICTION_DEFAULT = 1
@@ -38,16 +37,10 @@ class VoteResult(str, Enum):
 
 def setup_s3_filesystem(access_key: str, secret_key: str, endpoint_url: str) -> s3fs.S3FileSystem:
     """
-    Initialize S3 filesystem with consistent configuration.
+    S3 filesystem with consistent configuration, shared per credential set.
     Extracted from duplicated S3 setup code.
     """
-    return s3fs.S3FileSystem(
-        key=access_key,
-        secret=secret_key,
-        client_kwargs={"endpoint_url": endpoint_url},
-        asynchronous=False,
-        loop=None,
-    )
+    return s3_filesystem(access_key, secret_key, endpoint_url)
 
 
 async def load_s3_credentials() -> tuple[str, str, str, str]:
@@ -55,17 +48,8 @@ async def load_s3_credentials() -> tuple[str, str, str, str]:
     Load S3 credentials from Prefect blocks.
     Returns: (s3_bucket, endpoint_url, access_key, secret_key)
     """
-    s3_bucket_block = await String.load("scaleway-bucket-name")
-    endpoint_block = await String.load("scaleway-s3-endpoint-url")
-    access_key_block = await Secret.load("scaleway-access-key-id")
-    secret_key_block = await Secret.load("scaleway-secret-access-key")
-
-    return (
-        s3_bucket_block.value,
-        endpoint_block.value,
-        access_key_block.get(),
-        secret_key_block.get(),
-    )
+    s3 = await credentials.s3()
+    return s3.bucket, s3.endpoint_url, s3.access_key, s3.secret_key
 
 
 def get_remark_hash(s3_client: s3fs.S3FileSystem, file_path: str) -> str:
@@ -128,24 +112,24 @@ def create_and_sign_vote_tx(
     """
     logger = get_run_logger()
 
-    network_rpc_block = Secret.load(f"{network}-rpc-url")
-    network_rpc_url = network_rpc_block.get()
+    rpc = credentials.rpc_sync(network)
 
-    logger.info(f"Connecting to Sidecar node for {network} to prepare vote...")
+    logger.info(f"Connecting to RPC node for {network} to prepare vote...")
 
     try:
-        with SubstrateInterface(url=network_rpc_url) as substrate:
-            try:
-                mnemonic = Secret.load(f"{network}-cybergov-mnemonic").get()
-                keypair = Keypair.create_from_mnemonic(mnemonic)
-                logger.info(
-                    f"Loaded keypair for address: {keypair.ss58_address}  / {proxy_mapping[network]['proxy']} "
-                )
-            except ValueError:
-                logger.error(f"Could not load '{network}-voter-mnemonic' Secret block.")
-                raise
-
-            vote_parameters = create_vote_parameters(vote, network)
+        try:
+            mnemonic = credentials.secret_sync(f"{network}-cybergov-mnemonic")
+            keypair = Keypair.create_from_mnemonic(mnemonic)
+            logger.info(
+                f"Loaded keypair for address: {keypair.ss58_address}  / {proxy_mapping[network]['proxy']} "
+            )
+        except ValueError:
+            logger.error(f"Could not load '{network}-voter-mnemonic' Secret block.")
+            raise
+
+        vote_parameters = create_vote_parameters(vote, network)
+
+        def sign_vote_tx(substrate: SubstrateInterface) -> str:
             vote_call = substrate.compose_call(
                 call_module="ConvictionVoting",
                 call_function="vote",
@@ -179,10 +163,15 @@ def create_and_sign_vote_tx(
             extrinsic = substrate.create_signed_extrinsic(
                 call=batch_call, keypair=keypair
             )
-            signed_tx_hex = str(extrinsic.data)
-            logger.info("Successfully created and signed transaction.")
+            return str(extrinsic.data)
+
+        # Kept-open connection to the fastest healthy node, next node on connection errors
+        signed_tx_hex = run_with_substrate(
+            network, rpc.urls, sign_vote_tx
+        )
+        logger.info("Successfully created and signed transaction.")
 
-            return signed_tx_hex
+        return signed_tx_hex
 
     except Exception as e:
         logger.error(f"An error occurred during transaction creation: {e}")
@@ -196,21 +185,22 @@ def submit_transaction_sidecar(network: str, tx_hex: str) -> str:
     """
     logger = get_run_logger()
 
-    network_sidecar_block = Secret.load(f"{network}-sidecar-url")
-    network_sidecar_url = network_sidecar_block.get()
+    sidecar = credentials.sidecar_sync(network)
 
-    url = f"{network_sidecar_url}/transaction"
+    url = "/transaction"
     payload = {"tx": tx_hex}
 
     logger.info(f"Submitting transaction via Sidecar at {url}...")
-    with httpx.Client(timeout=30) as client:
-        response = client.post(url, json=payload)
-
-    if response.status_code != 200:
+    try:
+        # Not retried on another node once sent: the first one may have accepted it
+        response = sidecar_request(
+            network, sidecar.urls, "POST", url, idempotent=False, json=payload, timeout=30
+        )
+    except httpx.HTTPStatusError as e:
         logger.error(
-            f"Submission failed with status {response.status_code}: {response.text}"
+            f"Submission failed with status {e.response.status_code}: {e.response.text}"
         )
-        response.raise_for_status()
+        raise
 
     tx_hash = response.json().get("hash", None)
     if not tx_hash:
@@ -301,29 +291,13 @@ async def check_if_commenting_already_scheduled(proposal_id: int, network: str)
         f"Checking for existing flow runs for comment-{network}-{proposal_id}..."
     )
 
-    async with get_client() as client:
-        existing_runs = await client.read_flow_runs(
-            flow_run_filter=FlowRunFilter(
-                name=FlowRunFilterName(like_=f"comment-{network}-{proposal_id}"),
-                state=FlowRunFilterState(
-                    type=FlowRunFilterStateType(
-                        any_=[
-                            StateType.RUNNING,
-                            StateType.COMPLETED,
-                            StateType.PENDING,
-                            StateType.SCHEDULED,
-                        ]
-                    )
-                ),
-            ),
-            deployment_filter=DeploymentFilter(
-                id=DeploymentFilterId(any_=[COMMENTING_DEPLOYMENT_ID])
-            ),
-        )
+    is_scheduled = await is_already_scheduled(
+        stage="comment", network=network, proposal_id=proposal_id
+    )
 
-    if existing_runs:
+    if is_scheduled:
         logger.warning(
-            f"Found {len(existing_runs)} existing comment run(s) for proposal {proposal_id} on '{network}'. Skipping scheduling."
+            f"Found an existing comment run for proposal {proposal_id} on '{network}'. Skipping scheduling."
         )
         return True
 
@@ -339,7 +313,8 @@ async def schedule_comment_task(proposal_id: int, network: str):
     logger = get_run_logger()
 
     delay = datetime.timedelta(minutes=COMMENTING_SCHEDULE_DELAY_MINUTES)
-    scheduled_time = datetime.datetime.now(datetime.timezone.utc) + delay
+    state = await stage_scheduled_state(network, proposal_id, delay, logger)
+    scheduled_time = state.state_details.scheduled_time
     logger.info(
         f"Scheduling MAGI comment for proposal {proposal_id} on '{network}' "
         f"to run at {scheduled_time.isoformat()}"
@@ -347,10 +322,10 @@ async def schedule_comment_task(proposal_id: int, network: str):
 
     async with get_client() as client:
         await client.create_flow_run_from_deployment(
-            name=f"comment-{network}-{proposal_id}",
+            name=flow_run_name("comment", network, proposal_id),
             deployment_id=COMMENTING_DEPLOYMENT_ID,
             parameters={"proposal_id": proposal_id, "network": network},
-            # state=Scheduled(scheduled_time=scheduled_time)
+            state=state,
         )
 
 
@@ -408,6 +383,22 @@ def should_we_vote(
         ) from None
 
 
+@task
+def update_proposal_index(network: str, proposal_id: int, stage: str, status: str):
+    """
+    Records a stage outcome in the network's proposal index. Needs the write
+    credentials; best-effort, a failure here never fails the vote.
+    """
+    logger = get_run_logger()
+    try:
+        s3_config = credentials.s3_sync(write=True)
+        s3 = setup_s3_filesystem(s3_config.access_key, s3_config.secret_key, s3_config.endpoint_url)
+        record_stage_result(s3, s3_config.bucket, network, stage, proposal_id, status)
+        logger.info(f"Proposal index updated: {stage} of {network}/{proposal_id} {status}.")
+    except Exception as e:
+        logger.warning(f"Could not update proposal index for {network}/{proposal_id}: {e}")
+
+
 @flow(name="Vote on Polkadot OpenGov", log_prints=True)
 async def vote_on_opengov_proposal(
     network: str,
@@ -444,17 +435,23 @@ async def vote_on_opengov_proposal(
     )
 
     if all([vote_result, conviction, vote_file_hash]):
-        signed_tx = create_and_sign_vote_tx(
-            network=network,
-            proposal_id=proposal_id,
-            vote=vote_result,
-            remark_text=vote_file_hash,
-        )
+        try:
+            signed_tx = create_and_sign_vote_tx(
+                network=network,
+                proposal_id=proposal_id,
+                vote=vote_result,
+                remark_text=vote_file_hash,
+            )
 
-        tx_hash = submit_transaction_sidecar(
-            network=network,
-            tx_hex=signed_tx,
-        )
+            tx_hash = submit_transaction_sidecar(
+                network=network,
+                tx_hex=signed_tx,
+            )
+        except Exception:
+            update_proposal_index(network, proposal_id, "vote", "failed")
+            raise
+
+        update_proposal_index(network, proposal_id, "vote", "processed")
 
         logger.info(
             f"✅ Successfully processed vote for proposal {proposal_id}. View transaction at: https://{network}.subscan.io/extrinsic/{tx_hash} or https://assethub-{network}.subscan.io/extrinsic/{tx_hash}"
@@ -472,6 +469,7 @@ async def vote_on_opengov_proposal(
             logger.info("Skipping comment scheduling (schedule_comment=False)")
     else:
         logger.error(f"Cannot vote, the {network}/{proposal_id}/vote.json is invalid")
+        update_proposal_index(network, proposal_id, "vote", "failed")
         raise RuntimeError(
             f"Unexpected error processing vote for proposal {proposal_id}."
         ) from None
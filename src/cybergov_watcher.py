@@ -0,0 +1,209 @@
+import asyncio
+import socket
+import time
+from typing import Callable, List, Optional
+from prefect import flow, task, get_run_logger
+from prefect.runtime import flow_run
+from substrateinterface import SubstrateInterface
+from utils.constants import (
+    CYBERGOV_PARAMS,
+    WATCHER_RECONNECT_DELAY_SECONDS,
+)
+from utils.endpoints import endpoint_pool
+from utils.credentials import credentials
+from utils.s3 import s3_filesystem
+from cybergov_dispatcher import (
+    acquire_network_lease,
+    dispatch_network,
+    release_network_lease,
+    drop_undelegated_proposals,
+    load_scheduled_scrape_index,
+    schedule_scraping_tasks,
+)
+
+
+def subscribe_to_referendum_count(
+    rpc_url: str,
+    on_new_ids: Callable[[List[int]], None],
+    should_stop: Callable[[], bool],
+    start_count: Optional[int] = None,
+    on_subscribed: Optional[Callable[[int], None]] = None,
+):
+    """
+    Blocking: follows finalized heads over a single websocket connection and reads
+    `Referenda.ReferendumCount` at each of them. Every time the count grows, the
+    newly submitted referendum ids are handed to `on_new_ids`.
+
+    With `start_count` (the last count seen before a reconnection), the referenda
+    submitted since are reported first. `on_subscribed` gets the count the
+    subscription starts from, once it is known.
+
+    Returns when `should_stop()` is true, raises when the connection drops.
+    """
+    with SubstrateInterface(url=rpc_url) as substrate:
+        last_count = substrate.query("Referenda", "ReferendumCount").value
+        if start_count is not None and last_count > start_count:
+            on_new_ids(list(range(start_count, last_count)))
+        if on_subscribed is not None:
+            on_subscribed(last_count)
+
+        def handler(header, update_nr, subscription_id):
+            nonlocal last_count
+            if should_stop():
+                return True
+
+            block_hash = substrate.get_block_hash(header["header"]["number"])
+            count = substrate.query("Referenda", "ReferendumCount", block_hash=block_hash).value
+            if count > last_count:
+                on_new_ids(list(range(last_count, count)))
+                last_count = count
+            return None
+
+        substrate.subscribe_block_headers(handler, finalized_only=True)
+
+
+@task
+async def schedule_submitted_referenda(network: str, proposal_ids: List[int]):
+    """Schedules scrapers for referenda seen by the watcher, minus already scheduled ones."""
+    logger = get_run_logger()
+
+    min_threshold = CYBERGOV_PARAMS.get("min_proposal_id", {}).get(network, 0)
+    candidate_ids = [p_id for p_id in proposal_ids if p_id > min_threshold]
+    if not candidate_ids:
+        logger.info(f"Referenda {proposal_ids} on '{network}' are below the min threshold, skipping.")
+        return
+
+    scheduled_ids = await load_scheduled_scrape_index(network=network)
+    new_ids = [p_id for p_id in candidate_ids if p_id not in scheduled_ids]
+    new_ids, deadlines = await drop_undelegated_proposals(network, new_ids)
+    if new_ids:
+        await schedule_scraping_tasks(proposal_ids=new_ids, network=network, deadlines=deadlines)
+
+
+@flow(name="Cybergov Referendum Watcher", log_prints=True)
+async def cybergov_referendum_watcher_flow(
+    network: str = "paseo",
+    max_runtime_minutes: Optional[int] = None,
+):
+    """
+    Long-running alternative to the polling dispatcher: subscribes to finalized
+    heads and schedules a scrape as soon as a new referendum is submitted.
+
+    After every (re)connection the polling path runs once for the network, under
+    the dispatcher's network lease, so referenda submitted while the watcher was
+    disconnected are caught up.
+    """
+    logger = get_run_logger()
+
+    s3_config, write_s3_config, rpc = await asyncio.gather(
+        credentials.s3(), credentials.s3(write=True), credentials.rpc(network)
+    )
+
+    s3_bucket = s3_config.bucket
+    endpoint_url = s3_config.endpoint_url
+    access_key = s3_config.access_key
+    secret_key = s3_config.secret_key
+    rpc_pool = endpoint_pool("rpc", network, rpc.urls)
+    # The catch-up compacts the proposal index, which only the lease holder may do
+    lease_s3 = s3_filesystem(write_s3_config.access_key, write_s3_config.secret_key, endpoint_url)
+    owner = f"watcher-{socket.gethostname()}-{flow_run.id}"
+
+    deadline = (
+        time.monotonic() + max_runtime_minutes * 60 if max_runtime_minutes else None
+    )
+
+    def should_stop() -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    loop = asyncio.get_running_loop()
+    new_ids_queue: asyncio.Queue = asyncio.Queue()
+    # Highest ReferendumCount seen so far, a reconnection resumes from it
+    known_count: Optional[int] = None
+    subscribed = asyncio.Event()
+
+    def track_count(count: int):
+        nonlocal known_count
+        known_count = count if known_count is None else max(known_count, count)
+        subscribed.set()
+
+    def on_new_ids(proposal_ids: List[int]):
+        # Called from the subscription thread
+        loop.call_soon_threadsafe(track_count, proposal_ids[-1] + 1)
+        loop.call_soon_threadsafe(new_ids_queue.put_nowait, proposal_ids)
+
+    def on_subscribed(count: int):
+        # Called from the subscription thread
+        loop.call_soon_threadsafe(track_count, count)
+
+    while not should_stop():
+        # Subscribe first and catch up after: a referendum submitted in between is
+        # then seen by both (scheduling is idempotent) instead of by neither
+        network_rpc_url = rpc_pool.ranked()[0]
+        logger.info(f"Subscribing to finalized heads on '{network}' via {network_rpc_url}...")
+        subscribed.clear()
+        subscription = asyncio.create_task(
+            asyncio.to_thread(
+                subscribe_to_referendum_count,
+                network_rpc_url,
+                on_new_ids,
+                should_stop,
+                known_count,
+                on_subscribed,
+            )
+        )
+        waiting = asyncio.create_task(subscribed.wait())
+        await asyncio.wait({subscription, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        waiting.cancel()
+
+        if await acquire_network_lease(s3=lease_s3, s3_bucket=s3_bucket, network=network, owner=owner):
+            logger.info(f"Catching up on '{network}' with the polling dispatcher...")
+            try:
+                report = await dispatch_network(
+                    network=network,
+                    s3_bucket=s3_bucket,
+                    access_key=access_key,
+                    secret_key=secret_key,
+                    endpoint_url=endpoint_url,
+                )
+                logger.info(f"Catch-up done: {report}")
+            except Exception as e:
+                logger.error(f"Catch-up failed for '{network}': {e}")
+            finally:
+                await release_network_lease(s3=lease_s3, s3_bucket=s3_bucket, network=network, owner=owner)
+        else:
+            # Whoever holds the lease is dispatching the network right now
+            logger.info(f"Skipping the catch-up on '{network}', the lease is held elsewhere.")
+
+        while not subscription.done() or not new_ids_queue.empty():
+            try:
+                proposal_ids = await asyncio.wait_for(new_ids_queue.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+
+            logger.info(f"New referenda submitted on '{network}': {proposal_ids}")
+            try:
+                await schedule_submitted_referenda(network=network, proposal_ids=proposal_ids)
+            except Exception as e:
+                # The next catch-up run will pick these up
+                logger.error(f"Failed to schedule referenda {proposal_ids} on '{network}': {e}")
+
+        try:
+            subscription.result()
+        except Exception as e:
+            rpc_pool.record_failure(network_rpc_url)
+            logger.warning(
+                f"Subscription on '{network}' dropped ({e}), reconnecting in {WATCHER_RECONNECT_DELAY_SECONDS}s"
+            )
+            await asyncio.sleep(WATCHER_RECONNECT_DELAY_SECONDS)
+
+    logger.info(f"Watcher for '{network}' reached its max runtime, exiting.")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        print("Usage: python cybergov_watcher.py <network>")
+        sys.exit(1)
+
+    asyncio.run(cybergov_referendum_watcher_flow(network=sys.argv[1]))
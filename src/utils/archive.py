@@ -0,0 +1,91 @@
+import datetime
+import json
+import posixpath
+from typing import Any, Dict, List, Optional
+import s3fs
+
+# Each proposal folder keeps its previous runs in vote_archive_{n}/ subfolders,
+# and a small index listing them, so the next free slot is one GET away:
+# s3://{bucket}/proposals/{network}/{proposal_id}/archive_index.json
+ARCHIVE_INDEX_FILE = "archive_index.json"
+ARCHIVE_PREFIX = "vote_archive_"
+
+
+def archive_index_path(base_path: str) -> str:
+    return f"{base_path}/{ARCHIVE_INDEX_FILE}"
+
+
+def read_archive_index(s3: s3fs.S3FileSystem, base_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with s3.open(archive_index_path(base_path), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _relative(path: str, base_path: str) -> str:
+    return posixpath.relpath(path.lstrip("/"), base_path.lstrip("/"))
+
+
+def next_archive_slot(index: Optional[Dict[str, Any]], relative_paths: List[str]) -> int:
+    """
+    The next free vote_archive_{n}. Proposals archived before the index existed
+    have none: their slots are read from the listing we already have instead.
+    """
+    if index is not None:
+        return index["next_index"]
+    used = [
+        int(folder[len(ARCHIVE_PREFIX):])
+        for folder in {path.split("/")[0] for path in relative_paths}
+        if folder.startswith(ARCHIVE_PREFIX) and folder[len(ARCHIVE_PREFIX):].isdigit()
+    ]
+    return max(used) + 1 if used else 0
+
+
+def archive_current_run(s3: s3fs.S3FileSystem, base_path: str) -> Optional[str]:
+    """
+    Moves the current run's files of a proposal into its next vote_archive_{n}/
+    folder and updates the archive index. Returns the archive folder, or None
+    when there was nothing to archive.
+
+    One top-level listing, a recursive listing of the live subfolders only (the
+    archives, which only grow, are never walked) and one index GET, then all
+    copies are sent concurrently (s3fs batches them server-side) and the
+    originals go in a single batch delete.
+    """
+    try:
+        entries = s3.ls(base_path, detail=True)
+    except FileNotFoundError:
+        return None
+
+    top_level = [_relative(entry["name"], base_path) for entry in entries]
+    to_archive = []
+    for entry, name in zip(entries, top_level):
+        if name.startswith(ARCHIVE_PREFIX) or name == ARCHIVE_INDEX_FILE:
+            continue
+        paths = s3.find(entry["name"]) if entry["type"] == "directory" else [entry["name"]]
+        to_archive += [(path, _relative(path, base_path)) for path in paths]
+    if not to_archive:
+        return None
+
+    index = read_archive_index(s3, base_path)
+    slot = next_archive_slot(index, top_level)
+    archive_path = f"{base_path}/{ARCHIVE_PREFIX}{slot}"
+
+    sources = [path for path, _ in to_archive]
+    s3.copy(sources, [f"{archive_path}/{relative}" for _, relative in to_archive])
+    s3.rm(sources)
+
+    index = index or {"archives": []}
+    index["next_index"] = slot + 1
+    index["archives"].append(
+        {
+            "folder": f"{ARCHIVE_PREFIX}{slot}",
+            "archived_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "files": len(sources),
+        }
+    )
+    with s3.open(archive_index_path(base_path), "w") as f:
+        json.dump(index, f, indent=2)
+
+    return archive_path
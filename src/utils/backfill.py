@@ -0,0 +1,59 @@
+import datetime
+import hashlib
+import json
+from typing import Dict, List, Optional
+import s3fs
+
+# One checkpoint object per backfilled id set, so an interrupted backfill resumes:
+# s3://{bucket}/backfills/{network}/{first}-{last}-{hash}.json
+
+
+def backfill_ids(
+    start_id: Optional[int] = None,
+    end_id: Optional[int] = None,
+    proposal_ids: Optional[List[int]] = None,
+) -> List[int]:
+    """The sorted, de-duplicated ids of a backfill: an explicit list, or the inclusive range [start_id, end_id]."""
+    if proposal_ids:
+        return sorted(set(int(proposal_id) for proposal_id in proposal_ids))
+    if start_id is None or end_id is None:
+        raise ValueError("A backfill needs either proposal_ids or both start_id and end_id")
+    if start_id > end_id:
+        raise ValueError(f"start_id {start_id} is after end_id {end_id}")
+    return list(range(start_id, end_id + 1))
+
+
+def checkpoint_path(s3_bucket: str, network: str, ids: List[int]) -> str:
+    digest = hashlib.sha256(",".join(map(str, ids)).encode()).hexdigest()[:12]
+    return f"{s3_bucket}/backfills/{network}/{ids[0]}-{ids[-1]}-{digest}.json"
+
+
+def load_checkpoint(s3: s3fs.S3FileSystem, path: str) -> Dict[str, Dict[str, str]]:
+    """Results already recorded for this backfill, keyed by proposal id (as a string, JSON keys)."""
+    try:
+        with s3.open(path, "r") as f:
+            return json.load(f).get("results", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(
+    s3: s3fs.S3FileSystem, path: str, network: str, ids: List[int], results: Dict[str, Dict[str, str]]
+):
+    checkpoint = {
+        "network": network,
+        "ids": ids,
+        "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "results": results,
+    }
+    with s3.open(path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+
+
+def pending_ids(ids: List[int], results: Dict[str, Dict[str, str]]) -> List[int]:
+    """Ids still to scrape: never attempted, or failed last time."""
+    return [
+        proposal_id
+        for proposal_id in ids
+        if results.get(str(proposal_id), {}).get("status") not in ("processed", "skipped")
+    ]
@@ -9,6 +9,85 @@ CYBERGOV_PARAMS = {
 DATA_SCRAPER_DEPLOYMENT_ID = "00b42f26-0ccf-4d18-b127-a273b2006838"
 ## We wait a little bit before scraping, so people get time to add their links etc.
 SCRAPING_SCHEDULE_DELAY_DAYS = 2
+## Referendum watcher: wait before re-subscribing after the websocket drops
+WATCHER_RECONNECT_DELAY_SECONDS = 10
+## Max flow runs created in parallel when the dispatcher schedules in bulk
+SCHEDULING_MAX_CONCURRENCY = 8
+## A key whose run failed or crashed is retried under '-retry-{n}' keys, at most this many times
+SCHEDULING_MAX_KEY_RETRIES = 5
+## Backfills: proposals scraped in parallel in one run
+BACKFILL_MAX_CONCURRENCY = 4
+## Stage delays are currently off (runs start right away), flip this to apply them
+SCHEDULE_DELAYS_ENABLED = False
+## Close to a deadline, a stage waits at most this fraction of the time left instead of its full delay
+DEADLINE_DELAY_MAX_FRACTION = 0.25
+## Dispatcher leases: a worker holds a network for at most this long, then any other worker can take it over
+DISPATCHER_LEASE_TTL_SECONDS = 600
+## Wait between writing a lease and reading it back, so a concurrent writer's lease is seen
+DISPATCHER_LEASE_SETTLE_SECONDS = 2
+## Sidecar/RPC endpoint pools: latency smoothing, how long a failed endpoint is avoided, HTTP pool size
+ENDPOINT_EWMA_ALPHA = 0.3
+ENDPOINT_COOLDOWN_SECONDS = 60
+ENDPOINT_POOL_LIMITS = {"max_connections": 10, "max_keepalive_connections": 5, "keepalive_expiry": 60}
+## Shared async HTTP client for the scrapers (Subsquare, Polkassembly, ...)
+HTTP_CLIENT_LIMITS = {"max_connections": 50, "max_keepalive_connections": 20, "keepalive_expiry": 30}
+HTTP_CLIENT_TIMEOUT_SECONDS = 30
+## Polkassembly fan-out: optional enrichment sources fetched next to the ReferendumV2 detail, with their timeouts
+POLKASSEMBLY_SOURCE_TIMEOUT_SECONDS = {
+    "onchain_metadata": 15,
+    "votes": 20,
+    "treasury_stats": 10,
+    "track_counts": 10,
+}
+## Retries per source after a failed or timed-out attempt (the on-chain metadata carries the track number)
+POLKASSEMBLY_SOURCE_RETRIES = {"onchain_metadata": 3}
+POLKASSEMBLY_SOURCE_RETRY_DELAY_SECONDS = 5
+## Polkassembly sources go in full to the proposal's `enrichment` subcollection, as JSON strings cut in
+## chunks of this many characters (a Firestore document holds at most 1 MiB, a character up to 4 bytes)
+FIRESTORE_PAYLOAD_CHUNK_CHARS = 200_000
+## The proposal document keeps a summary of each source; sources without one are kept if their JSON is this small
+POLKASSEMBLY_SUMMARY_MAX_BYTES = 8_000
+## Native token per network, and the symbols of the Asset Hub assets treasury spends are paid in (by asset id)
+NATIVE_SYMBOLS = {"polkadot": "DOT", "kusama": "KSM", "paseo": "PAS"}
+ASSET_HUB_SYMBOLS = {1337: "USDC", 1984: "USDT"}
+## Hedged proposal fetch: ask the secondary API once the primary is slower than its p95 (this default until enough samples)
+HEDGE_DEFAULT_DELAY_SECONDS = 3.0
+HEDGE_MIN_DELAY_SECONDS = 0.5
+HEDGE_MIN_SAMPLES = 20
+HEDGE_LATENCY_WINDOW = 200
+## Once the secondary has answered, the primary still wins if it answers within this, so the source rarely flips between runs
+HEDGE_PRIMARY_GRACE_SECONDS = 0.5
+## Upstream API rate limits per domain: (requests per second, burst). Other hosts get RATE_LIMIT_DEFAULT
+RATE_LIMITS = {
+    "polkassembly.io": (5.0, 10),
+    "subsquare.io": (5.0, 10),
+}
+RATE_LIMIT_DEFAULT = (10.0, 20)
+## Throttled answers (429, or 503 with Retry-After) are retried this many times, waiting at most this long
+RATE_LIMIT_MAX_RETRIES = 2
+RATE_LIMIT_MAX_WAIT_SECONDS = 120
+## Prefect Secret/String blocks are loaded at most once per this many seconds per process
+CREDENTIALS_TTL_SECONDS = 300
+## Compiled DSPy programs are stored here and reused until their model, code or trainset change
+## (relative to the working directory; GitHub Actions restores it with actions/cache)
+COMPILED_PROGRAMS_DIR = os.getenv("CYBERGOV_COMPILED_PROGRAMS_DIR", ".cache/compiled_programs")
+## Persistent LLM response cache (GeminiLM and the MAGI dspy.LM), size-bounded with LRU eviction
+LLM_CACHE_DIR = os.getenv("CYBERGOV_LLM_CACHE_DIR", ".cache/llm_responses")
+LLM_CACHE_SIZE_LIMIT_BYTES = int(os.getenv("CYBERGOV_LLM_CACHE_SIZE_LIMIT_BYTES", 512 * 1024 * 1024))
+LLM_CACHE_TTL_SECONDS = 30 * 24 * 3600
+## Set to 1 to always call the model (responses are still stored for later runs)
+LLM_CACHE_BYPASS_ENV = "CYBERGOV_LLM_CACHE_BYPASS"
+## Gemini calls (GeminiLM): default per-call timeout, overridable with timeout=... on a call
+GEMINI_TIMEOUT_SECONDS = 120
+## Proposal content handed to the augmenter is cut at this many bytes (after images and base64 are dropped)
+PROPOSAL_CONTENT_MAX_BYTES = 400_000
+## Content over this many tokens is split into chunks, summarized in parallel and replaced by a bounded digest
+PROPOSAL_CONTENT_MAX_TOKENS = 15_000
+PROPOSAL_DIGEST_CHUNK_TOKENS = 4_000
+PROPOSAL_DIGEST_MAX_TOKENS = 6_000
+PROPOSAL_DIGEST_MAX_CONCURRENCY = 4
+## Relay chain block time, used to turn on-chain deadlines into wall-clock times
+BLOCK_TIME_SECONDS = 6
 
 
 COMMENTING_DEPLOYMENT_ID = "36bdbe3d-82c0-4a80-a7c3-8ee5e485c51c"
@@ -84,3 +163,11 @@ ALLOWED_TRACK_IDS = [
     33,  # Medium spender
     34,  # Big Spender
 ]
+
+## Flow runs are named "{stage}-{network}-{proposal_id}", one deployment per stage
+STAGE_DEPLOYMENT_IDS = {
+    "scrape": DATA_SCRAPER_DEPLOYMENT_ID,
+    "inference": INFERENCE_TRIGGER_DEPLOYMENT_ID,
+    "vote": VOTING_DEPLOYMENT_ID,
+    "comment": COMMENTING_DEPLOYMENT_ID,
+}
@@ -0,0 +1,149 @@
+import re
+from typing import List
+from utils.constants import PROPOSAL_CONTENT_MAX_BYTES
+
+# Proposal bodies regularly carry pasted screenshots as multi-megabyte inline
+# base64, so the sanitizer walks the content once, left to right: everything it
+# drops is skipped over without being copied, and what it keeps is written to a
+# buffer that stops growing at the byte budget.
+
+# Start of the next thing to drop. Every part is anchored on a literal prefix and
+# bounded, so a search never backtracks further than a few dozen characters.
+_DROPPED = re.compile(
+    r"<(?:img|script|style)(?![A-Za-z0-9])"
+    r"|data:[\w.+-]{1,64}/[\w.+-]{1,64}(?:;[\w.+=-]{1,64}){0,4};base64,",
+    re.IGNORECASE,
+)
+_BASE64 = re.compile(r"[A-Za-z0-9+/=]*")
+_CLOSING_TAGS = {
+    "script": re.compile(r"</script\s*>", re.IGNORECASE),
+    "style": re.compile(r"</style\s*>", re.IGNORECASE),
+}
+# A tag ends at the next ">", unless another "<" comes first
+_TAG_END = re.compile(r"[<>]")
+
+# Whitespace collapsing, applied to one kept chunk at a time
+_TRAILING_SPACES = re.compile(r"[^\S\n]+\n")
+_BLANK_LINES = re.compile(r"\n\n+")
+_INNER_SPACES = re.compile(r"(?<=\S)[^\S\n]+")
+
+TRUNCATION_MARKER = "\n\n[... proposal content truncated]"
+
+
+def _collapse(text: str) -> str:
+    """Spaces inside a line become one, at most one blank line in a row; indentation stays."""
+    text = _TRAILING_SPACES.sub("\n", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return _INNER_SPACES.sub(" ", text)
+
+
+class _BudgetedWriter:
+    """
+    Collects kept text with collapsed whitespace: runs of spaces become one space,
+    line breaks are kept (at most one blank line in a row), and so is the
+    indentation at the start of a line (nested lists, code blocks). The whitespace
+    at either end of a chunk is held back until the next visible text, so runs
+    split by a dropped image still collapse.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.parts: List[str] = []
+        self.remaining = max_bytes
+        self.pending = ""
+        self.truncated = False
+
+    def _emit(self, text: str):
+        size = len(text.encode("utf-8"))
+        if size > self.remaining:
+            text = text.encode("utf-8")[: self.remaining].decode("utf-8", errors="ignore")
+            self.truncated = True
+            size = self.remaining
+        self.parts.append(text)
+        self.remaining -= size
+
+    @staticmethod
+    def _collapse_run(whitespace: str) -> str:
+        # Same rules as inside a chunk: the indentation after the last line break stays
+        if "\n" in whitespace:
+            return "\n" * min(whitespace.count("\n"), 2) + whitespace[whitespace.rindex("\n") + 1 :]
+        return " " if whitespace else ""
+
+    def write(self, text: str):
+        body = text.strip()
+        if not body:
+            self.pending = self._collapse_run(self.pending + text)
+            return
+
+        whitespace = self._collapse_run(self.pending + text[: len(text) - len(text.lstrip())])
+        self.pending = text[len(text.rstrip()) :]
+        if self.parts and whitespace:
+            self._emit(whitespace)
+        if not self.truncated:
+            self._emit(_collapse(body))
+
+    def text(self) -> str:
+        return "".join(self.parts) + (TRUNCATION_MARKER if self.truncated else "")
+
+
+def sanitize_content(content: str, max_bytes: int = PROPOSAL_CONTENT_MAX_BYTES) -> str:
+    """
+    Proposal content without images, scripts, styles and base64 data URIs, with
+    whitespace collapsed, cut at `max_bytes` (UTF-8) of kept text. Runs in one pass,
+    in time linear in the input; memory is bounded by `max_bytes`.
+    """
+    if not content:
+        return ""
+
+    writer = _BudgetedWriter(max_bytes)
+    length = len(content)
+    # Next match of each closing pattern, from the last search. A tag left open is
+    # kept as text, so without this every later "<img" would search to the end again
+    next_found = {}
+
+    def find_next(pattern, start: int):
+        found = next_found.get(pattern, False)
+        if found is False or (found is not None and found.start() < start):
+            found = pattern.search(content, start)
+            next_found[pattern] = found
+        return found
+
+    def keep(start: int, end: int):
+        # Never slice more than the budget can still take (a char is at least one byte)
+        while start < end and not writer.truncated:
+            chunk_end = min(end, start + max(writer.remaining, 1))
+            writer.write(content[start:chunk_end])
+            start = chunk_end
+
+    kept_from = 0
+    position = 0
+    while not writer.truncated:
+        match = _DROPPED.search(content, position)
+        if match is None:
+            keep(kept_from, length)
+            break
+
+        token = match.group()
+        tag = token[1:].lower() if token.startswith("<") else None
+        if tag is None:
+            # Data URIs sit inside a link or attribute, only their payload goes
+            keep(kept_from, match.start())
+            position = kept_from = _BASE64.match(content, match.end()).end()
+            continue
+
+        tag_end = find_next(_TAG_END, match.end())
+        if tag_end is None or tag_end.group() == "<":
+            # Not a tag after all ("use <script to ..."): it stays part of the kept text
+            position = match.end()
+            continue
+
+        keep(kept_from, match.start())
+        position = tag_end.end()
+        if tag in _CLOSING_TAGS:
+            # Without its closing tag, only the opening tag goes
+            block_end = find_next(_CLOSING_TAGS[tag], position)
+            position = block_end.end() if block_end else position
+        kept_from = position
+        # A dropped element separates the text around it
+        writer.write(" ")
+
+    return writer.text()
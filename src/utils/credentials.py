@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from prefect.blocks.system import Secret, String
+from utils.constants import CREDENTIALS_TTL_SECONDS
+from utils.endpoints import parse_endpoint_urls
+
+# A block reference: ("secret" | "string", block name)
+BlockRef = Tuple[str, str]
+
+S3_BUCKET = ("string", "scaleway-bucket-name")
+S3_ENDPOINT = ("string", "scaleway-s3-endpoint-url")
+S3_READ_KEYS = (("secret", "scaleway-access-key-id"), ("secret", "scaleway-secret-access-key"))
+S3_WRITE_KEYS = (("secret", "scaleway-write-access-key-id"), ("secret", "scaleway-write-secret-access-key"))
+
+
+@dataclass(frozen=True)
+class S3Config:
+    bucket: str
+    endpoint_url: str
+    access_key: str = field(repr=False)
+    secret_key: str = field(repr=False)
+
+    def as_dict(self) -> Dict[str, str]:
+        """The `s3_creds` dict the scraper tasks take."""
+        return {
+            "s3_bucket": self.bucket,
+            "endpoint_url": self.endpoint_url,
+            "access_key": self.access_key,
+            "secret_key": self.secret_key,
+        }
+
+
+@dataclass(frozen=True)
+class EndpointConfig:
+    """A network's RPC or sidecar endpoints, from its `{network}-rpc-url` / `{network}-sidecar-url` secret."""
+
+    network: str
+    urls: List[str]
+
+
+def _s3_refs(write: bool) -> Tuple[BlockRef, ...]:
+    return (S3_BUCKET, S3_ENDPOINT) + (S3_WRITE_KEYS if write else S3_READ_KEYS)
+
+
+def _load_block(ref: BlockRef):
+    kind, name = ref
+    return (Secret if kind == "secret" else String).load(name)
+
+
+def _block_value(ref: BlockRef, block) -> str:
+    return block.get() if ref[0] == "secret" else block.value
+
+
+class CredentialsProvider:
+    """
+    Loads Prefect Secret/String blocks at most once per `ttl_seconds` per process,
+    and the missing ones of a group concurrently. Hands out plain values and
+    typed configs; the async methods are for flows and async tasks, the `_sync`
+    ones for sync tasks.
+    """
+
+    def __init__(self, ttl_seconds: float = CREDENTIALS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.cache: Dict[BlockRef, Tuple[float, str]] = {}
+        self.lock = threading.Lock()
+
+    def _cached(self, refs: Tuple[BlockRef, ...]) -> Dict[BlockRef, str]:
+        now = time.monotonic()
+        with self.lock:
+            return {
+                ref: self.cache[ref][1]
+                for ref in refs
+                if ref in self.cache and self.cache[ref][0] > now
+            }
+
+    def _store(self, ref: BlockRef, value: str):
+        with self.lock:
+            self.cache[ref] = (time.monotonic() + self.ttl_seconds, value)
+
+    async def load(self, *refs: BlockRef) -> List[str]:
+        values = self._cached(refs)
+        missing = [ref for ref in dict.fromkeys(refs) if ref not in values]
+        blocks = await asyncio.gather(*(_load_block(ref) for ref in missing))
+        for ref, block in zip(missing, blocks):
+            values[ref] = _block_value(ref, block)
+            self._store(ref, values[ref])
+        return [values[ref] for ref in refs]
+
+    def load_sync(self, *refs: BlockRef) -> List[str]:
+        values = self._cached(refs)
+        missing = [ref for ref in dict.fromkeys(refs) if ref not in values]
+        if len(missing) == 1:
+            blocks = [_load_block(missing[0])]
+        elif missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                blocks = list(pool.map(_load_block, missing))
+        else:
+            blocks = []
+        for ref, block in zip(missing, blocks):
+            values[ref] = _block_value(ref, block)
+            self._store(ref, values[ref])
+        return [values[ref] for ref in refs]
+
+    async def secret(self, name: str) -> str:
+        return (await self.secrets(name))[0]
+
+    def secret_sync(self, name: str) -> str:
+        return self.secrets_sync(name)[0]
+
+    async def secrets(self, *names: str) -> List[str]:
+        """Several Secret blocks (API keys, mnemonics, ...) at once."""
+        return await self.load(*(("secret", name) for name in names))
+
+    def secrets_sync(self, *names: str) -> List[str]:
+        return self.load_sync(*(("secret", name) for name in names))
+
+    async def s3(self, write: bool = False) -> S3Config:
+        """The S3 config with the read-only keys, or the write keys with `write`."""
+        return S3Config(*await self.load(*_s3_refs(write)))
+
+    def s3_sync(self, write: bool = False) -> S3Config:
+        return S3Config(*self.load_sync(*_s3_refs(write)))
+
+    async def rpc(self, network: str) -> EndpointConfig:
+        return EndpointConfig(network, parse_endpoint_urls(await self.secret(f"{network}-rpc-url")))
+
+    def rpc_sync(self, network: str) -> EndpointConfig:
+        return EndpointConfig(network, parse_endpoint_urls(self.secret_sync(f"{network}-rpc-url")))
+
+    async def sidecar(self, network: str) -> EndpointConfig:
+        return EndpointConfig(network, parse_endpoint_urls(await self.secret(f"{network}-sidecar-url")))
+
+    def sidecar_sync(self, network: str) -> EndpointConfig:
+        return EndpointConfig(network, parse_endpoint_urls(self.secret_sync(f"{network}-sidecar-url")))
+
+    def clear(self):
+        """Forgets every cached value, e.g. after rotating a secret."""
+        with self.lock:
+            self.cache.clear()
+
+
+credentials = CredentialsProvider()
@@ -0,0 +1,231 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+from substrateinterface import SubstrateInterface
+from websocket import WebSocketException
+from utils.http_client import get_http_client
+from utils.constants import (
+    ENDPOINT_EWMA_ALPHA,
+    ENDPOINT_COOLDOWN_SECONDS,
+    ENDPOINT_POOL_LIMITS,
+)
+
+# Errors worth trying the next endpoint for. Anything else (a 4xx, an invalid
+# extrinsic, ...) would fail the same way everywhere and is raised as is.
+RPC_CONNECTION_ERRORS = (ConnectionError, OSError, TimeoutError, WebSocketException)
+
+
+def parse_endpoint_urls(value: str) -> List[str]:
+    """A `{network}-sidecar-url` / `{network}-rpc-url` secret holds one URL, or several comma-separated."""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+class EndpointPool:
+    """
+    Tracks the latency (EWMA) and health of a network's endpoints of one kind.
+    `ranked()` lists the fastest healthy endpoint first; endpoints that failed
+    recently go last, so they are only used when nothing else answers.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        alpha: float = ENDPOINT_EWMA_ALPHA,
+        cooldown_seconds: float = ENDPOINT_COOLDOWN_SECONDS,
+    ):
+        if not urls:
+            raise ValueError("An endpoint pool needs at least one URL")
+        self.urls = list(urls)
+        self.alpha = alpha
+        self.cooldown_seconds = cooldown_seconds
+        self.latency: Dict[str, Optional[float]] = {url: None for url in self.urls}
+        self.down_until: Dict[str, float] = {url: 0.0 for url in self.urls}
+        self.lock = threading.Lock()
+
+    def ranked(self) -> List[str]:
+        now = time.monotonic()
+        with self.lock:
+            # Endpoints without a measurement yet rank first, so they get measured
+            return sorted(
+                self.urls,
+                key=lambda url: (
+                    self.down_until[url] > now,
+                    self.down_until[url],
+                    self.latency[url] if self.latency[url] is not None else 0.0,
+                ),
+            )
+
+    def record_success(self, url: str, seconds: float):
+        with self.lock:
+            previous = self.latency[url]
+            self.latency[url] = (
+                seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+            )
+            self.down_until[url] = 0.0
+
+    def record_failure(self, url: str):
+        with self.lock:
+            self.down_until[url] = time.monotonic() + self.cooldown_seconds
+
+
+_pools: Dict[Tuple[str, str], EndpointPool] = {}
+_pools_lock = threading.Lock()
+
+
+def endpoint_pool(kind: str, network: str, urls: List[str]) -> EndpointPool:
+    """The process-wide pool for a network's sidecar or RPC endpoints, rebuilt if the configured URLs change."""
+    with _pools_lock:
+        pool = _pools.get((kind, network))
+        if pool is None or pool.urls != list(urls):
+            pool = EndpointPool(urls)
+            _pools[(kind, network)] = pool
+        return pool
+
+
+# --- Sidecar (HTTP) ---
+
+_sidecar_clients: Dict[str, httpx.Client] = {}
+
+
+def _sidecar_client(network: str) -> httpx.Client:
+    with _pools_lock:
+        if network not in _sidecar_clients:
+            _sidecar_clients[network] = httpx.Client(limits=httpx.Limits(**ENDPOINT_POOL_LIMITS))
+        return _sidecar_clients[network]
+
+
+# Errors raised before the request reached the server: the only ones after which a
+# non-idempotent request (submitting an extrinsic) can safely go to another node
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+def _should_fail_over(error: Exception, idempotent: bool = True) -> bool:
+    if not idempotent:
+        return isinstance(error, _CONNECT_ERRORS)
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, httpx.RequestError)
+
+
+def sidecar_request(
+    network: str, urls: List[str], method: str, path: str, idempotent: bool = True, **kwargs
+) -> httpx.Response:
+    """
+    Sends one request to the fastest healthy sidecar of `network`, over a shared
+    keep-alive client, and fails over to the next endpoint on connection errors,
+    timeouts and 5xx/429 answers. Raises the last error when all endpoints failed.
+
+    With `idempotent=False` (e.g. submitting a signed extrinsic), only a failure to
+    connect moves on to the next endpoint: once the request was sent, a timeout or
+    an error answer may hide a request the node already accepted, so it is raised.
+    """
+    pool = endpoint_pool("sidecar", network, urls)
+    client = _sidecar_client(network)
+    last_error: Optional[Exception] = None
+
+    for url in pool.ranked():
+        started_at = time.monotonic()
+        try:
+            response = client.request(method, f"{url}{path}", **kwargs)
+            response.raise_for_status()
+        except (httpx.RequestError, httpx.HTTPStatusError) as e:
+            if not _should_fail_over(e, idempotent):
+                if isinstance(e, httpx.RequestError):
+                    pool.record_failure(url)
+                raise
+            pool.record_failure(url)
+            last_error = e
+            continue
+        pool.record_success(url, time.monotonic() - started_at)
+        return response
+
+    raise last_error
+
+
+async def async_sidecar_request(
+    network: str, urls: List[str], method: str, path: str, **kwargs
+) -> httpx.Response:
+    """Async twin of `sidecar_request`, sharing the same latency and health stats."""
+    pool = endpoint_pool("sidecar", network, urls)
+    client = get_http_client()
+    last_error: Optional[Exception] = None
+
+    for url in pool.ranked():
+        started_at = time.monotonic()
+        try:
+            response = await client.request(method, f"{url}{path}", **kwargs)
+            response.raise_for_status()
+        except (httpx.RequestError, httpx.HTTPStatusError) as e:
+            if not _should_fail_over(e):
+                raise
+            pool.record_failure(url)
+            last_error = e
+            continue
+        pool.record_success(url, time.monotonic() - started_at)
+        return response
+
+    raise last_error
+
+
+# --- RPC (websocket) ---
+
+_substrates: Dict[str, SubstrateInterface] = {}
+_substrate_locks: Dict[str, threading.Lock] = {}
+
+
+def _drop_substrate(url: str):
+    dropped = _substrates.pop(url, None)
+    if dropped is not None:
+        try:
+            dropped.close()
+        except Exception:
+            pass
+
+
+def run_with_substrate(network: str, urls: List[str], fn: Callable[[SubstrateInterface], Any]) -> Any:
+    """
+    Runs `fn(substrate)` on a kept-open connection to the fastest healthy RPC node
+    of `network`. A kept-open connection that errors is usually just stale (the
+    node closed an idle websocket), so `fn` is retried once on a new connection
+    to the same node; only then does the node count as down and the next one is
+    tried. `fn` must therefore be safe to re-run (reads, composing and signing
+    are). A SubstrateInterface isn't thread-safe: calls are serialized per network.
+    """
+    pool = endpoint_pool("rpc", network, urls)
+    with _pools_lock:
+        lock = _substrate_locks.setdefault(network, threading.Lock())
+
+    last_error: Optional[Exception] = None
+    with lock:
+        for url in pool.ranked():
+            # One go on the kept-open connection (if any), then one on a new one
+            attempts = 2 if url in _substrates else 1
+            for _ in range(attempts):
+                started_at = time.monotonic()
+                try:
+                    substrate = _substrates.get(url)
+                    if substrate is None:
+                        substrate = SubstrateInterface(url=url)
+                        _substrates[url] = substrate
+                    result = fn(substrate)
+                except RPC_CONNECTION_ERRORS as e:
+                    _drop_substrate(url)
+                    last_error = e
+                    continue
+                pool.record_success(url, time.monotonic() - started_at)
+                return result
+            pool.record_failure(url)
+
+    raise last_error
+
+
+def reset_endpoint_pools():
+    """Forgets all stats and closes the kept-open connections."""
+    with _pools_lock:
+        _pools.clear()
+        for client in _sidecar_clients.values():
+            client.close()
+        _sidecar_clients.clear()
+        for url in list(_substrates):
+            _drop_substrate(url)
@@ -1,5 +1,11 @@
+import asyncio
+import threading
+from typing import Dict
 from google import genai
+from google.genai import types
 import dspy
+from utils.constants import GEMINI_TIMEOUT_SECONDS
+from utils.llm_cache import get_response_cache, response_key
 
 
 class FakeUsage:
@@ -32,41 +38,101 @@ class FakeResponse:
         self.model = model
 
 
+_clients: Dict[str, genai.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def gemini_client(api_key: str) -> genai.Client:
+    """One client (and HTTP connection pool) per API key, shared by every GeminiLM in the process."""
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = genai.Client(api_key=api_key)
+        return _clients[api_key]
+
+
+def _contents(prompt=None, messages=None) -> str:
+    # extract prompt string DSPy sends
+    if messages:
+        return "\n".join(m["content"] for m in messages if m.get("role") == "user")
+    return prompt
+
+
+def _usage(gemini_response, contents: str, text: str) -> FakeUsage:
+    """Token counts reported by Gemini; the len/4 estimate only when the response has none."""
+    usage = getattr(gemini_response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    if prompt_tokens is None:
+        return FakeUsage(len(contents) // 4, len(text) // 4)
+    # Thinking tokens are billed as output tokens
+    completion_tokens = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+    return FakeUsage(prompt_tokens, completion_tokens)
+
+
 class GeminiLM(dspy.LM):
-    def __init__(self, model, api_key):
+    def __init__(self, model, api_key, timeout: float = GEMINI_TIMEOUT_SECONDS):
         super().__init__(model="custom_gemini")
 
         self.model_name = model
-        self.client = genai.Client(api_key=api_key)
+        self.client = gemini_client(api_key)
+        self.timeout = timeout
         self.use_litellm = False
 
     def forward(self, prompt=None, messages=None, **kwargs):
-        # extract prompt string DSPy sends
-        if messages:
-            contents = "\n".join(
-                m["content"] for m in messages if m.get("role") == "user"
-            )
-        else:
-            contents = prompt
-
-        # call Gemini SDK
+        # Identical prompts (re-votes, retried runs, backfills) are answered from
+        # the persistent cache; pass cache=False to bypass it
+        bypass = kwargs.pop("cache", True) is False
+        timeout = kwargs.pop("timeout", self.timeout)
+        key = response_key(self.model_name, {**self.kwargs, **kwargs}, messages, prompt)
+        return get_response_cache().call(
+            key, lambda: self._generate(prompt, messages, timeout), bypass=bypass
+        )
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        bypass = kwargs.pop("cache", True) is False
+        timeout = kwargs.pop("timeout", self.timeout)
+        key = response_key(self.model_name, {**self.kwargs, **kwargs}, messages, prompt)
+        return await get_response_cache().acall(
+            key, lambda: self._agenerate(prompt, messages, timeout), bypass=bypass
+        )
+
+    def _config(self, timeout: float) -> types.GenerateContentConfig:
+        return types.GenerateContentConfig(
+            http_options=types.HttpOptions(timeout=int(timeout * 1000))
+        )
+
+    def _generate(self, prompt, messages, timeout: float):
+        contents = _contents(prompt, messages)
         gemini_response = self.client.models.generate_content(
             model=self.model_name,
             contents=contents,
+            config=self._config(timeout),
+        )
+        return self._response(gemini_response, contents)
+
+    async def _agenerate(self, prompt, messages, timeout: float):
+        contents = _contents(prompt, messages)
+        # wait_for also cancels the request when the caller is cancelled
+        gemini_response = await asyncio.wait_for(
+            self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=contents,
+                config=self._config(timeout),
+            ),
+            timeout,
         )
+        return self._response(gemini_response, contents)
 
-        # get response text
+    def _response(self, gemini_response, contents: str) -> FakeResponse:
         text = gemini_response.text
-
-        # estimate tokens (Gemini doesn't give usage)
-        prompt_tokens = len(contents) // 4
-        completion_tokens = len(text) // 4
+        usage = _usage(gemini_response, contents, text)
+        # Only real calls count towards usage, cache hits never reach here
+        if dspy.settings.usage_tracker:
+            dspy.settings.usage_tracker.add_usage(self.model_name, dict(usage))
 
         # return LiteLLM-compatible structured object
         return FakeResponse(
             content=text,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
             model=self.model_name,
         )
-
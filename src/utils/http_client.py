@@ -0,0 +1,44 @@
+import asyncio
+import importlib.util
+import weakref
+import httpx
+from utils.constants import HTTP_CLIENT_LIMITS, HTTP_CLIENT_TIMEOUT_SECONDS
+from utils.rate_limit import RateLimitedTransport
+
+# HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Process-wide async client shared by all scraper tasks: keep-alive connection
+    pools per host (bounded by HTTP_CLIENT_LIMITS), HTTP/2 when available, and
+    the per-host rate limits of `utils.rate_limit`.
+
+    An AsyncClient can't be shared across event loops, so there is one per running
+    loop; it goes away with its loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            http2=HTTP2_AVAILABLE, limits=httpx.Limits(**HTTP_CLIENT_LIMITS)
+        )
+        client = httpx.AsyncClient(
+            transport=RateLimitedTransport(transport),
+            timeout=httpx.Timeout(HTTP_CLIENT_TIMEOUT_SECONDS, connect=10.0),
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_http_client():
+    """Closes the running loop's shared client, e.g. at the end of a long backfill."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,74 @@
+import datetime
+import json
+import time
+from typing import Dict, Optional
+import s3fs
+
+# One small object per lease, next to the data it protects:
+# s3://{bucket}/leases/dispatcher/{network}.json
+
+
+def lease_path(s3_bucket: str, name: str) -> str:
+    return f"{s3_bucket}/leases/dispatcher/{name}.json"
+
+
+def read_lease(s3: s3fs.S3FileSystem, s3_bucket: str, name: str) -> Optional[Dict]:
+    """The current lease object, None if nobody ever took it (or it was released)."""
+    try:
+        with s3.open(lease_path(s3_bucket, name), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def lease_is_held_by_other(
+    lease: Optional[Dict], owner: str, now: datetime.datetime
+) -> bool:
+    """True when another owner holds a lease that has not expired yet."""
+    if not lease or lease.get("owner") == owner:
+        return False
+    return datetime.datetime.fromisoformat(lease["expires_at"]) > now
+
+
+def try_acquire_lease(
+    s3: s3fs.S3FileSystem,
+    s3_bucket: str,
+    name: str,
+    owner: str,
+    ttl_seconds: int,
+    settle_seconds: float = 0,
+) -> bool:
+    """
+    Takes (or renews) the lease for `owner` unless another owner holds a live one.
+    Expired leases of dead workers are simply overwritten.
+
+    The object store has no compare-and-swap, so the lease is written, then read
+    back after `settle_seconds`: when two workers race, only the last writer still
+    sees itself. This narrows the race rather than closing it; idempotency keys on
+    the scheduled runs remain the safety net.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if lease_is_held_by_other(read_lease(s3, s3_bucket, name), owner, now):
+        return False
+
+    lease = {
+        "owner": owner,
+        "acquired_at": now.isoformat(),
+        "expires_at": (now + datetime.timedelta(seconds=ttl_seconds)).isoformat(),
+    }
+    with s3.open(lease_path(s3_bucket, name), "w") as f:
+        json.dump(lease, f)
+
+    if settle_seconds:
+        time.sleep(settle_seconds)
+    current = read_lease(s3, s3_bucket, name)
+    return current is not None and current.get("owner") == owner
+
+
+def release_lease(s3: s3fs.S3FileSystem, s3_bucket: str, name: str, owner: str) -> bool:
+    """Deletes the lease if `owner` still holds it, so the next worker needn't wait for expiry."""
+    lease = read_lease(s3, s3_bucket, name)
+    if lease is None or lease.get("owner") != owner:
+        return False
+    s3.rm(lease_path(s3_bucket, name))
+    return True
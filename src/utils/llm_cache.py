@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import diskcache
+import dspy
+from utils.constants import (
+    LLM_CACHE_DIR,
+    LLM_CACHE_SIZE_LIMIT_BYTES,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CACHE_BYPASS_ENV,
+)
+
+
+# Who calls and where, not what is generated: never part of a key. Otherwise every
+# key rotation would empty the cache, and secrets would end up in the hashed payload.
+CREDENTIAL_PARAMS = {
+    "api_key",
+    "api_base",
+    "base_url",
+    "api_version",
+    "organization",
+    "headers",
+    "extra_headers",
+    "aws_access_key_id",
+    "aws_secret_access_key",
+    "aws_session_token",
+    "vertex_credentials",
+}
+
+
+def response_key(model: str, params: Dict[str, Any], messages: Optional[List[Dict[str, Any]]], prompt: Optional[str]) -> str:
+    """Same model, same generation parameters, same payload: same key."""
+    params = {name: value for name, value in params.items() if name not in CREDENTIAL_PARAMS}
+    payload = {"model": model, "params": params, "messages": messages, "prompt": prompt}
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent LLM response cache on disk (diskcache: safe across threads and
+    processes), bounded to `size_limit` bytes with least-recently-used eviction.
+    Entries expire after `ttl_seconds`. Counts hits, misses and bypassed calls.
+    """
+
+    def __init__(
+        self,
+        directory: str = LLM_CACHE_DIR,
+        size_limit: int = LLM_CACHE_SIZE_LIMIT_BYTES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+    ):
+        self.cache = diskcache.Cache(
+            directory, size_limit=size_limit, eviction_policy="least-recently-used"
+        )
+        self.ttl_seconds = ttl_seconds
+        self.counts = {"hits": 0, "misses": 0, "bypassed": 0}
+        self.lock = threading.Lock()
+
+    def _count(self, outcome: str):
+        with self.lock:
+            self.counts[outcome] += 1
+
+    def _lookup(self, key: str, bypass: bool) -> Any:
+        if bypass or os.getenv(LLM_CACHE_BYPASS_ENV) == "1":
+            self._count("bypassed")
+            return None
+        response = self.cache.get(key)
+        self._count("misses" if response is None else "hits")
+        return response
+
+    def call(self, key: str, fetch: Callable[[], Any], bypass: bool = False) -> Any:
+        """The cached response for `key`, or `fetch()`'s, stored for next time. `bypass` always fetches."""
+        response = self._lookup(key, bypass)
+        if response is None:
+            response = fetch()
+            self.cache.set(key, response, expire=self.ttl_seconds)
+        return response
+
+    async def acall(self, key: str, fetch: Callable[[], Awaitable[Any]], bypass: bool = False) -> Any:
+        """`call` for coroutine fetchers. Lookups are local SQLite reads and stay inline."""
+        response = self._lookup(key, bypass)
+        if response is None:
+            response = await fetch()
+            self.cache.set(key, response, expire=self.ttl_seconds)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            counts = dict(self.counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 3) if lookups else None
+        counts["entries"] = len(self.cache)
+        counts["size_bytes"] = self.cache.volume()
+        return counts
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """The process-wide cache, opened on first use."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
+
+
+class CachedLM(dspy.LM):
+    """
+    dspy.LM (LiteLLM, e.g. OpenRouter) whose responses go through the persistent
+    response cache. Pass `cache=False` on a call to bypass it. DSPy's own cache is
+    disabled: it would only duplicate the entries.
+    """
+
+    def __init__(self, model: str, **kwargs):
+        kwargs["cache"] = False
+        super().__init__(model, **kwargs)
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        bypass = kwargs.pop("cache", True) is False
+        key = response_key(self.model, {**self.kwargs, **kwargs}, messages, prompt)
+        return get_response_cache().call(
+            key,
+            lambda: super(CachedLM, self).forward(prompt=prompt, messages=messages, **kwargs),
+            bypass=bypass,
+        )
+
+    async def aforward(self, prompt=None, messages=None, **kwargs):
+        bypass = kwargs.pop("cache", True) is False
+        key = response_key(self.model, {**self.kwargs, **kwargs}, messages, prompt)
+        return await get_response_cache().acall(
+            key,
+            lambda: super(CachedLM, self).aforward(prompt=prompt, messages=messages, **kwargs),
+            bypass=bypass,
+        )
@@ -0,0 +1,94 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+import dspy
+from utils.constants import COMPILED_PROGRAMS_DIR
+
+# Bump to invalidate every stored program (e.g. when the key layout changes)
+PROGRAM_STORE_VERSION = 1
+
+
+def _source_of(obj: Any) -> str:
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return repr(obj)
+
+
+def _example_fingerprint(example: dspy.Example) -> dict:
+    return {
+        "fields": example.toDict(),
+        "inputs": sorted(example.inputs().keys()),
+    }
+
+
+def program_key(
+    model_id: str,
+    sources: Iterable[Any],
+    trainset: List[dspy.Example],
+    compile_config: Optional[dict] = None,
+) -> str:
+    """
+    Identifies a compiled program: the model that bootstrapped it, the source of
+    the module, signature and metric it was compiled from, the trainset and the
+    compiler settings. Any change gives a new key, hence a recompile.
+    """
+    material = {
+        "version": PROGRAM_STORE_VERSION,
+        "dspy": dspy.__version__,
+        "model_id": model_id,
+        "sources": [_source_of(source) for source in sources],
+        "trainset": [_example_fingerprint(example) for example in trainset],
+        "compile_config": compile_config or {},
+    }
+    encoded = json.dumps(material, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def program_path(name: str, key: str, store_dir: str = COMPILED_PROGRAMS_DIR) -> Path:
+    return Path(store_dir) / f"{name}-{key[:16]}.json"
+
+
+def load_or_compile(
+    name: str,
+    key: str,
+    new_program: Callable[[], dspy.Module],
+    compile_program: Callable[[], dspy.Module],
+    store_dir: str = COMPILED_PROGRAMS_DIR,
+    logger=None,
+) -> dspy.Module:
+    """
+    Loads the compiled program stored under `key`, or compiles and stores it.
+    `new_program` builds an uncompiled instance to load the saved state into.
+    A store that can't be read or written only costs a compile.
+    """
+    path = program_path(name, key, store_dir)
+    if path.exists():
+        try:
+            program = new_program()
+            program.load(str(path))
+            if logger:
+                logger.info(f"Loaded compiled program '{name}' from {path}")
+            return program
+        except Exception as e:
+            if logger:
+                logger.warning(f"Could not load compiled program {path}, recompiling: {e}")
+
+    program = compile_program()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written next to its final name, then renamed: concurrent runs never read half a file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".json")
+        os.close(fd)
+        program.save(tmp_path)
+        os.replace(tmp_path, path)
+        if logger:
+            logger.info(f"Stored compiled program '{name}' at {path}")
+    except Exception as e:
+        if logger:
+            logger.warning(f"Could not store compiled program {path}: {e}")
+    return program
@@ -2,18 +2,26 @@ import dspy
 from dspy.teleprompt import BootstrapFewShot
 from typing import Dict, Any, Set
 from collections import defaultdict
-import re
 from utils.gemini_lm import GeminiLM
+from utils.content_sanitizer import sanitize_content
+from utils.proposal_digest import (
+    CONTENT_FULL_FILE,
+    TRUNCATION_WARNING,
+    build_digest,
+    estimate_tokens,
+    truncate_to_tokens,
+)
+from utils.constants import PROPOSAL_CONTENT_MAX_TOKENS, NATIVE_SYMBOLS
+from utils.scrape_metadata import CONTENT_FILE
+from utils.program_store import load_or_compile, program_key
 import os
 
 
+# Teacher and runtime model of the augmenter; part of its compiled-program key
+AUGMENTER_MODEL_ID = "gemini-2.5-flash"
+
 # TODO shove this in constants
 SUPPORTED_SYMBOLS: Set[str] = {"DOT", "KSM", "USDC", "USDT", "PAS"}
-NATIVE_SYMBOLS: Dict[str, str] = {
-    "polkadot": "DOT",
-    "kusama": "KSM",
-    "paseo": "PAS"
-}
 
 TOKEN_DECIMALS: Dict[str, int] = {
     "DOT": 10,
@@ -75,10 +83,11 @@ class ProposalAugmenter(dspy.Module):
         """
         if not proposal_content:
             proposal_content = "[No Proposal content provided]"
-        elif len(proposal_content) > 60000:  # ~16k tokens, a reasonable upper limit
+        elif estimate_tokens(proposal_content) > PROPOSAL_CONTENT_MAX_TOKENS:
+            # Oversized content is digested before it gets here, this only guards direct calls
             proposal_content = (
-                proposal_content[:60000]
-                + "\n\n...[WARNING: CONTENT TRUNCATED DUE TO EXCESSIVE LENGTH]..."
+                truncate_to_tokens(proposal_content, PROPOSAL_CONTENT_MAX_TOKENS)
+                + f"\n\n...[{TRUNCATION_WARNING}]..."
             )
 
         analysis = self.analyzer(
@@ -226,8 +235,7 @@ def parse_proposal_data_with_units(proposal_data: Dict[str, Any], network: str)
     """
     title = proposal_data.get("title", "No Title Provided")
     content = proposal_data.get("content", "No Content Provided")
-    content = re.sub(r'<img[^>]*>', '', content)                                # images are in-line, messes up with token count (removing for now)
-    content = re.sub(r'data:image/[^;]+;base64,[A-Za-z0-9+/=]+', '', content)   # Remove base64 images
+    content = sanitize_content(content)  # images are in-line, messes up with token count (removing for now)
 
     aggregated_spends = defaultdict(float)
     
@@ -296,23 +304,62 @@ def parse_proposal_data_with_units(proposal_data: Dict[str, Any], network: str)
 def generate_content_for_magis(
     proposal_data: Dict[str, Any], logger, openrouter_model, openrouter_api_key, network
 ):
-    import os
+    return generate_content_files_for_magis(
+        proposal_data, logger, openrouter_model, openrouter_api_key, network
+    )[CONTENT_FILE]
+
 
+def generate_content_files_for_magis(
+    proposal_data: Dict[str, Any], logger, openrouter_model, openrouter_api_key, network
+) -> Dict[str, str]:
+    """
+    content.md for the MAGIs, keyed by file name. Proposals over
+    PROPOSAL_CONTENT_MAX_TOKENS are replaced by a digest in content.md, and their
+    full text is returned as content_full.md for audit.
+    """
     lm = GeminiLM(
-    model="gemini-2.5-flash",
+    model=AUGMENTER_MODEL_ID,
     api_key=os.getenv("GEMINI_API_KEY"))
-    
-    dspy.configure(lm=lm)
 
-    augmenter = ProposalAugmenter()
-    logger.info(
-        "DSPY---> Compiling the Polkadot-Aware DSPy Program (this may take a moment)..."
+    # dspy.context rather than dspy.configure: configure may only be called from one
+    # thread, and backfills augment several proposals in parallel worker threads
+    with dspy.context(lm=lm):
+        return _augment(proposal_data, logger, network)
+
+
+def _augment(proposal_data: Dict[str, Any], logger, network):
+    compile_config = dict(max_bootstrapped_demos=2)
+
+    def compile_augmenter():
+        logger.info(
+            "DSPY---> Compiling the Polkadot-Aware DSPy Program (this may take a moment)..."
+        )
+        teleprompter = BootstrapFewShot(metric=proposal_metric, **compile_config)
+        compiled = teleprompter.compile(ProposalAugmenter(), trainset=examples)
+        logger.info("DSPY---> DSPy Compilation Complete")
+        return compiled
+
+    compiled_augmenter = load_or_compile(
+        name="proposal_augmenter",
+        key=program_key(
+            AUGMENTER_MODEL_ID,
+            [ProposalAugmenter, ProposalAnalysisSignature, proposal_metric],
+            examples,
+            compile_config,
+        ),
+        new_program=ProposalAugmenter,
+        compile_program=compile_augmenter,
+        logger=logger,
     )
-    teleprompter = BootstrapFewShot(metric=proposal_metric, max_bootstrapped_demos=2)
-    compiled_augmenter = teleprompter.compile(augmenter, trainset=examples)
-    logger.info("DSPY---> DSPy Compilation Complete")
 
     parsed_data = parse_proposal_data_with_units(proposal_data, network)
+    files = {}
+
+    if estimate_tokens(parsed_data["content"]) > PROPOSAL_CONTENT_MAX_TOKENS:
+        # The digest goes in content.md, so the augmenter and all three MAGIs see a bounded prompt
+        digest = build_digest(parsed_data["title"], parsed_data["content"], logger)
+        files[CONTENT_FULL_FILE] = digest.full_text
+        parsed_data["content"] = digest.text
 
     analysis = compiled_augmenter(
         proposal_title=parsed_data["title"],
@@ -321,4 +368,5 @@ def generate_content_for_magis(
     )
 
     logger.info("DSPY---> Analysis done. Returning content.md")
-    return format_analysis_to_markdown(analysis, parsed_data)
+    files[CONTENT_FILE] = format_analysis_to_markdown(analysis, parsed_data)
+    return files
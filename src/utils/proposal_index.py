@@ -0,0 +1,265 @@
+import base64
+import datetime
+import json
+import os
+import posixpath
+import time
+import uuid
+import zlib
+from typing import Dict, List, Optional, Tuple
+import s3fs
+
+# One small object per network, next to the proposal folders:
+# s3://{bucket}/proposals/{network}/_index.json
+PROPOSAL_INDEX_FILENAME = "_index.json"
+
+# Stage outcomes are never written into _index.json directly: scrapers, voters,
+# commenters and the dispatcher run in separate processes and would overwrite each
+# other's read-modify-write. Each outcome is its own empty marker object instead,
+# everything encoded in its name, so a single listing reads them all:
+# s3://{bucket}/proposals/{network}/_index_markers/{stage}.{proposal_id}.{status}.{time_ns}.{nonce}
+# The dispatcher, the only writer of _index.json (it holds the network's lease),
+# folds the markers into it and deletes the ones it folded.
+INDEX_MARKERS_DIR = "_index_markers"
+
+# "skipped" is for proposals the dispatcher filtered out before scraping (e.g. track not delegated)
+INDEX_STATUSES = ("processed", "failed", "skipped")
+
+
+def proposal_index_path(s3_bucket: str, network: str) -> str:
+    return f"{s3_bucket}/proposals/{network}/{PROPOSAL_INDEX_FILENAME}"
+
+
+def index_markers_path(s3_bucket: str, network: str) -> str:
+    return f"{s3_bucket}/proposals/{network}/{INDEX_MARKERS_DIR}"
+
+
+def marker_name(stage: str, proposal_id: int, status: str) -> str:
+    # Zero-padded so markers sort by time; the nonce keeps simultaneous writers apart
+    return f"{stage}.{proposal_id}.{status}.{time.time_ns():020d}.{uuid.uuid4().hex[:8]}"
+
+
+def parse_marker_name(name: str) -> Optional[Tuple[str, int, str, int]]:
+    """(stage, proposal_id, status, time_ns) of a marker, None for anything else."""
+    parts = name.split(".")
+    if len(parts) != 5 or not parts[1].isdigit() or parts[2] not in INDEX_STATUSES or not parts[3].isdigit():
+        return None
+    return parts[0], int(parts[1]), parts[2], int(parts[3])
+
+
+class Bitmap:
+    """Growable bitset of proposal ids, bit i set means proposal i is in the set."""
+
+    def __init__(self, data: Optional[bytes] = None):
+        self.data = bytearray(data or b"")
+
+    def add(self, proposal_id: int):
+        byte_index = proposal_id // 8
+        if byte_index >= len(self.data):
+            self.data.extend(b"\x00" * (byte_index + 1 - len(self.data)))
+        self.data[byte_index] |= 1 << (proposal_id % 8)
+
+    def discard(self, proposal_id: int):
+        byte_index = proposal_id // 8
+        if byte_index < len(self.data):
+            self.data[byte_index] &= ~(1 << (proposal_id % 8)) & 0xFF
+
+    def __contains__(self, proposal_id: int) -> bool:
+        byte_index = proposal_id // 8
+        if proposal_id < 0 or byte_index >= len(self.data):
+            return False
+        return bool(self.data[byte_index] & (1 << (proposal_id % 8)))
+
+    def ids(self) -> List[int]:
+        return [
+            byte_index * 8 + bit
+            for byte_index, byte in enumerate(self.data)
+            if byte
+            for bit in range(8)
+            if byte & (1 << bit)
+        ]
+
+    def encode(self) -> str:
+        return base64.b64encode(zlib.compress(bytes(self.data))).decode("ascii")
+
+    @classmethod
+    def decode(cls, encoded: str) -> "Bitmap":
+        return cls(zlib.decompress(base64.b64decode(encoded)))
+
+
+class ProposalIndex:
+    """
+    Per-network processing state: the highest scraped proposal id, plus one
+    processed/failed/skipped bitmap per pipeline stage (scrape, vote, comment, ...).
+    """
+
+    def __init__(
+        self,
+        network: str,
+        high_watermark: int = 0,
+        stages: Optional[Dict[str, Dict[str, Bitmap]]] = None,
+    ):
+        self.network = network
+        self.high_watermark = high_watermark
+        self.stages = stages or {}
+
+    def _bitmap(self, stage: str, status: str) -> Bitmap:
+        return self.stages.setdefault(stage, {}).setdefault(status, Bitmap())
+
+    def mark(self, stage: str, proposal_id: int, status: str):
+        """Records the latest outcome of a stage for a proposal."""
+        if status not in INDEX_STATUSES:
+            raise ValueError(f"Unknown proposal index status '{status}'")
+
+        for other_status in INDEX_STATUSES:
+            if other_status != status:
+                self._bitmap(stage, other_status).discard(proposal_id)
+        self._bitmap(stage, status).add(proposal_id)
+
+        # The dispatcher resumes after the highest proposal the scraper has handled
+        if stage == "scrape":
+            self.high_watermark = max(self.high_watermark, proposal_id)
+
+    def has(self, stage: str, proposal_id: int, status: str) -> bool:
+        return proposal_id in self.stages.get(stage, {}).get(status, Bitmap())
+
+    def ids(self, stage: str, status: str) -> List[int]:
+        return self.stages.get(stage, {}).get(status, Bitmap()).ids()
+
+    def gaps(self, stage: str, start_id: int, end_id: int) -> List[int]:
+        """Ids in [start_id, end_id] the stage has neither processed nor skipped (never seen or failed)."""
+        processed = self.stages.get(stage, {}).get("processed", Bitmap())
+        skipped = self.stages.get(stage, {}).get("skipped", Bitmap())
+        return [
+            i for i in range(start_id, end_id + 1) if i not in processed and i not in skipped
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": 1,
+            "network": self.network,
+            "high_watermark": self.high_watermark,
+            "updated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "stages": {
+                stage: {status: bitmap.encode() for status, bitmap in bitmaps.items()}
+                for stage, bitmaps in self.stages.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProposalIndex":
+        return cls(
+            network=data["network"],
+            high_watermark=int(data.get("high_watermark", 0)),
+            stages={
+                stage: {status: Bitmap.decode(encoded) for status, encoded in bitmaps.items()}
+                for stage, bitmaps in data.get("stages", {}).items()
+            },
+        )
+
+
+def load_proposal_index(
+    s3: s3fs.S3FileSystem, s3_bucket: str, network: str
+) -> Optional[ProposalIndex]:
+    """Reads the network's index object, None if it was never written."""
+    try:
+        with s3.open(proposal_index_path(s3_bucket, network), "r") as f:
+            return ProposalIndex.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+def save_proposal_index(s3: s3fs.S3FileSystem, s3_bucket: str, index: ProposalIndex):
+    with s3.open(proposal_index_path(s3_bucket, index.network), "w") as f:
+        json.dump(index.to_dict(), f)
+
+
+def build_proposal_index_from_listing(
+    s3: s3fs.S3FileSystem, s3_bucket: str, network: str
+) -> ProposalIndex:
+    """
+    Bootstraps an index from the existing proposal folders (one full listing).
+    Only needed once per network, before the first index object exists.
+    """
+    index = ProposalIndex(network=network)
+    try:
+        existing_proposal_paths = s3.ls(f"{s3_bucket}/proposals/{network}/", detail=False)
+    except FileNotFoundError:
+        return index
+
+    for path in existing_proposal_paths:
+        last_component = os.path.basename(path.rstrip("/"))
+        if last_component.isdigit():
+            index.mark("scrape", int(last_component), "processed")
+    return index
+
+
+def list_index_markers(s3: s3fs.S3FileSystem, s3_bucket: str, network: str) -> List[str]:
+    try:
+        return s3.ls(index_markers_path(s3_bucket, network), detail=False, refresh=True)
+    except FileNotFoundError:
+        return []
+
+
+def apply_index_markers(index: ProposalIndex, marker_paths: List[str]) -> ProposalIndex:
+    """Applies the outcomes in time order, so the latest one per stage and proposal wins."""
+    markers = [parse_marker_name(posixpath.basename(path.rstrip("/"))) for path in marker_paths]
+    for stage, proposal_id, status, _ in sorted(filter(None, markers), key=lambda marker: marker[3]):
+        index.mark(stage, proposal_id, status)
+    return index
+
+
+def load_current_proposal_index(
+    s3: s3fs.S3FileSystem, s3_bucket: str, network: str
+) -> Tuple[ProposalIndex, List[str]]:
+    """
+    The index object with every pending marker applied, and the markers it applied.
+    Bootstraps from the folder listing if the index object does not exist yet.
+    """
+    # Markers are listed before the index is read: a concurrent compaction writes
+    # the index before deleting markers, so every outcome is in one or the other
+    marker_paths = list_index_markers(s3, s3_bucket, network)
+    index = load_proposal_index(s3, s3_bucket, network)
+    if index is None:
+        index = build_proposal_index_from_listing(s3, s3_bucket, network)
+    return apply_index_markers(index, marker_paths), marker_paths
+
+
+def compact_proposal_index(s3: s3fs.S3FileSystem, s3_bucket: str, network: str) -> ProposalIndex:
+    """
+    Folds the pending markers into the index object and deletes them. Only one
+    process may compact a network at a time (the dispatcher holding its lease);
+    markers written meanwhile are left for the next compaction.
+    """
+    index, marker_paths = load_current_proposal_index(s3, s3_bucket, network)
+    save_proposal_index(s3, s3_bucket, index)
+    if marker_paths:
+        s3.rm(marker_paths)
+    return index
+
+
+def record_stage_results(
+    s3: s3fs.S3FileSystem,
+    s3_bucket: str,
+    network: str,
+    stage: str,
+    proposal_ids: List[int],
+    status: str,
+):
+    """Records stage outcomes sharing one status, one marker object per proposal."""
+    if status not in INDEX_STATUSES:
+        raise ValueError(f"Unknown proposal index status '{status}'")
+
+    markers_path = index_markers_path(s3_bucket, network)
+    s3.pipe({f"{markers_path}/{marker_name(stage, proposal_id, status)}": b"" for proposal_id in proposal_ids})
+
+
+def record_stage_result(
+    s3: s3fs.S3FileSystem,
+    s3_bucket: str,
+    network: str,
+    stage: str,
+    proposal_id: int,
+    status: str,
+):
+    record_stage_results(s3, s3_bucket, network, stage, [proposal_id], status)
@@ -0,0 +1,187 @@
+import asyncio
+import collections
+import math
+import time
+from typing import Any, Deque, Dict, List, Optional
+import httpx
+from utils.constants import (
+    NETWORK_MAP,
+    HEDGE_DEFAULT_DELAY_SECONDS,
+    HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_LATENCY_WINDOW,
+    HEDGE_PRIMARY_GRACE_SECONDS,
+    NATIVE_SYMBOLS,
+    ASSET_HUB_SYMBOLS,
+)
+
+# Both APIs serve the same referendum; the primary answers first unless it is slow
+PRIMARY_SOURCE = "polkassembly"
+SECONDARY_SOURCE = "subsquare"
+
+
+def proposal_source_url(source: str, network: str, proposal_id: int) -> str:
+    if source == "polkassembly":
+        return f"{NETWORK_MAP[network].rstrip('/')}/{proposal_id}"
+    if source == "subsquare":
+        return f"https://{network}-api.subsquare.io/gov2/referendums/{proposal_id}"
+    raise ValueError(f"Unknown proposal source '{source}'")
+
+
+def _first(data: Dict[str, Any], *paths: str) -> Any:
+    """First non-empty value among dotted paths, e.g. 'onChainInfo.proposer'."""
+    for path in paths:
+        value: Any = data
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _polkassembly_spends(data: Dict[str, Any], network: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Polkassembly's beneficiaries in Subsquare's `allSpends` shape. An entry without
+    an asset id is paid in the network's native token; Polkassembly spells the
+    field `genralIndex` in some payloads.
+    """
+    beneficiaries = _first(data, "beneficiaries", "onChainInfo.beneficiaries", "onchainData.beneficiaries")
+    spends = []
+    for beneficiary in beneficiaries if isinstance(beneficiaries, list) else []:
+        if not isinstance(beneficiary, dict) or beneficiary.get("amount") is None:
+            continue
+        asset_id = _first(beneficiary, "assetId", "generalIndex", "genralIndex")
+        if asset_id is None:
+            symbol = NATIVE_SYMBOLS.get((network or "").lower())
+        else:
+            symbol = ASSET_HUB_SYMBOLS.get(int(asset_id)) if str(asset_id).isdigit() else None
+        spends.append(
+            {
+                "amount": str(beneficiary["amount"]),
+                "beneficiary": beneficiary.get("address"),
+                "assetKind": {"symbol": symbol},
+            }
+        )
+    return spends
+
+
+def normalize_proposal_data(
+    data: Dict[str, Any], source: str, network: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Keeps the source payload and fills the common fields the pipeline reads
+    (title, content, track, proposer, status, and the spends as `allSpends`),
+    whichever API answered. The winning source is recorded in `_source`.
+    """
+    normalized = dict(data)
+    track = _first(data, "track", "trackNumber", "onchainData.track", "onChainInfo.trackNumber")
+    normalized["title"] = _first(data, "title") or ""
+    normalized["content"] = _first(data, "content") or ""
+    normalized["track"] = int(track) if track is not None else None
+    normalized["proposer"] = _first(data, "proposer", "onchainData.proposer", "onChainInfo.proposer")
+    normalized["status"] = _first(data, "state.name", "status", "onChainInfo.status")
+    if not isinstance(data.get("allSpends"), list):
+        normalized["allSpends"] = _polkassembly_spends(data, network)
+    normalized["_source"] = source
+    return normalized
+
+
+def is_valid_proposal_data(data: Any) -> bool:
+    return isinstance(data, dict) and bool(data.get("title") or data.get("content"))
+
+
+class LatencyTracker:
+    """Recent successful response times per source, to hedge at their p95."""
+
+    def __init__(self, window: int = HEDGE_LATENCY_WINDOW):
+        self.samples: Dict[str, Deque[float]] = collections.defaultdict(
+            lambda: collections.deque(maxlen=window)
+        )
+
+    def record(self, source: str, seconds: float):
+        self.samples[source].append(seconds)
+
+    def p95(self, source: str) -> Optional[float]:
+        samples = sorted(self.samples[source])
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[math.ceil(0.95 * len(samples)) - 1]
+
+    def hedge_delay(self, source: str) -> float:
+        """How long to wait for `source` before also asking the other one."""
+        p95 = self.p95(source)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY_SECONDS
+        return max(p95, HEDGE_MIN_DELAY_SECONDS)
+
+
+latency_tracker = LatencyTracker()
+
+
+async def fetch_from_source(
+    client: httpx.AsyncClient,
+    source: str,
+    network: str,
+    proposal_id: int,
+    headers: Dict[str, str],
+) -> Dict[str, Any]:
+    started_at = time.monotonic()
+    response = await client.get(proposal_source_url(source, network, proposal_id), headers=headers)
+    response.raise_for_status()
+    data = response.json()
+    if not is_valid_proposal_data(data):
+        raise ValueError(f"{source} returned no usable proposal data")
+    latency_tracker.record(source, time.monotonic() - started_at)
+    return normalize_proposal_data(data, source, network)
+
+
+async def hedged_fetch_proposal(
+    client: httpx.AsyncClient,
+    network: str,
+    proposal_id: int,
+    headers: Dict[str, str],
+    primary: str = PRIMARY_SOURCE,
+    secondary: str = SECONDARY_SOURCE,
+) -> Dict[str, Any]:
+    """
+    Asks `primary`; if it hasn't answered within its p95 latency (or fails),
+    also asks `secondary`. The first valid answer wins and the other request is
+    cancelled, except that a primary answering within HEDGE_PRIMARY_GRACE_SECONDS
+    of the secondary is still preferred: the two APIs don't word a proposal the
+    same way, and a change of source would look like an edit to the next scrape.
+    Raises the primary's error when both sources fail.
+    """
+    requests = {
+        asyncio.ensure_future(fetch_from_source(client, primary, network, proposal_id, headers)): primary
+    }
+    done, _ = await asyncio.wait(requests, timeout=latency_tracker.hedge_delay(primary))
+
+    errors: Dict[str, BaseException] = {}
+    for request in done:
+        if request.exception() is None:
+            return request.result()
+        errors[requests[request]] = request.exception()
+
+    requests[
+        asyncio.ensure_future(fetch_from_source(client, secondary, network, proposal_id, headers))
+    ] = secondary
+    pending = {request for request in requests if not request.done()}
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for request in done:
+                if request.exception() is not None:
+                    errors[requests[request]] = request.exception()
+                    continue
+                if requests[request] == secondary and pending:
+                    grace_done, pending = await asyncio.wait(pending, timeout=HEDGE_PRIMARY_GRACE_SECONDS)
+                    for primary_request in grace_done:
+                        if primary_request.exception() is None:
+                            return primary_request.result()
+                return request.result()
+    finally:
+        for request in pending:
+            request.cancel()
+
+    raise errors.get(primary) or errors[secondary]
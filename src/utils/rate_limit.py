@@ -0,0 +1,184 @@
+import asyncio
+import email.utils
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import httpx
+from utils.constants import (
+    RATE_LIMITS,
+    RATE_LIMIT_DEFAULT,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_MAX_WAIT_SECONDS,
+)
+
+# Set to a directory shared by the worker processes of one machine to make them
+# share their buckets (one small locked file per host). Unset: per-process buckets.
+RATE_LIMIT_STATE_DIR_ENV = "CYBERGOV_RATE_LIMIT_DIR"
+
+# Answers that tell us to slow down. Their Retry-After is honored before retrying.
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """
+    `rate` requests per second on average, bursts of up to `capacity`. A server
+    hint (Retry-After) blocks the whole bucket until it has passed.
+
+    With `state_path`, the bucket state lives in a file locked with flock, so
+    every process using the same file shares the same budget.
+    """
+
+    def __init__(self, rate: float, capacity: float, state_path: Optional[str] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.state_path = state_path
+        self.state = {"tokens": capacity, "updated": time.time(), "blocked_until": 0.0}
+        self.lock = threading.Lock()
+
+    def _update(self, take: bool, block_for: float = 0.0) -> float:
+        """Refills, then takes a token if one is available. Returns the seconds to wait otherwise."""
+        with self.lock:
+            if self.state_path is None:
+                return self._apply(self.state, take, block_for)
+
+            with open(self.state_path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    raw = f.read()
+                    state = json.loads(raw) if raw else dict(self.state)
+                    wait = self._apply(state, take, block_for)
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                    return wait
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _apply(self, state: Dict[str, float], take: bool, block_for: float) -> float:
+        now = time.time()
+        state["tokens"] = min(self.capacity, state["tokens"] + (now - state["updated"]) * self.rate)
+        state["updated"] = now
+        if block_for:
+            state["blocked_until"] = max(state["blocked_until"], now + block_for)
+        if not take:
+            return 0.0
+        if state["blocked_until"] > now:
+            return state["blocked_until"] - now
+        if state["tokens"] >= 1:
+            state["tokens"] -= 1
+            return 0.0
+        return (1 - state["tokens"]) / self.rate
+
+    async def acquire(self):
+        while (wait := self._update(take=True)) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        while (wait := self._update(take=True)) > 0:
+            time.sleep(wait)
+
+    def block(self, seconds: float):
+        """Honors a server hint: nobody sends to this host for `seconds`."""
+        self._update(take=False, block_for=min(seconds, RATE_LIMIT_MAX_WAIT_SECONDS))
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def host_limits(host: str) -> Tuple[str, Tuple[float, float]]:
+    """The configured (rate, burst) for a host, matched on its domain suffix."""
+    for domain, limits in RATE_LIMITS.items():
+        if host == domain or host.endswith(f".{domain}"):
+            return domain, limits
+    return host, RATE_LIMIT_DEFAULT
+
+
+def bucket_for(host: str) -> TokenBucket:
+    """Process-wide bucket shared by every client talking to the host's domain."""
+    domain, (rate, capacity) = host_limits(host)
+    with _buckets_lock:
+        if domain not in _buckets:
+            state_dir = os.getenv(RATE_LIMIT_STATE_DIR_ENV)
+            state_path = os.path.join(state_dir, f"{domain}.json") if state_dir else None
+            _buckets[domain] = TokenBucket(rate, capacity, state_path)
+        return _buckets[domain]
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> Optional[float]:
+    if response.status_code not in THROTTLE_STATUS_CODES or attempt >= RATE_LIMIT_MAX_RETRIES:
+        return None
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is None and response.status_code != 429:
+        # A 503 without a hint is an outage, not throttling: leave it to the caller
+        return None
+    return retry_after if retry_after is not None else 2 ** attempt
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Waits for a token of the request's host before sending, and retries throttled answers after their Retry-After."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        bucket = bucket_for(request.url.host)
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            response = await self.transport.handle_async_request(request)
+            delay = _retry_delay(response, attempt)
+            if delay is None:
+                return response
+            await response.aclose()
+            bucket.block(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class RateLimitedSyncTransport(httpx.BaseTransport):
+    """Blocking twin of `RateLimitedTransport`, sharing the same buckets."""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        bucket = bucket_for(request.url.host)
+        attempt = 0
+        while True:
+            bucket.acquire_sync()
+            response = self.transport.handle_request(request)
+            delay = _retry_delay(response, attempt)
+            if delay is None:
+                return response
+            response.close()
+            bucket.block(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+def rate_limited_client(**kwargs) -> httpx.Client:
+    """A blocking httpx.Client whose requests go through the shared host buckets."""
+    return httpx.Client(transport=RateLimitedSyncTransport(httpx.HTTPTransport()), **kwargs)
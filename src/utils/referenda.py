@@ -0,0 +1,125 @@
+import asyncio
+import datetime
+from typing import Any, Dict, Iterable, Optional
+from substrateinterface import SubstrateInterface
+from utils.constants import BLOCK_TIME_SECONDS
+from utils.endpoints import run_with_substrate
+from utils.credentials import credentials
+
+
+def fetch_referendum_infos(
+    substrate: SubstrateInterface, proposal_ids: Iterable[int]
+) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    Reads `Referenda.ReferendumInfoFor` for all the given ids in one multi-key
+    storage request. Ids without on-chain info map to None.
+    """
+    proposal_ids = list(proposal_ids)
+    if not proposal_ids:
+        return {}
+
+    storage_keys = [
+        substrate.create_storage_key("Referenda", "ReferendumInfoFor", [proposal_id])
+        for proposal_id in proposal_ids
+    ]
+    infos = {proposal_id: None for proposal_id in proposal_ids}
+    for storage_key, scale_obj in substrate.query_multi(storage_keys):
+        infos[int(storage_key.params[0])] = scale_obj.value if scale_obj is not None else None
+    return infos
+
+
+def referendum_track(info: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Track id of an ongoing referendum, None once it is finished (the track is no longer stored)."""
+    if not isinstance(info, dict):
+        return None
+    ongoing = info.get("Ongoing")
+    if not isinstance(ongoing, dict) or ongoing.get("track") is None:
+        return None
+    return int(ongoing["track"])
+
+
+def fetch_track_periods(substrate: SubstrateInterface) -> Dict[int, Dict[str, int]]:
+    """
+    Prepare, decision and confirm periods (in blocks) per track id, from the
+    `Referenda.Tracks` constant, with the pallet-wide `Referenda.UndecidingTimeout`.
+    """
+    tracks = substrate.get_constant("Referenda", "Tracks").value
+    undeciding_timeout = int(substrate.get_constant("Referenda", "UndecidingTimeout").value)
+    return {
+        int(track_id): {
+            "prepare_period": int(track_info["prepare_period"]),
+            "decision_period": int(track_info["decision_period"]),
+            "confirm_period": int(track_info["confirm_period"]),
+            "undeciding_timeout": undeciding_timeout,
+        }
+        for track_id, track_info in tracks
+    }
+
+
+def referendum_deadline_block(
+    info: Optional[Dict[str, Any]], track_periods: Dict[int, Dict[str, int]]
+) -> Optional[int]:
+    """
+    Last block at which a vote on an ongoing referendum still counts:
+    - not deciding yet: submission + undeciding timeout, when it times out unless
+      its decision period starts (a later start is picked up by the next stage),
+    - deciding: start of the decision period + decision period,
+    - confirming: the end of the confirm period, if that comes first.
+    None for finished referenda or unknown tracks.
+    """
+    track = referendum_track(info)
+    if track is None or track not in track_periods:
+        return None
+
+    ongoing = info["Ongoing"]
+    periods = track_periods[track]
+    deciding = ongoing.get("deciding")
+    if not deciding:
+        return int(ongoing["submitted"]) + periods["undeciding_timeout"]
+
+    deadline = int(deciding["since"]) + periods["decision_period"]
+    if deciding.get("confirming") is not None:
+        deadline = min(deadline, int(deciding["confirming"]))
+    return deadline
+
+
+def fetch_referendum_deadlines(
+    substrate: SubstrateInterface,
+    proposal_ids: Iterable[int],
+    infos: Optional[Dict[int, Optional[Dict[str, Any]]]] = None,
+) -> Dict[int, Optional[datetime.datetime]]:
+    """
+    Estimated wall-clock deadline (UTC) per referendum, None when there is none.
+    Pass `infos` when `ReferendumInfoFor` was already read, to skip that query.
+    """
+    proposal_ids = list(proposal_ids)
+    if infos is None:
+        infos = fetch_referendum_infos(substrate, proposal_ids)
+    if not proposal_ids:
+        return {}
+
+    track_periods = fetch_track_periods(substrate)
+    current_block = substrate.get_block_number(None)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    deadlines = {}
+    for proposal_id in proposal_ids:
+        deadline_block = referendum_deadline_block(infos.get(proposal_id), track_periods)
+        deadlines[proposal_id] = (
+            now + datetime.timedelta(seconds=(deadline_block - current_block) * BLOCK_TIME_SECONDS)
+            if deadline_block is not None
+            else None
+        )
+    return deadlines
+
+
+async def load_referendum_deadline(network: str, proposal_id: int) -> Optional[datetime.datetime]:
+    """Deadline of a single referendum over the network's RPC endpoint."""
+    rpc = await credentials.rpc(network)
+
+    def query_deadline(substrate: SubstrateInterface):
+        return fetch_referendum_deadlines(substrate, [proposal_id])[proposal_id]
+
+    return await asyncio.to_thread(
+        run_with_substrate, network, rpc.urls, query_deadline
+    )
@@ -1,6 +1,9 @@
 import dspy
 import os
+import re
 from dspy.teleprompt import BootstrapFewShot
+from utils.program_store import load_or_compile, program_key
+from utils.llm_cache import CachedLM
 
 
 # This signature remains the same.
@@ -177,7 +180,7 @@ def setup_compiled_agent(model_id: str):
     if not openrouter_api_key:
         raise ValueError("OPENROUTER_API_KEY environment variable not set.")
 
-    compiler_lm = dspy.LM(
+    compiler_lm = CachedLM(
         model=model_id,
         api_base="https://openrouter.ai/api/v1",
         api_key=openrouter_api_key,
@@ -186,11 +189,20 @@ def setup_compiled_agent(model_id: str):
     dspy.settings.configure(lm=compiler_lm)
 
     config = dict(max_bootstrapped_demos=3, max_labeled_demos=3)
-    teleprompter = BootstrapFewShot(metric=None, **config)
-    compiled_magi_agent = teleprompter.compile(MAGI(), trainset=trainset)
 
-    print(f"✅ Agent compiled successfully for model: {model_id}")
-    return compiled_magi_agent
+    def compile_agent():
+        teleprompter = BootstrapFewShot(metric=None, **config)
+        compiled = teleprompter.compile(MAGI(), trainset=trainset)
+        print(f"✅ Agent compiled successfully for model: {model_id}")
+        return compiled
+
+    # Reused across runs until the model, the MAGI code or the trainset change
+    return load_or_compile(
+        name=f"magi-{re.sub(r'[^A-Za-z0-9._-]+', '_', model_id)}",
+        key=program_key(model_id, [MAGI, MAGIVoteSignature], trainset, config),
+        new_program=MAGI,
+        compile_program=compile_agent,
+    )
 
 
 def run_single_inference(compiled_agent, personality_prompt: str, proposal_text: str):
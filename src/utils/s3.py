@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import threading
+import weakref
+from typing import Dict, Iterable, List, Tuple
+import fsspec.asyn
+import s3fs
+
+# (access key, hash of the secret, endpoint): the secret itself isn't kept as a key
+CredentialKey = Tuple[str, str, str]
+
+_filesystems: Dict[CredentialKey, s3fs.S3FileSystem] = {}
+_filesystems_lock = threading.Lock()
+_async_filesystems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[CredentialKey, s3fs.S3FileSystem]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _credential_key(access_key: str, secret_key: str, endpoint_url: str) -> CredentialKey:
+    return access_key, hashlib.sha256(secret_key.encode()).hexdigest(), endpoint_url
+
+
+def s3_filesystem(access_key: str, secret_key: str, endpoint_url: str) -> s3fs.S3FileSystem:
+    """
+    One blocking filesystem per credential set for the whole process, so its
+    connection pool and listing cache survive across tasks. Its I/O runs on
+    fsspec's own event loop thread, which makes it safe to share between the
+    threads Prefect runs sync tasks in. (fsspec's instance cache is per thread,
+    so it would hand each of those threads a fresh client.)
+    """
+    key = _credential_key(access_key, secret_key, endpoint_url)
+    with _filesystems_lock:
+        if key not in _filesystems:
+            _filesystems[key] = s3fs.S3FileSystem(
+                key=access_key,
+                secret=secret_key,
+                client_kwargs={"endpoint_url": endpoint_url},
+                asynchronous=False,
+                loop=None,
+                skip_instance_cache=True,
+            )
+        return _filesystems[key]
+
+
+async def async_s3_filesystem(access_key: str, secret_key: str, endpoint_url: str) -> s3fs.S3FileSystem:
+    """
+    Async twin of `s3_filesystem`, for use with the `_`-prefixed coroutines
+    (`await fs._cat_file(...)`). Bound to the running loop: one per loop and
+    credential set.
+    """
+    loop = asyncio.get_running_loop()
+    filesystems = _async_filesystems.setdefault(loop, {})
+    key = _credential_key(access_key, secret_key, endpoint_url)
+    if key not in filesystems:
+        fs = s3fs.S3FileSystem(
+            key=access_key,
+            secret=secret_key,
+            client_kwargs={"endpoint_url": endpoint_url},
+            asynchronous=True,
+            loop=loop,
+            skip_instance_cache=True,
+        )
+        await fs.set_session()
+        filesystems[key] = fs
+    return filesystems[key]
+
+
+def check_connection(fs: s3fs.S3FileSystem, s3_bucket: str):
+    """Cheap connectivity and credentials check: one HEAD on the bucket. Raises when it fails."""
+    fs.call_s3("head_bucket", Bucket=s3_bucket)
+
+
+def _run_concurrently(fs, method: str, paths: List[str]) -> List:
+    """Runs `fs._{method}(path)` for every path at once on an async filesystem, one by one otherwise."""
+    if not isinstance(fs, fsspec.asyn.AsyncFileSystem):
+        return [getattr(fs, method)(path) for path in paths]
+
+    async def gather():
+        return await asyncio.gather(*(getattr(fs, f"_{method}")(path) for path in paths))
+
+    return fsspec.asyn.sync(fs.loop, gather)
+
+
+def exists_many(fs: s3fs.S3FileSystem, paths: Iterable[str]) -> Dict[str, bool]:
+    """Existence of several keys, checked concurrently (one HEAD each)."""
+    paths = list(paths)
+    return dict(zip(paths, _run_concurrently(fs, "exists", paths)))
+
+
+def cat_many(fs: s3fs.S3FileSystem, paths: Iterable[str]) -> Dict[str, bytes]:
+    """Contents of several keys, fetched concurrently. Missing keys raise FileNotFoundError."""
+    paths = list(paths)
+    return dict(zip(paths, _run_concurrently(fs, "cat_file", paths)))
+
+
+def pipe_many(fs: s3fs.S3FileSystem, contents: Dict[str, bytes]):
+    """Writes several keys concurrently."""
+    fs.pipe(contents)
+
+
+def reset_s3_filesystems():
+    """Forgets the cached filesystems, e.g. after rotating credentials."""
+    with _filesystems_lock:
+        _filesystems.clear()
+    _async_filesystems.clear()
@@ -0,0 +1,251 @@
+import asyncio
+import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from prefect.server.schemas.filters import (
+    FlowRunFilter,
+    FlowRunFilterState,
+    FlowRunFilterStateType,
+    DeploymentFilter,
+    DeploymentFilterId,
+    FlowRunFilterName,
+)
+from prefect.server.schemas.sorting import FlowRunSort
+from prefect.client.orchestration import get_client
+from prefect.client.schemas.objects import StateType
+from prefect.states import Scheduled
+from utils.constants import (
+    STAGE_DEPLOYMENT_IDS,
+    SCHEDULING_MAX_CONCURRENCY,
+    SCHEDULING_MAX_KEY_RETRIES,
+    SCHEDULE_DELAYS_ENABLED,
+    DEADLINE_DELAY_MAX_FRACTION,
+)
+from utils.referenda import load_referendum_deadline
+
+# Runs in these states count as "already scheduled". Failed/crashed runs don't,
+# so they get picked up again. Completed ones are only re-run manually.
+ACTIVE_RUN_STATES = [
+    StateType.RUNNING,
+    StateType.COMPLETED,
+    StateType.PENDING,
+    StateType.SCHEDULED,
+]
+
+# An idempotency key pointing to a run in one of these states is used up
+DEAD_RUN_STATES = [StateType.FAILED, StateType.CRASHED]
+
+FLOW_RUNS_PAGE_SIZE = 200
+
+
+def is_dead_run(run) -> bool:
+    """True when an existing run was handed back in a state it will never leave to do its work."""
+    state_type = getattr(getattr(run, "state", None), "type", None)
+    return state_type in DEAD_RUN_STATES
+
+
+def flow_run_name(stage: str, network: str, proposal_id: int) -> str:
+    return f"{stage}-{network}-{proposal_id}"
+
+
+def idempotency_key(
+    stage: str, network: str, proposal_id: int, suffix: Optional[str] = None, attempt: int = 0
+) -> str:
+    """
+    Deterministic key for a stage run. Prefect returns the existing run instead of
+    creating a new one when the key was already used, so retries never duplicate.
+    Attempt n > 0 gets a '-retry-{n}' key, used once the previous attempt's run is dead.
+    """
+    key = f"{stage}-{network}-{proposal_id}"
+    key = f"{key}-{suffix}" if suffix else key
+    return f"{key}-retry-{attempt}" if attempt else key
+
+
+def parse_proposal_id(run_name: str, stage: str, network: str) -> Optional[int]:
+    """Returns the proposal id of a '{stage}-{network}-{id}' run name, None if it doesn't match."""
+    prefix = f"{stage}-{network}-"
+    if not run_name.startswith(prefix):
+        return None
+    suffix = run_name[len(prefix):]
+    return int(suffix) if suffix.isdigit() else None
+
+
+def deadline_scheduled_time(
+    default_delay: datetime.timedelta,
+    deadline: Optional[datetime.datetime] = None,
+    now: Optional[datetime.datetime] = None,
+) -> datetime.datetime:
+    """
+    When a stage should run: after its default delay, unless the referendum's
+    deadline is close. Then the stage only waits a fraction of the time left,
+    so the rest of the pipeline still fits before the deadline.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    if deadline is None:
+        return now + default_delay
+
+    time_left = deadline - now
+    if time_left <= datetime.timedelta(0):
+        return now
+    return now + min(default_delay, time_left * DEADLINE_DELAY_MAX_FRACTION)
+
+
+def scheduled_state(
+    default_delay: datetime.timedelta, deadline: Optional[datetime.datetime] = None
+) -> Scheduled:
+    """Scheduled state for a stage run, delayed only when SCHEDULE_DELAYS_ENABLED."""
+    if not SCHEDULE_DELAYS_ENABLED:
+        return Scheduled()
+    return Scheduled(scheduled_time=deadline_scheduled_time(default_delay, deadline))
+
+
+async def stage_scheduled_state(
+    network: str, proposal_id: int, default_delay: datetime.timedelta, logger
+) -> Scheduled:
+    """
+    `scheduled_state` for one proposal's next stage. The referendum's deadline is
+    only read over RPC when delays are enabled; if the read fails, the default delay applies.
+    """
+    if not SCHEDULE_DELAYS_ENABLED:
+        return Scheduled()
+    try:
+        deadline = await load_referendum_deadline(network, proposal_id)
+    except Exception as e:
+        logger.warning(
+            f"Could not read the deadline of proposal {proposal_id} on '{network}', using the default delay: {e}"
+        )
+        deadline = None
+    return scheduled_state(default_delay, deadline)
+
+
+def order_by_deadline(
+    proposal_ids: Iterable[int], deadlines: Dict[int, Optional[datetime.datetime]]
+) -> List[int]:
+    """Closest deadline first; proposals without a known deadline go last, by id."""
+    no_deadline = datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+    return sorted(proposal_ids, key=lambda p_id: (deadlines.get(p_id) or no_deadline, p_id))
+
+
+async def fetch_scheduled_proposal_ids(stage: str, network: str) -> Set[int]:
+    """
+    Fetches every active '{stage}-{network}-*' flow run of the stage's deployment,
+    page by page, and returns the set of proposal ids they cover.
+
+    One paginated query per network replaces one query per proposal. Matching on the
+    parsed id also avoids the `like_` substring trap ('scrape-paseo-10' is not 'scrape-paseo-1').
+    """
+    deployment_id = STAGE_DEPLOYMENT_IDS[stage]
+    proposal_ids = set()
+    offset = 0
+
+    async with get_client() as client:
+        while True:
+            runs = await client.read_flow_runs(
+                flow_run_filter=FlowRunFilter(
+                    name=FlowRunFilterName(like_=f"{stage}-{network}-"),
+                    state=FlowRunFilterState(
+                        type=FlowRunFilterStateType(any_=ACTIVE_RUN_STATES)
+                    ),
+                ),
+                deployment_filter=DeploymentFilter(
+                    id=DeploymentFilterId(any_=[deployment_id])
+                ),
+                sort=FlowRunSort.ID_DESC,
+                limit=FLOW_RUNS_PAGE_SIZE,
+                offset=offset,
+            )
+
+            for run in runs:
+                proposal_id = parse_proposal_id(run.name, stage, network)
+                if proposal_id is not None:
+                    proposal_ids.add(proposal_id)
+
+            if len(runs) < FLOW_RUNS_PAGE_SIZE:
+                break
+            offset += FLOW_RUNS_PAGE_SIZE
+
+    return proposal_ids
+
+
+async def is_already_scheduled(stage: str, network: str, proposal_id: int) -> bool:
+    """
+    Whether the stage's deployment has an active run for this one proposal. Matches
+    the exact run name, so it reads at most one run whatever the network's history;
+    the dispatcher's bulk checks use `fetch_scheduled_proposal_ids` instead.
+    """
+    async with get_client() as client:
+        runs = await client.read_flow_runs(
+            flow_run_filter=FlowRunFilter(
+                name=FlowRunFilterName(any_=[flow_run_name(stage, network, proposal_id)]),
+                state=FlowRunFilterState(
+                    type=FlowRunFilterStateType(any_=ACTIVE_RUN_STATES)
+                ),
+            ),
+            deployment_filter=DeploymentFilter(
+                id=DeploymentFilterId(any_=[STAGE_DEPLOYMENT_IDS[stage]])
+            ),
+            limit=1,
+        )
+    return len(runs) > 0
+
+
+async def schedule_flow_runs(
+    stage: str,
+    network: str,
+    proposal_ids: Iterable[int],
+    max_concurrency: int = SCHEDULING_MAX_CONCURRENCY,
+    key_suffix: Optional[str] = None,
+    default_delay: datetime.timedelta = datetime.timedelta(0),
+    deadlines: Optional[Dict[int, Optional[datetime.datetime]]] = None,
+) -> Dict[str, object]:
+    """
+    Creates one '{stage}-{network}-{id}' flow run per proposal on the stage's
+    deployment, at most `max_concurrency` at a time, over a single client.
+
+    With `deadlines`, runs are created closest deadline first and their delay is
+    compressed when the deadline is near (see `deadline_scheduled_time`).
+
+    Every run carries its idempotency key, so re-running this after a partial
+    failure only creates the runs that are missing. When the key hands back a run
+    that failed or crashed, the next attempt key is tried, so a dead run never
+    blocks its proposal. Failures are collected per proposal instead of aborting the batch.
+
+    Returns {"scheduled": [ids], "failed": {id: error}}.
+    """
+    deployment_id = STAGE_DEPLOYMENT_IDS[stage]
+    deadlines = deadlines or {}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    scheduled: List[int] = []
+    failed: Dict[int, str] = {}
+
+    async with get_client() as client:
+
+        async def create_run(proposal_id: int):
+            async with semaphore:
+                try:
+                    for attempt in range(SCHEDULING_MAX_KEY_RETRIES + 1):
+                        run = await client.create_flow_run_from_deployment(
+                            name=flow_run_name(stage, network, proposal_id),
+                            deployment_id=deployment_id,
+                            parameters={"proposal_id": proposal_id, "network": network},
+                            idempotency_key=idempotency_key(
+                                stage, network, proposal_id, key_suffix, attempt
+                            ),
+                            state=scheduled_state(default_delay, deadlines.get(proposal_id)),
+                        )
+                        if not is_dead_run(run):
+                            scheduled.append(proposal_id)
+                            break
+                    else:
+                        failed[proposal_id] = (
+                            f"every idempotency key up to retry {SCHEDULING_MAX_KEY_RETRIES} "
+                            f"points to a failed or crashed run"
+                        )
+                except Exception as e:
+                    failed[proposal_id] = str(e)
+
+        # Tasks acquire the semaphore in creation order, so the closest deadlines go first
+        await asyncio.gather(
+            *(create_run(proposal_id) for proposal_id in order_by_deadline(proposal_ids, deadlines))
+        )
+
+    return {"scheduled": sorted(scheduled), "failed": failed}
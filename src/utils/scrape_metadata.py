@@ -0,0 +1,70 @@
+import datetime
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+import s3fs
+
+# Written next to each run's raw data, and archived with it:
+# s3://{bucket}/proposals/{network}/{proposal_id}/scrape_metadata.json
+SCRAPE_METADATA_FILE = "scrape_metadata.json"
+CONTENT_FILE = "content.md"
+
+
+def _spend_amounts(proposal_data: Dict[str, Any]) -> List[List[str]]:
+    # (symbol, amount) only: the rest of a spend entry depends on which API answered
+    spends = proposal_data.get("allSpends")
+    amounts = []
+    for spend in spends if isinstance(spends, list) else []:
+        if not isinstance(spend, dict):
+            continue
+        asset_kind = spend.get("assetKind")
+        symbol = asset_kind.get("symbol") if isinstance(asset_kind, dict) else spend.get("symbol")
+        amounts.append([str(symbol or "").upper(), str(spend.get("amount", ""))])
+    return sorted(amounts)
+
+
+def proposal_content_hash(proposal_data: Dict[str, Any]) -> str:
+    """
+    Hash of the fields the prompt is built from (title, content, spends, track),
+    as `normalize_proposal_data` fills them whichever API answered: the spends
+    are read from the normalized `allSpends`, reduced to symbol and amount.
+    Comments, reactions, view counts and the like don't change it.
+    """
+    content = (proposal_data.get("content") or "").replace("\r\n", "\n").strip()
+    relevant = {
+        "title": (proposal_data.get("title") or "").strip(),
+        "content": content,
+        "spends": _spend_amounts(proposal_data),
+        "track": proposal_data.get("track"),
+    }
+    encoded = json.dumps(relevant, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def read_scrape_metadata(s3: s3fs.S3FileSystem, base_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with s3.open(f"{base_path}/{SCRAPE_METADATA_FILE}", "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_scrape_metadata(
+    s3: s3fs.S3FileSystem, base_path: str, content_hash: str, prompt_generated: bool, source: Optional[str] = None
+):
+    metadata = {
+        "content_hash": content_hash,
+        "prompt_generated": prompt_generated,
+        "source": source,
+        "scraped_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    with s3.open(f"{base_path}/{SCRAPE_METADATA_FILE}", "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def is_unchanged_scrape(s3: s3fs.S3FileSystem, base_path: str, content_hash: str) -> bool:
+    """True when the stored run has the same content hash and its content.md (if one was generated) is still there."""
+    metadata = read_scrape_metadata(s3, base_path)
+    if not metadata or metadata.get("content_hash") != content_hash:
+        return False
+    return not metadata.get("prompt_generated") or s3.exists(f"{base_path}/{CONTENT_FILE}")
@@ -1,33 +1,36 @@
 # cybergov_data_scraper.py  (FULL REPLACEMENT)
+import asyncio
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import firebase_admin
 from firebase_admin import credentials as fb_credentials
 from firebase_admin import firestore as admin_firestore
 import httpx
 from prefect import flow, task, get_run_logger
-from prefect.blocks.system import Secret
 from prefect.tasks import exponential_backoff
 from prefect.states import Scheduled
 from prefect.server.schemas.states import Completed, Failed
 
 import datetime
-from prefect.server.schemas.filters import (
-    FlowRunFilter,
-    FlowRunFilterState,
-    FlowRunFilterStateType,
-    DeploymentFilter,
-    DeploymentFilterId,
-    FlowRunFilterName,
-)
 from prefect.client.orchestration import get_client
-from prefect.client.schemas.objects import StateType
 from utils.constants import (
     NETWORK_MAP,
     INFERENCE_SCHEDULE_DELAY_MINUTES,
     INFERENCE_TRIGGER_DEPLOYMENT_ID,
     ALLOWED_TRACK_IDS,
+    POLKASSEMBLY_SOURCE_TIMEOUT_SECONDS,
+    POLKASSEMBLY_SOURCE_RETRIES,
+    POLKASSEMBLY_SOURCE_RETRY_DELAY_SECONDS,
+    POLKASSEMBLY_SUMMARY_MAX_BYTES,
+    FIRESTORE_PAYLOAD_CHUNK_CHARS,
+)
+from utils.scheduling import (
+    is_already_scheduled,
+    flow_run_name,
+    stage_scheduled_state,
 )
+from utils.http_client import get_http_client
+from utils.credentials import credentials
 from utils.proposal_augmentation import generate_content_for_magis
 
 
@@ -61,8 +64,7 @@ async def load_firestore_credentials() -> Dict[str, Any]:
     logger = get_run_logger()
 
     try:
-        block = await Secret.load("firebase-credentials-json")
-        raw = block.get()   # could be dict OR string
+        raw = await credentials.secret("firebase-credentials-json")   # could be dict OR string
         logger.info(f"Loaded raw firebase credentials type: {type(raw)}")
 
         # Case 1: Prefect stored JSON directly as dict
@@ -117,7 +119,7 @@ def get_firestore_client():
     retry_delay_seconds=exponential_backoff(backoff_factor=10),
     retry_jitter_factor=0.2,
 )
-def fetch_polkassembly_proposal_data(network: str, proposal_id: int) -> Dict[str, Any]:
+async def fetch_polkassembly_proposal_data(network: str, proposal_id: int) -> Dict[str, Any]:
     """
     Fetches and parses proposal data from Polkassembly ReferendumV2 API endpoint.
 
@@ -136,10 +138,9 @@ def fetch_polkassembly_proposal_data(network: str, proposal_id: int) -> Dict[str
     base_url = NETWORK_MAP[network].rstrip("/")
     proposal_url = f"{base_url}/{proposal_id}"
 
-    # retrieve user agent from Prefect Secret (synchronous here, task context)
+    # retrieve user agent from Prefect Secret
     try:
-        ua_block = Secret.load("cybergov-scraper-user-agent")
-        user_agent = ua_block.get()
+        user_agent = await credentials.secret("cybergov-scraper-user-agent")
     except Exception:
         user_agent = "cybergov-scraper/1.0"
 
@@ -148,12 +149,11 @@ def fetch_polkassembly_proposal_data(network: str, proposal_id: int) -> Dict[str
     logger.info(f"Fetching Polkassembly data from: {proposal_url}")
 
     try:
-        with httpx.Client(timeout=30) as client:
-            response = client.get(proposal_url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"Successfully fetched JSON for {network}/{proposal_id}")
-            return data
+        response = await get_http_client().get(proposal_url, headers=headers, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        logger.info(f"Successfully fetched JSON for {network}/{proposal_id}")
+        return data
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error fetching {proposal_url}: {e} - status {getattr(e, 'response', None)}")
         raise ProposalFetchError(f"HTTP error fetching {proposal_url}") from e
@@ -165,30 +165,153 @@ def fetch_polkassembly_proposal_data(network: str, proposal_id: int) -> Dict[str
         raise ProposalParseError(f"Invalid JSON from {proposal_url}") from e
     
     
-@task(name="Fetch Polkassembly on-chain metadata", retries=3, retry_delay_seconds=5)
-def fetch_polkassembly_onchain_metadata(network: str, proposal_id: int) -> Dict[str, Any]:
+def polkassembly_source_urls(network: str, proposal_id: int) -> Dict[str, str]:
+    """Optional enrichment sources, all independent of each other and of the ReferendumV2 detail."""
+    base_url = NETWORK_MAP[network].rstrip("/")
+    api_url = base_url.rsplit("/", 1)[0]  # .../api/v2
+    return {
+        "onchain_metadata": f"{base_url}/{proposal_id}/on-chain-metadata",
+        "votes": f"{api_url}/votes/all?proposalType=referendums_v2&proposalIndex={proposal_id}",
+        "treasury_stats": f"{api_url}/meta/treasury-stats",
+        "track_counts": f"{api_url}/track-counts",
+    }
+
+
+@task(name="Fetch Polkassembly enrichment sources")
+async def fetch_polkassembly_sources(network: str, proposal_id: int) -> Dict[str, Any]:
+    """
+    Fetches every optional source concurrently, each attempt bounded by its own
+    timeout (POLKASSEMBLY_SOURCE_TIMEOUT_SECONDS). Sources listed in
+    POLKASSEMBLY_SOURCE_RETRIES are tried again before giving up; a source that
+    still fails is left out of the result instead of failing the scrape.
+    """
     logger = get_run_logger()
 
     if network not in NETWORK_MAP:
         raise ProposalFetchError(f"Invalid network '{network}'")
 
-    base_url = NETWORK_MAP[network].rstrip("/")
-    url = f"{base_url}/{proposal_id}/on-chain-metadata"
+    headers = {"User-Agent": "cybergov-scraper/1.0", "Accept": "application/json"}
+    client = get_http_client()
+
+    async def fetch_source(name: str, url: str) -> Any:
+        retries = POLKASSEMBLY_SOURCE_RETRIES.get(name, 0)
+        for attempt in range(retries + 1):
+            try:
+                response = await asyncio.wait_for(
+                    client.get(url, headers=headers), timeout=POLKASSEMBLY_SOURCE_TIMEOUT_SECONDS[name]
+                )
+                response.raise_for_status()
+                return response.json()
+            except (httpx.HTTPError, asyncio.TimeoutError, ValueError) as e:
+                if attempt == retries:
+                    raise
+                logger.info(f"Source '{name}' failed for {network}/{proposal_id} ({e!r}), retrying...")
+                await asyncio.sleep(POLKASSEMBLY_SOURCE_RETRY_DELAY_SECONDS)
+
+    urls = polkassembly_source_urls(network, proposal_id)
+    results = await asyncio.gather(
+        *(fetch_source(name, url) for name, url in urls.items()), return_exceptions=True
+    )
+
+    sources = {}
+    for name, result in zip(urls, results):
+        if isinstance(result, BaseException):
+            if name == "onchain_metadata":
+                logger.error(
+                    f"On-chain metadata failed for {network}/{proposal_id} after retries, "
+                    f"the track number falls back to the proposal detail: {result!r}"
+                )
+            else:
+                logger.warning(f"Optional source '{name}' failed for {network}/{proposal_id}: {result!r}")
+        else:
+            sources[name] = result
+    logger.info(f"Fetched {len(sources)}/{len(urls)} enrichment sources for {network}/{proposal_id}")
+    return sources
+
+
+def _vote_items(votes: Any) -> List[Any]:
+    if isinstance(votes, list):
+        return votes
+    if isinstance(votes, dict):
+        for key in ("votes", "items", "data"):
+            if isinstance(votes.get(key), list):
+                return votes[key]
+    return []
+
+
+def _track_entry(track_counts: Any, track: Optional[int]) -> Any:
+    if track is None:
+        return None
+    if isinstance(track_counts, dict):
+        return track_counts.get(str(track), track_counts.get(track))
+    if isinstance(track_counts, list):
+        for entry in track_counts:
+            if isinstance(entry, dict) and any(
+                str(entry.get(key)) == str(track) for key in ("trackId", "trackNumber", "track")
+            ):
+                return entry
+    return None
 
-    headers = {"User-Agent": "cybergov-scraper/1.0"}
 
+def summarize_enrichment(sources: Dict[str, Any], track: Optional[int]) -> Dict[str, Any]:
+    """
+    What of the enrichment sources goes in the proposal document: the vote count
+    and tally per decision, this track's entry of the track counts, and any other
+    source only when it is small. The full payloads are kept in the `enrichment`
+    subcollection (see `save_enrichment_sources_to_firestore`).
+    """
+    summary: Dict[str, Any] = {"sources": sorted(sources)}
+    for name, payload in sources.items():
+        if name == "votes":
+            items = _vote_items(payload)
+            by_decision: Dict[str, int] = {}
+            for vote in items:
+                decision = str(vote.get("decision", "unknown")) if isinstance(vote, dict) else "unknown"
+                by_decision[decision] = by_decision.get(decision, 0) + 1
+            total = payload.get("totalCount", len(items)) if isinstance(payload, dict) else len(items)
+            summary["votes"] = {"count": total, "byDecision": by_decision}
+        elif name == "track_counts":
+            summary["track_counts"] = {"track": track, "entry": _track_entry(payload, track)}
+        elif len(json.dumps(payload, default=str)) <= POLKASSEMBLY_SUMMARY_MAX_BYTES:
+            summary[name] = payload
+    return summary
+
+
+# --- Firestore write/update tasks ---------------------------------------------
+@task(name="Save enrichment sources to Firestore", retries=2, retry_delay_seconds=5)
+def save_enrichment_sources_to_firestore(sources: Dict[str, Any], network: str, proposal_id: int):
+    """
+    Stores each full enrichment source under proposals/{doc_id}/enrichment/{source}
+    as a JSON string, like the archived versions. A source too big for one
+    document is cut into parts: enrichment/{source} then records how many, and
+    the chunks are enrichment/{source}-{n}.
+    """
+    logger = get_run_logger()
     try:
-        with httpx.Client(timeout=30) as client:
-            response = client.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"Fetched on-chain metadata for {network}/{proposal_id}")
-            return data
+        db = get_firestore_client()
+        doc_id = f"{network}-{proposal_id}"
+        enrichment_col = db.collection("proposals").document(doc_id).collection("enrichment")
+        now_iso = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+        for name, payload in sources.items():
+            payload_str = json.dumps(payload, default=str)
+            chunks = [
+                payload_str[i : i + FIRESTORE_PAYLOAD_CHUNK_CHARS]
+                for i in range(0, len(payload_str), FIRESTORE_PAYLOAD_CHUNK_CHARS)
+            ] or [""]
+            if len(chunks) == 1:
+                enrichment_col.document(name).set({"fetchedAt": now_iso, "parts": 1, "payload": chunks[0]})
+                continue
+            for n, chunk in enumerate(chunks):
+                enrichment_col.document(f"{name}-{n}").set({"part": n, "payload": chunk})
+            enrichment_col.document(name).set({"fetchedAt": now_iso, "parts": len(chunks)})
+
+        logger.info(f"Saved {len(sources)} enrichment sources to proposals/{doc_id}/enrichment")
     except Exception as e:
-        logger.error(f"Failed to fetch on-chain metadata: {e}")
-        return {}
+        logger.error(f"Failed to save enrichment sources to Firestore for {network}-{proposal_id}: {e}")
+        raise FirestoreError("Failed to write enrichment sources to Firestore") from e
+
 
-# --- Firestore write/update tasks ---------------------------------------------
 @task(name="Save Raw Data to Firestore", retries=2, retry_delay_seconds=5)
 def save_raw_data_to_firestore(raw_data: Dict[str, Any], network: str, proposal_id: int):
     """
@@ -333,8 +456,7 @@ def generate_prompt_content(raw_proposal_data: Dict[str, Any], network: str) ->
 
     try:
         # openrouter api key (if used by generate_content_for_magis)
-        openrouter_block = Secret.load("openrouter-api-key")
-        openrouter_api_key = openrouter_block.get()
+        openrouter_api_key = credentials.secret_sync("openrouter-api-key")
     except Exception:
         openrouter_api_key = None
 
@@ -415,29 +537,13 @@ async def check_if_already_scheduled(proposal_id: int, network: str) -> bool:
         f"Checking for existing flow runs for inference-{network}-{proposal_id}..."
     )
 
-    async with get_client() as client:
-        existing_runs = await client.read_flow_runs(
-            flow_run_filter=FlowRunFilter(
-                name=FlowRunFilterName(like_=f"inference-{network}-{proposal_id}"),
-                state=FlowRunFilterState(
-                    type=FlowRunFilterStateType(
-                        any_=[
-                            StateType.RUNNING,
-                            StateType.COMPLETED,
-                            StateType.PENDING,
-                            StateType.SCHEDULED,
-                        ]
-                    )
-                ),
-            ),
-            deployment_filter=DeploymentFilter(
-                id=DeploymentFilterId(any_=[INFERENCE_TRIGGER_DEPLOYMENT_ID])
-            ),
-        )
+    is_scheduled = await is_already_scheduled(
+        stage="inference", network=network, proposal_id=proposal_id
+    )
 
-    if existing_runs:
+    if is_scheduled:
         logger.warning(
-            f"Found {len(existing_runs)} existing inference run(s) for proposal {proposal_id} on '{network}'. Skipping scheduling."
+            f"Found an existing inference run for proposal {proposal_id} on '{network}'. Skipping scheduling."
         )
         return True
 
@@ -453,7 +559,8 @@ async def schedule_inference_task(proposal_id: int, network: str):
     logger = get_run_logger()
 
     delay = datetime.timedelta(minutes=INFERENCE_SCHEDULE_DELAY_MINUTES)
-    scheduled_time = datetime.datetime.now(datetime.timezone.utc) + delay
+    state = await stage_scheduled_state(network, proposal_id, delay, logger)
+    scheduled_time = state.state_details.scheduled_time
     logger.info(
         f"Scheduling MAGI inference for proposal {proposal_id} on '{network}' "
         f"to run at {scheduled_time.isoformat()}"
@@ -461,10 +568,10 @@ async def schedule_inference_task(proposal_id: int, network: str):
 
     async with get_client() as client:
         await client.create_flow_run_from_deployment(
-            name=f"inference-{network}-{proposal_id}",
+            name=flow_run_name("inference", network, proposal_id),
             deployment_id=INFERENCE_TRIGGER_DEPLOYMENT_ID,
             parameters={"proposal_id": proposal_id, "network": network},
-            # state=Scheduled(scheduled_time=scheduled_time)
+            state=state,
         )
 
 
@@ -503,17 +610,28 @@ async def fetch_proposal_data(
 
         # 3) Fetch raw data from Polkassembly
         logger.info(f"Fetching data for proposal {proposal_id} on {network}")
-        raw_proposal_data = fetch_polkassembly_proposal_data(network=network, proposal_id=proposal_id)
-        onchain_meta = fetch_polkassembly_onchain_metadata(network=network, proposal_id=proposal_id)
+        # The detail and the enrichment sources are independent: wall time is the slowest one
+        raw_proposal_data, sources = await asyncio.gather(
+            fetch_polkassembly_proposal_data(network=network, proposal_id=proposal_id),
+            fetch_polkassembly_sources(network=network, proposal_id=proposal_id),
+        )
+        onchain_meta = sources.pop("onchain_metadata", {})
 
         # merge trackNumber into proposal data
         if "trackNumber" in onchain_meta:
             raw_proposal_data["trackNumber"] = onchain_meta["trackNumber"]
 
         raw_proposal_data["OnChain_MetaData"] = onchain_meta
+        # The full sources (all votes, every track) would overflow the 1 MiB document
+        raw_proposal_data["Enrichment"] = summarize_enrichment(sources, extract_track_value(raw_proposal_data))
 
         # 4) Save raw data to Firestore
         save_raw_data_to_firestore(raw_data=raw_proposal_data, network=network, proposal_id=proposal_id)
+        try:
+            save_enrichment_sources_to_firestore(sources=sources, network=network, proposal_id=proposal_id)
+        except FirestoreError as e:
+            # Optional, like the sources themselves
+            logger.warning(f"Enrichment sources not saved for {network}/{proposal_id}: {e}")
 
         # 5) Validate track
         logger.info("Validating proposal track...")
@@ -556,7 +674,6 @@ async def fetch_proposal_data(
 # --- CLI entrypoint ----------------------------------------------------------
 if __name__ == "__main__":
     import sys
-    import asyncio
 
     if len(sys.argv) != 3:
         print("Usage: python cybergov_data_scraper.py <network> <proposal_id>")
@@ -29,6 +29,7 @@ from firebase_admin import firestore as admin_firestore
 # Internal utils - expect these to exist in your codebase
 from utils.helpers import setup_logging, get_config_from_env, hash_file
 from utils.run_magi_eval import run_single_inference, setup_compiled_agent
+from utils.llm_cache import get_response_cache
 
 logger = setup_logging()
 
@@ -460,6 +461,7 @@ def main():
             raise RuntimeError("OPENROUTER_API_KEY missing")
 
         analysis_files = run_magi_evaluations_firestore(magi_models, local_workspace)
+        logger.info("LLM response cache: %s", get_response_cache().stats())
         last_step = "consolidate"
         vote_file = consolidate_vote(analysis_files, local_workspace, proposal_id, network)
         last_step = "upload"
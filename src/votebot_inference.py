@@ -1,20 +1,10 @@
 # src/votebot_inference.py
 from typing import Tuple, Optional
 from prefect import flow, task, get_run_logger
-from prefect.blocks.system import Secret
 import httpx
 from datetime import datetime, timedelta, timezone
 import time
 from prefect.client.orchestration import get_client
-from prefect.server.schemas.filters import (
-    FlowRunFilter,
-    FlowRunFilterState,
-    FlowRunFilterStateType,
-    DeploymentFilter,
-    DeploymentFilterId,
-    FlowRunFilterName,
-)
-from prefect.client.schemas.objects import StateType
 import os
 
 # To ensure transparency, this has to run on GitHub actions
@@ -28,6 +18,12 @@ from utils.constants import (
     INFERENCE_FIND_RUN_TIMEOUT_SECONDS,
     GH_WORKFLOW_NETWORK_MAPPING,
 )
+from utils.scheduling import (
+    is_already_scheduled,
+    flow_run_name,
+    stage_scheduled_state,
+)
+from utils.credentials import credentials
 
 
 # ---------- Helper: get token from Prefect Secret or env ----------
@@ -43,8 +39,7 @@ def get_github_pat() -> str:
     """
     # 1) Prefer Prefect Secret (if Prefect is configured)
     try:
-        block = Secret.load("github-pat")  # will raise if block missing
-        val = block.get()
+        val = credentials.secret_sync("github-pat")  # will raise if block missing
         if val:
             return val
     except Exception:
@@ -175,21 +170,12 @@ async def check_if_voting_already_scheduled(proposal_id: int, network: str) -> b
     logger = get_run_logger()
     logger.info("Checking Prefect for existing vote runs for %s-%s", network, proposal_id)
 
-    async with get_client() as client:
-        existing_runs = await client.read_flow_runs(
-            flow_run_filter=FlowRunFilter(
-                name=FlowRunFilterName(like_=f"vote-{network}-{proposal_id}"),
-                state=FlowRunFilterState(
-                    type=FlowRunFilterStateType(
-                        any_=[StateType.RUNNING, StateType.COMPLETED, StateType.PENDING, StateType.SCHEDULED]
-                    )
-                ),
-            ),
-            deployment_filter=DeploymentFilter(id=DeploymentFilterId(any_=[VOTING_DEPLOYMENT_ID])),
-        )
+    is_scheduled = await is_already_scheduled(
+        stage="vote", network=network, proposal_id=proposal_id
+    )
 
-    if existing_runs:
-        logger.warning("Found %s existing vote run(s).", len(existing_runs))
+    if is_scheduled:
+        logger.warning("Found an existing vote run.")
         return True
 
     logger.info("No existing vote runs found; safe to schedule.")
@@ -199,14 +185,17 @@ async def check_if_voting_already_scheduled(proposal_id: int, network: str) -> b
 @task
 async def schedule_voting_task(proposal_id: int, network: str):
     logger = get_run_logger()
-    scheduled_time = datetime.now(timezone.utc) + timedelta(minutes=VOTING_SCHEDULE_DELAY_MINUTES)
+    delay = timedelta(minutes=VOTING_SCHEDULE_DELAY_MINUTES)
+    state = await stage_scheduled_state(network, proposal_id, delay, logger)
+    scheduled_time = state.state_details.scheduled_time
     logger.info("Scheduling vote flow for %s-%s at %s", network, proposal_id, scheduled_time.isoformat())
 
     async with get_client() as client:
         await client.create_flow_run_from_deployment(
-            name=f"vote-{network}-{proposal_id}",
+            name=flow_run_name("vote", network, proposal_id),
             deployment_id=VOTING_DEPLOYMENT_ID,
             parameters={"proposal_id": proposal_id, "network": network},
+            state=state,
         )
     logger.info("Scheduled vote flow.")
 
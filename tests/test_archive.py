@@ -0,0 +1,101 @@
+import pytest
+import json
+import fsspec
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.archive import archive_current_run, read_archive_index, next_archive_slot
+
+BASE = "bucket/proposals/paseo/42"
+
+
+@pytest.fixture
+def memory_s3():
+    fs = fsspec.filesystem("memory")
+    fs.store.clear()
+    yield fs
+    fs.store.clear()
+
+
+def write(fs, path, content="{}"):
+    with fs.open(path, "w") as f:
+        f.write(content)
+
+
+class TestArchiveCurrentRun:
+    """Test versioned archiving of a proposal's previous run"""
+
+    def test_nothing_to_archive(self, memory_s3):
+        assert archive_current_run(memory_s3, BASE) is None
+        assert read_archive_index(memory_s3, BASE) is None
+
+    def test_first_archive(self, memory_s3):
+        write(memory_s3, f"{BASE}/raw_subsquare_data.json", '{"title": "t"}')
+        write(memory_s3, f"{BASE}/vote/manifest.json")
+
+        assert archive_current_run(memory_s3, BASE) == f"{BASE}/vote_archive_0"
+
+        assert not memory_s3.exists(f"{BASE}/raw_subsquare_data.json")
+        with memory_s3.open(f"{BASE}/vote_archive_0/raw_subsquare_data.json") as f:
+            assert json.load(f) == {"title": "t"}
+        assert memory_s3.exists(f"{BASE}/vote_archive_0/vote/manifest.json")
+
+        index = read_archive_index(memory_s3, BASE)
+        assert index["next_index"] == 1
+        assert index["archives"][0]["folder"] == "vote_archive_0"
+        assert index["archives"][0]["files"] == 2
+
+    def test_successive_archives_use_the_index(self, memory_s3):
+        for run in range(3):
+            write(memory_s3, f"{BASE}/content.md", f"run {run}")
+            archive_current_run(memory_s3, BASE)
+
+        assert read_archive_index(memory_s3, BASE)["next_index"] == 3
+        with memory_s3.open(f"{BASE}/vote_archive_2/content.md", "r") as f:
+            assert f.read() == "run 2"
+
+    def test_legacy_archives_without_index(self, memory_s3):
+        write(memory_s3, f"{BASE}/vote_archive_0/content.md")
+        write(memory_s3, f"{BASE}/vote_archive_1/content.md")
+        write(memory_s3, f"{BASE}/content.md", "new")
+
+        assert archive_current_run(memory_s3, BASE) == f"{BASE}/vote_archive_2"
+        assert memory_s3.exists(f"{BASE}/vote_archive_1/content.md")
+
+    def test_only_archives_left(self, memory_s3):
+        write(memory_s3, f"{BASE}/vote_archive_0/content.md")
+
+        assert archive_current_run(memory_s3, BASE) is None
+
+    def test_archive_folders_are_not_walked(self, memory_s3):
+        write(memory_s3, f"{BASE}/vote_archive_0/vote/manifest.json")
+        write(memory_s3, f"{BASE}/vote/manifest.json")
+        found = []
+        find = memory_s3.find
+
+        def tracking_find(path, *args, **kwargs):
+            found.append(path.rstrip("/").rsplit("/", 1)[-1])
+            return find(path, *args, **kwargs)
+
+        memory_s3.find = tracking_find
+        try:
+            assert archive_current_run(memory_s3, BASE) == f"{BASE}/vote_archive_1"
+        finally:
+            del memory_s3.find
+
+        assert found == ["vote"]
+        assert memory_s3.exists(f"{BASE}/vote_archive_1/vote/manifest.json")
+
+
+class TestNextArchiveSlot:
+    """Test finding the next free archive folder"""
+
+    def test_index_wins(self):
+        assert next_archive_slot({"next_index": 7, "archives": []}, ["vote_archive_0/a"]) == 7
+
+    def test_listing_fallback_ignores_other_names(self):
+        assert next_archive_slot(None, ["vote_archive_3/a", "vote_archive_x/b", "content.md"]) == 4
@@ -0,0 +1,71 @@
+import pytest
+import fsspec
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.backfill import (
+    backfill_ids,
+    checkpoint_path,
+    load_checkpoint,
+    save_checkpoint,
+    pending_ids,
+)
+
+
+@pytest.fixture
+def memory_s3():
+    fs = fsspec.filesystem("memory")
+    fs.store.clear()
+    yield fs
+    fs.store.clear()
+
+
+class TestBackfillIds:
+    """Test which proposals a backfill covers"""
+
+    def test_range_is_inclusive(self):
+        assert backfill_ids(start_id=3, end_id=6) == [3, 4, 5, 6]
+
+    def test_explicit_ids_are_sorted_and_deduplicated(self):
+        assert backfill_ids(proposal_ids=[9, 2, 9, 5]) == [2, 5, 9]
+
+    def test_explicit_ids_win_over_range(self):
+        assert backfill_ids(start_id=1, end_id=100, proposal_ids=[7]) == [7]
+
+    def test_missing_bounds_raise(self):
+        with pytest.raises(ValueError):
+            backfill_ids(start_id=3)
+
+    def test_reversed_range_raises(self):
+        with pytest.raises(ValueError):
+            backfill_ids(start_id=6, end_id=3)
+
+
+class TestCheckpoints:
+    """Test resuming a backfill from its S3 checkpoint"""
+
+    def test_path_depends_on_ids(self):
+        assert checkpoint_path("bucket", "paseo", [1, 2, 3]) != checkpoint_path("bucket", "paseo", [1, 3])
+        assert checkpoint_path("bucket", "paseo", [1, 2, 3]).startswith("bucket/backfills/paseo/1-3-")
+
+    def test_missing_checkpoint_is_empty(self, memory_s3):
+        assert load_checkpoint(memory_s3, "bucket/backfills/paseo/none.json") == {}
+
+    def test_round_trip(self, memory_s3):
+        path = checkpoint_path("bucket", "paseo", [1, 2])
+        results = {"1": {"status": "processed", "message": "ok"}}
+        save_checkpoint(memory_s3, path, "paseo", [1, 2], results)
+
+        assert load_checkpoint(memory_s3, path) == results
+
+    def test_pending_ids_retry_failures_only(self):
+        results = {
+            "1": {"status": "processed", "message": ""},
+            "2": {"status": "skipped", "message": ""},
+            "3": {"status": "failed", "message": ""},
+        }
+        assert pending_ids([1, 2, 3, 4], results) == [3, 4]
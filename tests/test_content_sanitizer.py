@@ -0,0 +1,79 @@
+import time
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.content_sanitizer import sanitize_content, TRUNCATION_MARKER
+from utils.proposal_augmentation import parse_proposal_data_with_units
+
+
+class TestSanitizeContent:
+    """Test the single-pass proposal content sanitizer"""
+
+    def test_strips_images_scripts_and_styles(self):
+        content = 'Before<IMG src="a.png" alt="x">after <script>alert("<img>")</script>end<style>p {}</style>.'
+        assert sanitize_content(content) == "Before after end ."
+
+    def test_strips_base64_payloads(self):
+        content = "See ![chart](data:image/png;base64,iVBORw0KGgo=) and [pdf](data:application/pdf;base64,JVBERi0=) here"
+        assert sanitize_content(content) == "See ![chart]() and [pdf]() here"
+
+    def test_keeps_other_markup(self):
+        content = '<p>Budget</p> <a href="https://example.com">link</a> <imgur>'
+        assert sanitize_content(content) == content
+
+    def test_collapses_whitespace(self):
+        content = "  Title \t here\r\n\r\n\r\n\r\n- item   one\n- item two  \n\n"
+        assert sanitize_content(content) == "Title here\n\n- item one\n- item two"
+
+    def test_whitespace_around_dropped_image_collapses(self):
+        assert sanitize_content("one \n\n<img src=x> \n\ntwo") == "one\n\ntwo"
+
+    def test_keeps_indentation_at_line_start(self):
+        content = "- budget\n    - 100 DOT   for audits\n\t- tabbed\n\n    code  block"
+        assert sanitize_content(content) == "- budget\n    - 100 DOT for audits\n\t- tabbed\n\n    code block"
+
+    def test_unterminated_img_is_kept_as_text(self):
+        content = "Intro text. <img src=x Then a long important paragraph about 5000 DOT budget."
+        assert sanitize_content(content) == content
+
+    def test_unterminated_script_is_kept_as_text(self):
+        assert sanitize_content("Use <script to inject? The budget is 100 DOT.") == "Use <script to inject? The budget is 100 DOT."
+
+    def test_tag_ends_before_next_tag(self):
+        assert sanitize_content("a <img src=x then <p>text</p>") == "a <img src=x then <p>text</p>"
+
+    def test_unclosed_script_drops_only_its_tag(self):
+        assert sanitize_content("a <script>alert(1) b") == "a alert(1) b"
+
+    def test_byte_budget(self):
+        sanitized = sanitize_content("é" * 100, max_bytes=51)
+        assert sanitized == "é" * 25 + TRUNCATION_MARKER
+
+    def test_empty(self):
+        assert sanitize_content("") == ""
+        assert sanitize_content(None) == ""
+
+    def test_large_inline_image_is_fast(self):
+        content = "intro " + '<img src="data:image/png;base64,' + "A" * 20_000_000 + '"> outro'
+        started = time.monotonic()
+        assert sanitize_content(content) == "intro outro"
+        assert time.monotonic() - started < 1
+
+    def test_malformed_tags_are_linear(self):
+        started = time.monotonic()
+        assert sanitize_content("x " + "<img " * 100_000, max_bytes=10**7).count("<img") == 100_000
+        assert sanitize_content("x " + "<script>" * 100_000) == "x"
+        assert time.monotonic() - started < 1
+
+
+class TestParseProposalContent:
+    """Test that parse_proposal_data_with_units hands over sanitized content"""
+
+    def test_content_sanitized(self):
+        proposal = {"title": "T", "content": "Spend <img src='data:image/png;base64,AAAA'>  now"}
+        parsed = parse_proposal_data_with_units(proposal, "polkadot")
+        assert parsed["content"] == "Spend now"
@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.credentials import CredentialsProvider, S3Config
+
+VALUES = {
+    "scaleway-bucket-name": "bucket",
+    "scaleway-s3-endpoint-url": "https://s3.example",
+    "scaleway-access-key-id": "read-key",
+    "scaleway-secret-access-key": "read-secret",
+    "scaleway-write-access-key-id": "write-key",
+    "scaleway-write-secret-access-key": "write-secret",
+    "polkadot-rpc-url": "wss://a.example, wss://b.example/",
+    "github-pat": "pat",
+}
+
+
+class FakeBlocks:
+    """Stands in for Secret/String.load, in sync or async mode, counting loads."""
+
+    def __init__(self, is_async: bool, delay: float = 0.0):
+        self.is_async = is_async
+        self.delay = delay
+        self.loads = []
+
+    def load(self, name):
+        self.loads.append(name)
+        block = SimpleNamespace(value=VALUES[name], get=lambda: VALUES[name])
+        if not self.is_async:
+            return block
+
+        async def load_async():
+            await asyncio.sleep(self.delay)
+            return block
+
+        return load_async()
+
+
+def patched(blocks):
+    return patch("utils.credentials.Secret.load", side_effect=blocks.load), patch(
+        "utils.credentials.String.load", side_effect=blocks.load
+    )
+
+
+class TestCredentialsProvider:
+    """Test the TTL-cached credentials provider"""
+
+    def test_s3_config(self):
+        blocks = FakeBlocks(is_async=False)
+        secret_patch, string_patch = patched(blocks)
+        with secret_patch, string_patch:
+            config = CredentialsProvider().s3_sync(write=True)
+
+        assert config == S3Config("bucket", "https://s3.example", "write-key", "write-secret")
+        assert "write-secret" not in repr(config)
+        assert config.as_dict()["s3_bucket"] == "bucket"
+
+    def test_blocks_are_cached(self):
+        blocks = FakeBlocks(is_async=False)
+        provider = CredentialsProvider()
+        secret_patch, string_patch = patched(blocks)
+        with secret_patch, string_patch:
+            provider.s3_sync()
+            provider.s3_sync(write=True)
+
+        # bucket and endpoint are shared by the read and write configs
+        assert sorted(blocks.loads) == sorted(
+            [
+                "scaleway-bucket-name",
+                "scaleway-s3-endpoint-url",
+                "scaleway-access-key-id",
+                "scaleway-secret-access-key",
+                "scaleway-write-access-key-id",
+                "scaleway-write-secret-access-key",
+            ]
+        )
+
+    def test_expired_blocks_are_reloaded(self):
+        blocks = FakeBlocks(is_async=False)
+        provider = CredentialsProvider(ttl_seconds=0)
+        secret_patch, string_patch = patched(blocks)
+        with secret_patch, string_patch:
+            provider.secret_sync("github-pat")
+            provider.secret_sync("github-pat")
+
+        assert blocks.loads == ["github-pat", "github-pat"]
+
+    def test_clear_forgets_values(self):
+        blocks = FakeBlocks(is_async=False)
+        provider = CredentialsProvider()
+        secret_patch, string_patch = patched(blocks)
+        with secret_patch, string_patch:
+            provider.secret_sync("github-pat")
+            provider.clear()
+            provider.secret_sync("github-pat")
+
+        assert blocks.loads == ["github-pat", "github-pat"]
+
+    def test_rpc_endpoints_are_parsed(self):
+        blocks = FakeBlocks(is_async=True)
+        secret_patch, string_patch = patched(blocks)
+        with secret_patch, string_patch:
+            rpc = asyncio.run(CredentialsProvider().rpc("polkadot"))
+
+        assert rpc.network == "polkadot"
+        assert rpc.urls == ["wss://a.example", "wss://b.example"]
+
+    def test_async_loads_are_concurrent(self):
+        blocks = FakeBlocks(is_async=True, delay=0.2)
+        secret_patch, string_patch = patched(blocks)
+
+        async def load():
+            loop = asyncio.get_running_loop()
+            started_at = loop.time()
+            config = await CredentialsProvider().s3()
+            return config, loop.time() - started_at
+
+        with secret_patch, string_patch:
+            config, elapsed = asyncio.run(load())
+
+        assert config.access_key == "read-key"
+        assert elapsed < 0.6
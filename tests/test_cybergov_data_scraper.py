@@ -0,0 +1,109 @@
+import pytest
+import logging
+import fsspec
+import threading
+import dspy
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import cybergov_data_scraper
+from utils import proposal_augmentation
+from cybergov_data_scraper import generate_prompt_content
+from utils.credentials import credentials
+
+S3_CREDS = {
+    "s3_bucket": "bucket",
+    "endpoint_url": "https://s3.example",
+    "access_key": "key",
+    "secret_key": "secret",
+}
+
+
+@pytest.fixture
+def memory_s3():
+    fs = fsspec.filesystem("memory")
+    fs.store.clear()
+    with patch.object(cybergov_data_scraper, "setup_s3_filesystem", return_value=fs):
+        yield fs
+    fs.store.clear()
+
+
+def fake_content_files(proposal_data, **_):
+    files = {"content.md": f"# {proposal_data['title']}"}
+    if proposal_data.get("digested"):
+        files["content_full.md"] = "full text"
+    return files
+
+
+@pytest.fixture(autouse=True)
+def mock_prefect():
+    with patch.object(cybergov_data_scraper, "get_run_logger", return_value=logging.getLogger("test_logger")), \
+         patch("utils.credentials.Secret.load", return_value=SimpleNamespace(get=lambda: "api-key")), \
+         patch.object(cybergov_data_scraper, "generate_content_files_for_magis", side_effect=fake_content_files):
+        credentials.clear()
+        yield
+    credentials.clear()
+
+
+class TestGeneratePromptContent:
+    """Test the in-memory handoff of the raw data to prompt generation"""
+
+    def test_uses_handed_over_data_without_reading_s3(self, memory_s3):
+        generate_prompt_content.fn("paseo", 42, proposal_data={"title": "In memory"}, s3_creds=S3_CREDS)
+
+        with memory_s3.open("bucket/proposals/paseo/42/content.md", "r") as f:
+            assert f.read() == "# In memory"
+        assert not memory_s3.exists("bucket/proposals/paseo/42/raw_subsquare_data.json")
+
+    def test_writes_full_content_of_digested_proposal(self, memory_s3):
+        generate_prompt_content.fn("paseo", 42, proposal_data={"title": "Long", "digested": True}, s3_creds=S3_CREDS)
+
+        assert memory_s3.cat("bucket/proposals/paseo/42/content.md") == b"# Long"
+        assert memory_s3.cat("bucket/proposals/paseo/42/content_full.md") == b"full text"
+
+    def test_falls_back_to_stored_data(self, memory_s3):
+        with memory_s3.open("bucket/proposals/paseo/42/raw_subsquare_data.json", "w") as f:
+            f.write('{"title": "From S3"}')
+
+        generate_prompt_content.fn("paseo", 42, s3_creds=S3_CREDS)
+
+        with memory_s3.open("bucket/proposals/paseo/42/content.md", "r") as f:
+            assert f.read() == "# From S3"
+
+    def test_missing_stored_data_raises(self, memory_s3):
+        with pytest.raises(FileNotFoundError):
+            generate_prompt_content.fn("paseo", 42, s3_creds=S3_CREDS)
+
+    def test_concurrent_calls_in_separate_threads(self, memory_s3):
+        """Backfills run prompt generation in worker threads, each with its own LM"""
+
+        def augment(proposal_data, logger, network):
+            return {"content.md": f"{proposal_data['title']} with {dspy.settings.lm.model_name}"}
+
+        errors = []
+
+        def run(proposal_id):
+            try:
+                generate_prompt_content.fn("paseo", proposal_id, proposal_data={"title": f"P{proposal_id}"}, s3_creds=S3_CREDS)
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(cybergov_data_scraper, "generate_content_files_for_magis", proposal_augmentation.generate_content_files_for_magis), \
+             patch.object(proposal_augmentation, "GeminiLM", side_effect=lambda model, api_key: SimpleNamespace(model_name=model)), \
+             patch.object(proposal_augmentation, "_augment", side_effect=augment):
+            threads = [threading.Thread(target=run, args=(proposal_id,)) for proposal_id in (1, 2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert errors == []
+        for proposal_id in (1, 2):
+            content = memory_s3.cat(f"bucket/proposals/paseo/{proposal_id}/content.md").decode()
+            assert content == f"P{proposal_id} with {proposal_augmentation.AUGMENTER_MODEL_ID}"
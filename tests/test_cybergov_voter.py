@@ -1,9 +1,8 @@
 import pytest
 import json
 import hashlib
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 from substrateinterface import Keypair
-import s3fs
 import logging
 
 import sys
@@ -33,6 +32,9 @@ from cybergov_voter import (
     get_remark_hash,
     VoteResult,
 )
+from utils.endpoints import reset_endpoint_pools
+from utils.credentials import credentials
+from utils.s3 import reset_s3_filesystems
 
 
 class TestVoterData:
@@ -102,11 +104,14 @@ class TestSetupS3Filesystem:
         secret_key = "test_secret_key"
         endpoint_url = "https://test.endpoint.com"
         
+        reset_s3_filesystems()
         with patch('src.cybergov_voter.s3fs.S3FileSystem') as mock_s3fs:
             mock_instance = Mock()
             mock_s3fs.return_value = mock_instance
             
             result = setup_s3_filesystem(access_key, secret_key, endpoint_url)
+            # Same credentials, same filesystem
+            assert setup_s3_filesystem(access_key, secret_key, endpoint_url) is result
             
             mock_s3fs.assert_called_once_with(
                 key=access_key,
@@ -114,8 +119,10 @@ class TestSetupS3Filesystem:
                 client_kwargs={"endpoint_url": endpoint_url},
                 asynchronous=False,
                 loop=None,
+                skip_instance_cache=True,
             )
             assert result == mock_instance
+        reset_s3_filesystems()
 
 
 class TestCreateVoteParameters:
@@ -370,6 +377,15 @@ class TestShouldWeVote:
 
 class TestCreateAndSignVoteTx:
     """Test transaction creation and signing"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_endpoint_pools(self):
+        # RPC connections and loaded secrets are kept per process, don't reuse another test's mock
+        reset_endpoint_pools()
+        credentials.clear()
+        yield
+        reset_endpoint_pools()
+        credentials.clear()
     
     def test_create_and_sign_vote_tx_aye(self):
         """Test creating and signing an Aye vote transaction"""
@@ -407,10 +423,10 @@ class TestCreateAndSignVoteTx:
         mock_extrinsic.data = "0x1234567890abcdef"
         mock_substrate.create_signed_extrinsic.return_value = mock_extrinsic
         
-        with patch('cybergov_voter.Secret') as mock_secret_class:
+        with patch('utils.credentials.Secret') as mock_secret_class:
             mock_secret_class.load.side_effect = [mock_rpc_secret, mock_mnemonic_secret]
             
-            with patch('cybergov_voter.SubstrateInterface', return_value=mock_substrate):
+            with patch('utils.endpoints.SubstrateInterface', return_value=mock_substrate):
                 with patch('cybergov_voter.Keypair.create_from_mnemonic', return_value=test_keypair):
                     with patch('cybergov_voter.create_vote_parameters') as mock_create_params:
                         mock_vote_params = {"Standard": {"vote": {"aye": True, "conviction": 1}, "balance": 10000000000}}
@@ -453,10 +469,10 @@ class TestCreateAndSignVoteTx:
         mock_extrinsic.data = "0xabcdef1234567890"
         mock_substrate.create_signed_extrinsic.return_value = mock_extrinsic
         
-        with patch('cybergov_voter.Secret') as mock_secret_class:
+        with patch('utils.credentials.Secret') as mock_secret_class:
             mock_secret_class.load.side_effect = [mock_rpc_secret, mock_mnemonic_secret]
             
-            with patch('cybergov_voter.SubstrateInterface', return_value=mock_substrate):
+            with patch('utils.endpoints.SubstrateInterface', return_value=mock_substrate):
                 with patch('cybergov_voter.Keypair.create_from_mnemonic', return_value=test_keypair):
                     with patch('cybergov_voter.create_vote_parameters') as mock_create_params:
                         mock_vote_params = {"SplitAbstain": {"aye": 0, "nay": 0, "abstain": 1000000000000}}
@@ -484,10 +500,10 @@ class TestCreateAndSignVoteTx:
         mock_substrate.__enter__ = Mock(return_value=mock_substrate)
         mock_substrate.__exit__ = Mock(return_value=None)
         
-        with patch('cybergov_voter.Secret') as mock_secret_class:
+        with patch('utils.credentials.Secret') as mock_secret_class:
             mock_secret_class.load.side_effect = [mock_rpc_secret, mock_mnemonic_secret]
             
-            with patch('cybergov_voter.SubstrateInterface', return_value=mock_substrate):
+            with patch('utils.endpoints.SubstrateInterface', return_value=mock_substrate):
                 with pytest.raises(ValueError):
                     create_and_sign_vote_tx.fn(
                         proposal_id=100,
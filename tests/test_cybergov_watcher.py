@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import cybergov_watcher
+from cybergov_watcher import subscribe_to_referendum_count, cybergov_referendum_watcher_flow
+
+
+def make_substrate(counts_by_block, initial_count):
+    """Fake SubstrateInterface replaying finalized heads with the given referendum counts."""
+    substrate = MagicMock()
+    substrate.__enter__.return_value = substrate
+    substrate.__exit__.return_value = False
+    substrate.get_block_hash.side_effect = lambda number: f"0x{number}"
+
+    def query(module, storage, block_hash=None):
+        if block_hash is None:
+            return SimpleNamespace(value=initial_count)
+        return SimpleNamespace(value=counts_by_block[int(block_hash[2:])])
+
+    def subscribe(handler, finalized_only):
+        assert finalized_only
+        for update_nr, number in enumerate(sorted(counts_by_block)):
+            result = handler({"header": {"number": number}}, update_nr, "sub")
+            if result is not None:
+                return result
+
+    substrate.query.side_effect = query
+    substrate.subscribe_block_headers.side_effect = subscribe
+    return substrate
+
+
+class TestSubscribeToReferendumCount:
+    """Test new referendum detection from finalized heads"""
+
+    def test_reports_each_new_referendum_once(self):
+        substrate = make_substrate({1: 10, 2: 10, 3: 12, 4: 13}, initial_count=10)
+        seen = []
+
+        with patch("cybergov_watcher.SubstrateInterface", return_value=substrate):
+            subscribe_to_referendum_count("wss://rpc", seen.append, lambda: False)
+
+        assert seen == [[10, 11], [12]]
+
+    def test_stops_when_asked(self):
+        substrate = make_substrate({1: 11, 2: 12}, initial_count=10)
+        seen = []
+
+        with patch("cybergov_watcher.SubstrateInterface", return_value=substrate):
+            subscribe_to_referendum_count("wss://rpc", seen.append, lambda: bool(seen))
+
+        assert seen == [[10]]
+
+    def test_reports_referenda_missed_since_start_count(self):
+        substrate = make_substrate({1: 12, 2: 13}, initial_count=12)
+        seen = []
+        started_from = []
+
+        with patch("cybergov_watcher.SubstrateInterface", return_value=substrate):
+            subscribe_to_referendum_count(
+                "wss://rpc", seen.append, lambda: False, start_count=10, on_subscribed=started_from.append
+            )
+
+        assert seen == [[10, 11], [12]]
+        assert started_from == [12]
+
+
+def run_watcher_once(lease_acquired):
+    """Runs the watcher flow for a few milliseconds with a subscription that ends right away."""
+    s3_config = SimpleNamespace(bucket="bucket", endpoint_url="https://s3", access_key="a", secret_key="s")
+    fake_credentials = MagicMock()
+    fake_credentials.s3 = AsyncMock(return_value=s3_config)
+    fake_credentials.rpc = AsyncMock(return_value=SimpleNamespace(urls=["wss://rpc"]))
+
+    def subscribe(rpc_url, on_new_ids, should_stop, start_count=None, on_subscribed=None):
+        on_subscribed(10)
+
+    dispatch = AsyncMock(return_value={"status": "ok"})
+    release = AsyncMock()
+    with patch.object(cybergov_watcher, "credentials", fake_credentials), \
+         patch.object(cybergov_watcher, "get_run_logger", return_value=logging.getLogger("test_logger")), \
+         patch.object(cybergov_watcher, "s3_filesystem"), \
+         patch.object(cybergov_watcher, "subscribe_to_referendum_count", side_effect=subscribe), \
+         patch.object(cybergov_watcher, "acquire_network_lease", AsyncMock(return_value=lease_acquired)), \
+         patch.object(cybergov_watcher, "release_network_lease", release), \
+         patch.object(cybergov_watcher, "dispatch_network", dispatch):
+        asyncio.run(cybergov_referendum_watcher_flow.fn(network="paseo", max_runtime_minutes=0.0005))
+    return dispatch, release
+
+
+class TestWatcherCatchUp:
+    """Test the catch-up run after each (re)connection"""
+
+    def test_catch_up_runs_under_the_lease(self):
+        dispatch, release = run_watcher_once(lease_acquired=True)
+
+        assert dispatch.await_count >= 1
+        assert release.await_count == dispatch.await_count
+
+    def test_catch_up_is_skipped_when_the_lease_is_held(self):
+        dispatch, release = run_watcher_once(lease_acquired=False)
+
+        dispatch.assert_not_awaited()
+        release.assert_not_awaited()
@@ -0,0 +1,173 @@
+import pytest
+import httpx
+from unittest.mock import patch, MagicMock
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils import endpoints
+from utils.endpoints import (
+    EndpointPool,
+    parse_endpoint_urls,
+    sidecar_request,
+    run_with_substrate,
+    reset_endpoint_pools,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_endpoint_pools():
+    reset_endpoint_pools()
+    yield
+    reset_endpoint_pools()
+
+
+def mock_transport_client(handler):
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+class TestEndpointPool:
+    """Test latency tracking and health ranking"""
+
+    def test_parse_endpoint_urls(self):
+        assert parse_endpoint_urls("https://a.io/, https://b.io") == ["https://a.io", "https://b.io"]
+        assert parse_endpoint_urls("https://a.io") == ["https://a.io"]
+
+    def test_fastest_first(self):
+        pool = EndpointPool(["https://a", "https://b"])
+        pool.record_success("https://a", 0.5)
+        pool.record_success("https://b", 0.1)
+        assert pool.ranked() == ["https://b", "https://a"]
+
+    def test_ewma_smooths_latency(self):
+        pool = EndpointPool(["https://a"], alpha=0.5)
+        pool.record_success("https://a", 1.0)
+        pool.record_success("https://a", 0.0)
+        assert pool.latency["https://a"] == 0.5
+
+    def test_failed_endpoint_goes_last(self):
+        pool = EndpointPool(["https://a", "https://b"])
+        pool.record_success("https://a", 0.1)
+        pool.record_success("https://b", 0.5)
+        pool.record_failure("https://a")
+        assert pool.ranked() == ["https://b", "https://a"]
+
+
+class TestSidecarRequest:
+    """Test sidecar failover within one call"""
+
+    def test_fails_over_on_server_error(self):
+        def handler(request):
+            if request.url.host == "down":
+                return httpx.Response(503)
+            return httpx.Response(200, json={"value": "42"})
+
+        client = mock_transport_client(handler)
+        with patch.object(endpoints, "_sidecar_client", return_value=client):
+            response = sidecar_request("paseo", ["https://down", "https://up"], "GET", "/count")
+            assert response.json() == {"value": "42"}
+            # The failed node is now ranked behind the healthy one
+            assert endpoints.endpoint_pool("sidecar", "paseo", ["https://down", "https://up"]).ranked()[0] == "https://up"
+
+    def test_client_errors_are_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.host)
+            return httpx.Response(400)
+
+        client = mock_transport_client(handler)
+        with patch.object(endpoints, "_sidecar_client", return_value=client):
+            with pytest.raises(httpx.HTTPStatusError):
+                sidecar_request("paseo", ["https://a", "https://b"], "POST", "/transaction", json={})
+        assert calls == ["a"]
+
+    def test_non_idempotent_request_is_not_resent_after_read_timeout(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.host)
+            raise httpx.ReadTimeout("no answer", request=request)
+
+        client = mock_transport_client(handler)
+        with patch.object(endpoints, "_sidecar_client", return_value=client):
+            with pytest.raises(httpx.ReadTimeout):
+                sidecar_request(
+                    "paseo", ["https://a", "https://b"], "POST", "/transaction", idempotent=False, json={}
+                )
+        # The first node may have accepted the extrinsic, it must not reach a second one
+        assert calls == ["a"]
+
+    def test_non_idempotent_request_fails_over_when_not_connected(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.host)
+            if request.url.host == "a":
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"hash": "0x1"})
+
+        client = mock_transport_client(handler)
+        with patch.object(endpoints, "_sidecar_client", return_value=client):
+            response = sidecar_request(
+                "paseo", ["https://a", "https://b"], "POST", "/transaction", idempotent=False, json={}
+            )
+        assert response.json() == {"hash": "0x1"}
+        assert calls == ["a", "b"]
+
+    def test_all_down_raises_last_error(self):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        client = mock_transport_client(handler)
+        with patch.object(endpoints, "_sidecar_client", return_value=client):
+            with pytest.raises(httpx.ConnectError):
+                sidecar_request("paseo", ["https://a", "https://b"], "GET", "/count")
+
+
+class TestRunWithSubstrate:
+    """Test RPC failover and connection reuse"""
+
+    def test_fails_over_and_reuses_connection(self):
+        def connect(url):
+            if url == "wss://down":
+                raise ConnectionRefusedError("refused")
+            return MagicMock(url=url)
+
+        with patch.object(endpoints, "SubstrateInterface", side_effect=connect) as factory:
+            first = run_with_substrate("paseo", ["wss://down", "wss://up"], lambda substrate: substrate.url)
+            second = run_with_substrate("paseo", ["wss://down", "wss://up"], lambda substrate: substrate.url)
+
+        assert first == second == "wss://up"
+        # One failed connect, one kept-open connection
+        assert factory.call_count == 2
+
+    def test_stale_connection_is_reopened_on_the_same_node(self):
+        stale = MagicMock(url="wss://a", stale=True)
+        fresh = MagicMock(url="wss://a", stale=False)
+
+        def query(substrate):
+            if substrate.stale:
+                raise ConnectionResetError("idle websocket closed")
+            return substrate.url
+
+        with patch.object(endpoints, "SubstrateInterface", side_effect=[stale, fresh]) as factory:
+            run_with_substrate("paseo", ["wss://a"], lambda substrate: None)
+            result = run_with_substrate("paseo", ["wss://a"], query)
+
+        assert result == "wss://a"
+        assert factory.call_count == 2
+        stale.close.assert_called_once()
+        # The node answered on the new connection, it isn't marked down
+        assert endpoints.endpoint_pool("rpc", "paseo", ["wss://a"]).down_until["wss://a"] == 0.0
+
+    def test_other_errors_propagate(self):
+        def fail(substrate):
+            raise ValueError("bad call")
+
+        with patch.object(endpoints, "SubstrateInterface", return_value=MagicMock()):
+            with pytest.raises(ValueError):
+                run_with_substrate("paseo", ["wss://a", "wss://b"], fail)
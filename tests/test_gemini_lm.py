@@ -0,0 +1,128 @@
+import pytest
+import asyncio
+import dspy
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils import gemini_lm, llm_cache
+from utils.gemini_lm import GeminiLM, gemini_client
+from utils.llm_cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("CYBERGOV_LLM_CACHE_BYPASS", raising=False)
+    response_cache = ResponseCache(directory=str(tmp_path / "llm"))
+    monkeypatch.setattr(llm_cache, "_response_cache", response_cache)
+    yield response_cache
+    response_cache.cache.close()
+
+
+def gemini_response(text, usage_metadata=None):
+    return SimpleNamespace(text=text, usage_metadata=usage_metadata)
+
+
+class FakeModels:
+    def __init__(self, response, delay=0.0):
+        self.response = response
+        self.delay = delay
+        self.configs = []
+
+    def generate_content(self, model, contents, config=None):
+        self.configs.append(config)
+        return self.response
+
+    async def agenerate_content(self, model, contents, config=None):
+        self.configs.append(config)
+        await asyncio.sleep(self.delay)
+        return self.response
+
+
+def fake_client(response, delay=0.0):
+    models = FakeModels(response, delay)
+    aio = SimpleNamespace(models=SimpleNamespace(generate_content=models.agenerate_content))
+    return SimpleNamespace(models=models, aio=aio)
+
+
+def make_lm(response, delay=0.0, timeout=30):
+    with patch.object(gemini_lm, "gemini_client", return_value=fake_client(response, delay)):
+        return GeminiLM(model="gemini-2.5-flash", api_key="key", timeout=timeout)
+
+
+class TestGeminiClient:
+    """Test that GeminiLMs share one client per API key"""
+
+    def test_client_shared_per_key(self, monkeypatch):
+        monkeypatch.setattr(gemini_lm, "_clients", {})
+        with patch.object(gemini_lm.genai, "Client", side_effect=lambda api_key: object()) as client:
+            assert gemini_client("a") is gemini_client("a")
+            assert gemini_client("a") is not gemini_client("b")
+        assert client.call_count == 2
+
+
+class TestGeminiLMUsage:
+    """Test token usage taken from Gemini's usage_metadata"""
+
+    def test_usage_metadata_counts(self):
+        usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=30, thoughts_token_count=50)
+        lm = make_lm(gemini_response("answer", usage))
+
+        response = lm.forward(prompt="question")
+
+        assert dict(response.usage) == {"prompt_tokens": 120, "completion_tokens": 80, "total_tokens": 200}
+
+    def test_estimate_without_usage_metadata(self):
+        lm = make_lm(gemini_response("a" * 40))
+        response = lm.forward(prompt="q" * 80)
+        assert (response.usage.prompt_tokens, response.usage.completion_tokens) == (20, 10)
+
+    def test_usage_tracked_for_real_calls_only(self):
+        usage = SimpleNamespace(prompt_token_count=10, candidates_token_count=5, thoughts_token_count=None)
+        lm = make_lm(gemini_response("answer", usage))
+
+        with dspy.context(usage_tracker=dspy.utils.usage_tracker.UsageTracker()):
+            lm.forward(prompt="question")
+            lm.forward(prompt="question")
+            totals = dspy.settings.usage_tracker.get_total_tokens()
+
+        assert totals["gemini-2.5-flash"]["prompt_tokens"] == 10
+        assert totals["gemini-2.5-flash"]["completion_tokens"] == 5
+
+
+class TestGeminiLMAsync:
+    """Test the async path: timeouts, cancellation and the shared cache"""
+
+    def test_aforward_returns_response(self):
+        lm = make_lm(gemini_response("async answer"))
+        response = asyncio.run(lm.aforward(prompt="question"))
+        assert response.choices[0].message.content == "async answer"
+
+    def test_per_call_timeout(self):
+        lm = make_lm(gemini_response("late"), delay=1.0)
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(lm.aforward(prompt="question", timeout=0.05))
+        assert lm.client.models.configs[-1].http_options.timeout == 50
+
+    def test_cancellation(self):
+        lm = make_lm(gemini_response("never"), delay=5.0)
+
+        async def run():
+            call = asyncio.create_task(lm.aforward(prompt="question"))
+            await asyncio.sleep(0.05)
+            call.cancel()
+            await call
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(run())
+
+    def test_sync_and_async_share_cache(self):
+        lm = make_lm(gemini_response("answer"))
+        lm.forward(prompt="question")
+        asyncio.run(lm.aforward(prompt="question"))
+        assert len(lm.client.models.configs) == 1
@@ -0,0 +1,42 @@
+import asyncio
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.http_client import get_http_client, close_http_client
+
+
+class TestSharedHttpClient:
+    """Test the process-wide async HTTP client"""
+
+    def test_same_client_within_a_loop(self):
+        async def fetch_twice():
+            first, second = get_http_client(), get_http_client()
+            await close_http_client()
+            return first, second
+
+        first, second = asyncio.run(fetch_twice())
+        assert first is second
+
+    def test_one_client_per_loop(self):
+        async def grab():
+            client = get_http_client()
+            await close_http_client()
+            return client
+
+        assert asyncio.run(grab()) is not asyncio.run(grab())
+
+    def test_closed_client_is_replaced(self):
+        async def reopen():
+            first = get_http_client()
+            await close_http_client()
+            second = get_http_client()
+            await close_http_client()
+            return first, second
+
+        first, second = asyncio.run(reopen())
+        assert first.is_closed
+        assert first is not second
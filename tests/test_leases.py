@@ -0,0 +1,79 @@
+import pytest
+import asyncio
+import datetime
+import json
+import logging
+import fsspec
+from unittest.mock import patch, MagicMock
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.leases import lease_path, read_lease, try_acquire_lease, release_lease
+from cybergov_dispatcher import acquire_network_lease
+
+
+@pytest.fixture
+def memory_s3():
+    fs = fsspec.filesystem("memory")
+    fs.store.clear()
+    yield fs
+    fs.store.clear()
+
+
+class TestLeases:
+    """Test expiring dispatcher leases"""
+
+    def test_first_worker_acquires(self, memory_s3):
+        assert try_acquire_lease(memory_s3, "bucket", "paseo", "worker-a", 60)
+        assert read_lease(memory_s3, "bucket", "paseo")["owner"] == "worker-a"
+
+    def test_live_lease_blocks_other_workers(self, memory_s3):
+        assert try_acquire_lease(memory_s3, "bucket", "paseo", "worker-a", 60)
+        assert not try_acquire_lease(memory_s3, "bucket", "paseo", "worker-b", 60)
+
+    def test_owner_can_renew(self, memory_s3):
+        assert try_acquire_lease(memory_s3, "bucket", "paseo", "worker-a", 60)
+        assert try_acquire_lease(memory_s3, "bucket", "paseo", "worker-a", 60)
+
+    def test_expired_lease_is_taken_over(self, memory_s3):
+        expired = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+        with memory_s3.open(lease_path("bucket", "paseo"), "w") as f:
+            json.dump({"owner": "dead-worker", "expires_at": expired.isoformat()}, f)
+
+        assert try_acquire_lease(memory_s3, "bucket", "paseo", "worker-b", 60)
+        assert read_lease(memory_s3, "bucket", "paseo")["owner"] == "worker-b"
+
+    def test_networks_are_leased_independently(self, memory_s3):
+        assert try_acquire_lease(memory_s3, "bucket", "paseo", "worker-a", 60)
+        assert try_acquire_lease(memory_s3, "bucket", "kusama", "worker-b", 60)
+
+    def test_only_owner_releases(self, memory_s3):
+        try_acquire_lease(memory_s3, "bucket", "paseo", "worker-a", 60)
+
+        assert not release_lease(memory_s3, "bucket", "paseo", "worker-b")
+        assert release_lease(memory_s3, "bucket", "paseo", "worker-a")
+        assert read_lease(memory_s3, "bucket", "paseo") is None
+
+
+class TestAcquireNetworkLease:
+    """Test the dispatcher's lease claim"""
+
+    def test_unreachable_lease_store_fails_closed(self):
+        s3 = MagicMock()
+        s3.open.side_effect = OSError("endpoint unreachable")
+
+        with patch("cybergov_dispatcher.get_run_logger", return_value=logging.getLogger("test_logger")):
+            acquired = asyncio.run(acquire_network_lease(s3, "bucket", "paseo", "worker-a"))
+
+        assert acquired is False
+
+    def test_free_lease_is_acquired(self, memory_s3):
+        with patch("cybergov_dispatcher.get_run_logger", return_value=logging.getLogger("test_logger")), \
+             patch("cybergov_dispatcher.DISPATCHER_LEASE_SETTLE_SECONDS", 0):
+            acquired = asyncio.run(acquire_network_lease(memory_s3, "bucket", "paseo", "worker-a"))
+
+        assert acquired is True
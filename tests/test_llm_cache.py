@@ -0,0 +1,115 @@
+import pytest
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils import llm_cache
+from utils.llm_cache import ResponseCache, response_key
+from utils.gemini_lm import GeminiLM, FakeResponse
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("CYBERGOV_LLM_CACHE_BYPASS", raising=False)
+    response_cache = ResponseCache(directory=str(tmp_path / "llm"))
+    monkeypatch.setattr(llm_cache, "_response_cache", response_cache)
+    yield response_cache
+    response_cache.cache.close()
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        return type("GeminiResponse", (), {"text": f"answer to {contents}"})()
+
+
+def gemini_lm():
+    lm = GeminiLM.__new__(GeminiLM)
+    lm.model_name = "gemini-2.5-flash"
+    lm.kwargs = {"temperature": 0.0}
+    lm.timeout = 30
+    lm.client = type("Client", (), {"models": FakeModels()})()
+    return lm
+
+
+class TestResponseKey:
+    """Test what a cached response is keyed on"""
+
+    def test_stable_across_param_order(self):
+        messages = [{"role": "user", "content": "hi"}]
+        assert response_key("m", {"a": 1, "b": 2}, messages, None) == response_key("m", {"b": 2, "a": 1}, messages, None)
+
+    def test_model_params_and_payload_change_key(self):
+        base = response_key("m", {"temperature": 0.0}, None, "hi")
+        assert response_key("other", {"temperature": 0.0}, None, "hi") != base
+        assert response_key("m", {"temperature": 0.7}, None, "hi") != base
+        assert response_key("m", {"temperature": 0.0}, None, "hello") != base
+
+    def test_credentials_are_not_part_of_the_key(self):
+        base = response_key("m", {"temperature": 0.0}, None, "hi")
+        rotated = {"temperature": 0.0, "api_key": "sk-new", "api_base": "https://openrouter.ai/api/v1"}
+        assert response_key("m", rotated, None, "hi") == base
+
+
+class TestResponseCache:
+    """Test hits, misses, bypass and expiry"""
+
+    def test_second_call_is_a_hit(self, cache):
+        fetches = []
+        fetch = lambda: fetches.append(1) or "response"
+
+        assert cache.call("k", fetch) == "response"
+        assert cache.call("k", fetch) == "response"
+        assert len(fetches) == 1
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_survives_reopening(self, tmp_path):
+        first = ResponseCache(directory=str(tmp_path / "llm"))
+        first.call("k", lambda: "response")
+        first.cache.close()
+
+        second = ResponseCache(directory=str(tmp_path / "llm"))
+        assert second.call("k", lambda: pytest.fail("should be cached")) == "response"
+        second.cache.close()
+
+    def test_bypass_refreshes_entry(self, cache, monkeypatch):
+        cache.call("k", lambda: "old")
+        assert cache.call("k", lambda: "new", bypass=True) == "new"
+        monkeypatch.setenv("CYBERGOV_LLM_CACHE_BYPASS", "1")
+        assert cache.call("k", lambda: "newer") == "newer"
+        monkeypatch.delenv("CYBERGOV_LLM_CACHE_BYPASS")
+        assert cache.call("k", lambda: pytest.fail("should be cached")) == "newer"
+        assert cache.stats()["bypassed"] == 2
+
+    def test_expired_entry_is_fetched_again(self, cache):
+        cache.ttl_seconds = -1
+        cache.call("k", lambda: "old")
+        assert cache.call("k", lambda: "new") == "new"
+
+
+class TestGeminiLMCache:
+    """Test GeminiLM answering repeated prompts from the cache"""
+
+    def test_repeated_prompt_calls_model_once(self, cache):
+        lm = gemini_lm()
+        messages = [{"role": "system", "content": "be brief"}, {"role": "user", "content": "why?"}]
+
+        first = lm.forward(messages=messages)
+        second = lm.forward(messages=messages)
+
+        assert lm.client.models.calls == 1
+        assert isinstance(second, FakeResponse)
+        assert second.choices[0].message.content == first.choices[0].message.content == "answer to why?"
+
+    def test_cache_false_calls_model(self, cache):
+        lm = gemini_lm()
+        lm.forward(prompt="why?")
+        lm.forward(prompt="why?", cache=False)
+        assert lm.client.models.calls == 2
@@ -0,0 +1,86 @@
+import dspy
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.program_store import load_or_compile, program_key, program_path
+
+
+class EchoProgram(dspy.Module):
+    def __init__(self):
+        super().__init__()
+        self.predict = dspy.Predict("question -> answer")
+
+    def forward(self, question):
+        return self.predict(question=question)
+
+
+TRAINSET = [dspy.Example(question="2+2?", answer="4").with_inputs("question")]
+
+
+class FakeCompiler:
+    """Stands in for BootstrapFewShot: attaches a demo and counts compiles."""
+
+    def __init__(self):
+        self.compiles = 0
+
+    def __call__(self):
+        self.compiles += 1
+        program = EchoProgram()
+        program.predict.demos = [dspy.Example(question="1+1?", answer="2")]
+        return program
+
+
+class TestProgramKey:
+    """Test what invalidates a compiled program"""
+
+    def test_stable(self):
+        assert program_key("model-a", [EchoProgram], TRAINSET) == program_key("model-a", [EchoProgram], TRAINSET)
+
+    def test_model_changes_key(self):
+        assert program_key("model-a", [EchoProgram], TRAINSET) != program_key("model-b", [EchoProgram], TRAINSET)
+
+    def test_trainset_changes_key(self):
+        other = [dspy.Example(question="2+2?", answer="5").with_inputs("question")]
+        assert program_key("model-a", [EchoProgram], TRAINSET) != program_key("model-a", [EchoProgram], other)
+
+    def test_sources_and_config_change_key(self):
+        base = program_key("model-a", [EchoProgram], TRAINSET)
+        assert base != program_key("model-a", [EchoProgram, FakeCompiler], TRAINSET)
+        assert base != program_key("model-a", [EchoProgram], TRAINSET, {"max_bootstrapped_demos": 2})
+
+
+class TestLoadOrCompile:
+    """Test reusing stored compiled programs"""
+
+    def test_compiles_once_then_loads(self, tmp_path):
+        compiler = FakeCompiler()
+        key = program_key("model-a", [EchoProgram], TRAINSET)
+
+        first = load_or_compile("echo", key, EchoProgram, compiler, store_dir=str(tmp_path))
+        second = load_or_compile("echo", key, EchoProgram, compiler, store_dir=str(tmp_path))
+
+        assert compiler.compiles == 1
+        assert program_path("echo", key, str(tmp_path)).exists()
+        assert len(second.predict.demos) == len(first.predict.demos) == 1
+
+    def test_new_key_recompiles(self, tmp_path):
+        compiler = FakeCompiler()
+        load_or_compile("echo", program_key("model-a", [EchoProgram], TRAINSET), EchoProgram, compiler, store_dir=str(tmp_path))
+        load_or_compile("echo", program_key("model-b", [EchoProgram], TRAINSET), EchoProgram, compiler, store_dir=str(tmp_path))
+
+        assert compiler.compiles == 2
+
+    def test_corrupt_store_recompiles(self, tmp_path):
+        compiler = FakeCompiler()
+        key = program_key("model-a", [EchoProgram], TRAINSET)
+        path = program_path("echo", key, str(tmp_path))
+        path.write_text("not json")
+
+        program = load_or_compile("echo", key, EchoProgram, compiler, store_dir=str(tmp_path))
+
+        assert compiler.compiles == 1
+        assert len(program.predict.demos) == 1
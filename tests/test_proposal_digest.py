@@ -0,0 +1,117 @@
+import logging
+import threading
+import dspy
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.gemini_lm import FakeResponse
+from utils.proposal_digest import (
+    CONTENT_FULL_FILE,
+    TRUNCATION_WARNING,
+    build_digest,
+    estimate_tokens,
+    split_sections,
+    truncate_to_tokens,
+)
+
+logger = logging.getLogger("test_logger")
+
+
+class SummaryLM(dspy.LM):
+    """Answers each section with its first line; fails on sections containing FAIL."""
+
+    def __init__(self):
+        super().__init__(model="summary-lm", cache=False)
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def forward(self, prompt=None, messages=None, **kwargs):
+        with self.lock:
+            self.threads.add(threading.get_ident())
+        user = messages[-1]["content"]
+        section = user.split("[[ ## section ## ]]", 1)[1].split("[[ ## max_words ## ]]", 1)[0].strip()
+        if "FAIL" in section:
+            raise RuntimeError("model error")
+        summary = "Summary: " + section.splitlines()[0]
+        return FakeResponse(f"[[ ## summary ## ]]\n{summary}\n\n[[ ## completed ## ]]")
+
+
+def long_proposal(sections=6, paragraphs=40):
+    return "\n\n".join(
+        f"## Part {n}\n\n" + "\n\n".join(f"Paragraph {p} of part {n} explains the plan in detail." * 3 for p in range(paragraphs))
+        for n in range(1, sections + 1)
+    )
+
+
+class TestTruncateToTokens:
+    """Test the token-budgeted cut"""
+
+    def test_short_text_unchanged(self):
+        assert truncate_to_tokens("Short text.", 100) == "Short text."
+
+    def test_cuts_at_sentence_end(self):
+        text = "First sentence here. " * 20
+        cut = truncate_to_tokens(text, 30)
+        assert estimate_tokens(cut) <= 30
+        assert cut.endswith("here.")
+
+    def test_run_on_text_cut_at_word(self):
+        cut = truncate_to_tokens("word " * 100, 10)
+        assert cut.endswith("word")
+        assert estimate_tokens(cut) <= 10
+
+
+class TestSplitSections:
+    """Test semantic chunking of long content"""
+
+    def test_chunks_within_budget_and_lossless(self):
+        content = long_proposal()
+        sections = split_sections(content, max_tokens=1_000)
+
+        assert all(estimate_tokens(section.text) <= 1_000 for section in sections)
+        assert "".join(section.text for section in sections).replace("\n", "") == content.replace("\n", "")
+        assert [section.anchor for section in sections] == [f"§{n}" for n in range(1, len(sections) + 1)]
+
+    def test_headings_open_sections(self):
+        sections = split_sections("# Intro\n\nHello.\n\n## Budget\n\n1000 DOT.", max_tokens=5)
+        assert [section.heading for section in sections] == ["Intro", "Budget"]
+
+    def test_html_headings(self):
+        sections = split_sections("<h2>Team</h2><p>" + "x" * 40 + "</p><h2>Costs</h2><p>10 DOT</p>", max_tokens=20)
+        assert sections[0].heading == "Team"
+        assert sections[-1].heading == "Costs"
+
+    def test_unbroken_text_is_hard_cut(self):
+        sections = split_sections("a" * 10_000, max_tokens=500)
+        assert len(sections) == 5
+
+
+class TestBuildDigest:
+    """Test the map-reduce digest"""
+
+    def test_digest_is_bounded_and_anchored(self):
+        content = long_proposal()
+        lm = SummaryLM()
+        with dspy.context(lm=lm):
+            digest = build_digest("Big proposal", content, logger, chunk_tokens=1_000, digest_tokens=600, max_concurrency=4)
+
+        assert digest.text.startswith(f"[{TRUNCATION_WARNING}")
+        assert CONTENT_FULL_FILE in digest.text
+        assert estimate_tokens(digest.text) < 600 + 100 * len(digest.sections) // 2
+        for section in digest.sections:
+            assert f"### {section.anchor} " in digest.text
+            assert section.text in digest.full_text
+        assert "Summary: ## Part 1" in digest.text
+        assert len(lm.threads) > 1
+
+    def test_failed_section_falls_back_to_its_text(self):
+        content = "## Fine\n\n" + "ok. " * 300 + "\n\n## Broken\n\nFAIL " + "x " * 600
+        with dspy.context(lm=SummaryLM()):
+            digest = build_digest("Proposal", content, logger, chunk_tokens=400, digest_tokens=200)
+
+        assert "Summary: ## Fine" in digest.text
+        assert "FAIL x x" in digest.text
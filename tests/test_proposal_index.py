@@ -0,0 +1,204 @@
+import pytest
+import fsspec
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.proposal_index import (
+    Bitmap,
+    ProposalIndex,
+    load_proposal_index,
+    save_proposal_index,
+    build_proposal_index_from_listing,
+    record_stage_result,
+    record_stage_results,
+    load_current_proposal_index,
+    compact_proposal_index,
+    list_index_markers,
+    parse_marker_name,
+)
+
+
+@pytest.fixture
+def memory_s3():
+    """In-memory filesystem standing in for S3."""
+    fs = fsspec.filesystem("memory")
+    fs.store.clear()
+    fs.pseudo_dirs.clear()
+    fs.pseudo_dirs.append("")
+    yield fs
+    fs.store.clear()
+
+
+class TestBitmap:
+    """Test the bitset used by the proposal index"""
+
+    def test_add_discard_contains(self):
+        bitmap = Bitmap()
+        bitmap.add(3)
+        bitmap.add(1790)
+
+        assert 3 in bitmap
+        assert 1790 in bitmap
+        assert 4 not in bitmap
+        assert 100000 not in bitmap
+
+        bitmap.discard(3)
+        assert 3 not in bitmap
+        assert bitmap.ids() == [1790]
+
+    def test_encode_round_trip(self):
+        bitmap = Bitmap()
+        for proposal_id in (0, 7, 8, 1745, 1746):
+            bitmap.add(proposal_id)
+
+        assert Bitmap.decode(bitmap.encode()).ids() == [0, 7, 8, 1745, 1746]
+
+
+class TestProposalIndex:
+    """Test watermark and per-stage status tracking"""
+
+    def test_scrape_moves_the_watermark(self):
+        index = ProposalIndex(network="polkadot")
+        index.mark("scrape", 1741, "processed")
+        index.mark("scrape", 1743, "failed")
+        index.mark("vote", 1800, "processed")
+
+        assert index.high_watermark == 1743
+
+    def test_status_is_exclusive_per_stage(self):
+        index = ProposalIndex(network="polkadot")
+        index.mark("scrape", 1741, "failed")
+        index.mark("scrape", 1741, "processed")
+
+        assert index.has("scrape", 1741, "processed")
+        assert not index.has("scrape", 1741, "failed")
+
+    def test_gaps_include_holes_and_failures(self):
+        index = ProposalIndex(network="polkadot")
+        index.mark("scrape", 1741, "processed")
+        index.mark("scrape", 1742, "failed")
+        index.mark("scrape", 1744, "processed")
+
+        assert index.gaps("scrape", 1741, 1744) == [1742, 1743]
+
+    def test_skipped_proposals_are_not_gaps(self):
+        index = ProposalIndex(network="polkadot")
+        index.mark("scrape", 1741, "processed")
+        index.mark("scrape", 1742, "skipped")
+
+        assert index.gaps("scrape", 1741, 1743) == [1743]
+        assert index.high_watermark == 1742
+
+    def test_unknown_status_is_rejected(self):
+        with pytest.raises(ValueError):
+            ProposalIndex(network="polkadot").mark("scrape", 1, "done")
+
+    def test_dict_round_trip(self):
+        index = ProposalIndex(network="kusama")
+        index.mark("scrape", 590, "processed")
+        index.mark("comment", 590, "failed")
+
+        restored = ProposalIndex.from_dict(index.to_dict())
+
+        assert restored.high_watermark == 590
+        assert restored.has("scrape", 590, "processed")
+        assert restored.has("comment", 590, "failed")
+
+
+class TestIndexStorage:
+    """Test persisting the index object"""
+
+    def test_missing_index_loads_as_none(self, memory_s3):
+        assert load_proposal_index(memory_s3, "bucket", "polkadot") is None
+
+    def test_save_and_load(self, memory_s3):
+        index = ProposalIndex(network="polkadot")
+        index.mark("scrape", 1750, "processed")
+        save_proposal_index(memory_s3, "bucket", index)
+
+        loaded = load_proposal_index(memory_s3, "bucket", "polkadot")
+        assert loaded.high_watermark == 1750
+
+    def test_bootstrap_from_listing(self, memory_s3):
+        for proposal_id in (1741, 1745):
+            memory_s3.pipe(f"bucket/proposals/polkadot/{proposal_id}/content.md", b"x")
+        memory_s3.pipe("bucket/proposals/polkadot/notes.txt", b"x")
+
+        index = build_proposal_index_from_listing(memory_s3, "bucket", "polkadot")
+
+        assert index.high_watermark == 1745
+        assert index.ids("scrape", "processed") == [1741, 1745]
+
+    def test_record_stage_result_bootstraps_then_updates(self, memory_s3):
+        memory_s3.pipe("bucket/proposals/paseo/104/content.md", b"x")
+
+        record_stage_result(memory_s3, "bucket", "paseo", "scrape", 106, "processed")
+
+        loaded, _ = load_current_proposal_index(memory_s3, "bucket", "paseo")
+        assert loaded.high_watermark == 106
+        assert loaded.gaps("scrape", 104, 106) == [105]
+
+
+class TestIndexMarkers:
+    """Test concurrent outcome recording through marker objects"""
+
+    def test_recording_never_rewrites_the_index_object(self, memory_s3):
+        index = ProposalIndex(network="paseo")
+        index.mark("scrape", 104, "processed")
+        save_proposal_index(memory_s3, "bucket", index)
+        before = memory_s3.cat("bucket/proposals/paseo/_index.json")
+
+        record_stage_result(memory_s3, "bucket", "paseo", "vote", 104, "processed")
+
+        assert memory_s3.cat("bucket/proposals/paseo/_index.json") == before
+
+    def test_concurrent_writers_lose_nothing(self, memory_s3):
+        """Writers that would have read the same index version: every outcome survives"""
+        save_proposal_index(memory_s3, "bucket", ProposalIndex(network="paseo"))
+
+        record_stage_result(memory_s3, "bucket", "paseo", "scrape", 105, "processed")
+        record_stage_result(memory_s3, "bucket", "paseo", "vote", 104, "processed")
+        record_stage_results(memory_s3, "bucket", "paseo", "scrape", [106, 107], "skipped")
+
+        index, _ = load_current_proposal_index(memory_s3, "bucket", "paseo")
+        assert index.has("scrape", 105, "processed")
+        assert index.has("vote", 104, "processed")
+        assert index.ids("scrape", "skipped") == [106, 107]
+
+    def test_latest_outcome_wins(self, memory_s3):
+        record_stage_result(memory_s3, "bucket", "paseo", "scrape", 105, "failed")
+        record_stage_result(memory_s3, "bucket", "paseo", "scrape", 105, "processed")
+
+        index, _ = load_current_proposal_index(memory_s3, "bucket", "paseo")
+        assert index.has("scrape", 105, "processed")
+        assert not index.has("scrape", 105, "failed")
+
+    def test_compaction_folds_and_deletes_markers(self, memory_s3):
+        record_stage_result(memory_s3, "bucket", "paseo", "scrape", 105, "processed")
+
+        compact_proposal_index(memory_s3, "bucket", "paseo")
+
+        assert list_index_markers(memory_s3, "bucket", "paseo") == []
+        assert load_proposal_index(memory_s3, "bucket", "paseo").has("scrape", 105, "processed")
+
+    def test_marker_written_after_compaction_listing_survives(self, memory_s3):
+        record_stage_result(memory_s3, "bucket", "paseo", "scrape", 105, "processed")
+        index, folded = load_current_proposal_index(memory_s3, "bucket", "paseo")
+        record_stage_result(memory_s3, "bucket", "paseo", "scrape", 106, "processed")
+        save_proposal_index(memory_s3, "bucket", index)
+        memory_s3.rm(folded)
+
+        index, _ = load_current_proposal_index(memory_s3, "bucket", "paseo")
+        assert index.ids("scrape", "processed") == [105, 106]
+
+    def test_unknown_status_is_rejected(self, memory_s3):
+        with pytest.raises(ValueError):
+            record_stage_result(memory_s3, "bucket", "paseo", "scrape", 1, "done")
+
+    def test_foreign_objects_are_ignored(self):
+        assert parse_marker_name("notes.txt") is None
+        assert parse_marker_name("scrape.12.processed.00000000000000000001.abcd1234") == ("scrape", 12, "processed", 1)
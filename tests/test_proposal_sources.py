@@ -0,0 +1,150 @@
+import pytest
+import asyncio
+import httpx
+from unittest.mock import patch
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils import proposal_sources
+from utils.proposal_augmentation import parse_proposal_data_with_units
+from utils.proposal_sources import (
+    LatencyTracker,
+    normalize_proposal_data,
+    hedged_fetch_proposal,
+)
+
+POLKASSEMBLY_HOST = "paseo.polkassembly.io"
+
+
+def run_hedged(handler, hedge_delay=0.05):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with patch.object(proposal_sources.latency_tracker, "hedge_delay", return_value=hedge_delay):
+                return await hedged_fetch_proposal(client, "paseo", 120, headers={})
+
+    return asyncio.run(run())
+
+
+class TestNormalizeProposalData:
+    """Test the common schema over both APIs"""
+
+    def test_subsquare_payload(self):
+        data = normalize_proposal_data(
+            {"title": "T", "content": "C", "track": 33, "proposer": "5F", "state": {"name": "Deciding"}},
+            "subsquare",
+        )
+        assert (data["track"], data["proposer"], data["status"], data["_source"]) == (33, "5F", "Deciding", "subsquare")
+
+    def test_polkassembly_payload(self):
+        data = normalize_proposal_data(
+            {"title": "T", "content": "C", "onChainInfo": {"trackNumber": "34", "proposer": "5G", "status": "Submitted"}},
+            "polkassembly",
+        )
+        assert (data["track"], data["proposer"], data["status"], data["_source"]) == (34, "5G", "Submitted", "polkassembly")
+
+
+    def test_polkassembly_spends_give_the_same_cost_as_subsquare(self):
+        subsquare = normalize_proposal_data(
+            {
+                "title": "T",
+                "content": "C",
+                "allSpends": [
+                    {"amount": "20000000000000", "assetKind": {"symbol": "DOT"}},
+                    {"amount": "5000000000", "assetKind": {"symbol": "USDC"}},
+                ],
+            },
+            "subsquare",
+            "polkadot",
+        )
+        polkassembly = normalize_proposal_data(
+            {
+                "title": "T",
+                "content": "C",
+                "onChainInfo": {
+                    "beneficiaries": [
+                        {"address": "15A", "amount": "20000000000000"},
+                        {"address": "15B", "amount": "5000000000", "assetId": "1337"},
+                    ]
+                },
+            },
+            "polkassembly",
+            "polkadot",
+        )
+
+        cost = parse_proposal_data_with_units(polkassembly, "polkadot")["cost"]
+        assert cost == parse_proposal_data_with_units(subsquare, "polkadot")["cost"]
+        assert cost.startswith("2000.00 DOT")
+
+    def test_subsquare_spends_are_kept_as_is(self):
+        spends = [{"amount": "1", "assetKind": {"symbol": "USDT"}}]
+        data = normalize_proposal_data({"title": "T", "allSpends": spends, "beneficiaries": [{"amount": "2"}]}, "subsquare")
+        assert data["allSpends"] == spends
+
+
+class TestLatencyTracker:
+    """Test the p95 hedge threshold"""
+
+    def test_default_until_enough_samples(self):
+        tracker = LatencyTracker()
+        tracker.record("polkassembly", 0.1)
+        assert tracker.hedge_delay("polkassembly") == proposal_sources.HEDGE_DEFAULT_DELAY_SECONDS
+
+    def test_p95(self):
+        tracker = LatencyTracker()
+        for i in range(1, 101):
+            tracker.record("polkassembly", i / 100)
+        assert tracker.p95("polkassembly") == 0.95
+        assert tracker.hedge_delay("polkassembly") == 0.95
+
+
+class TestHedgedFetch:
+    """Test hedging between the primary and the secondary API"""
+
+    def test_fast_primary_wins_alone(self):
+        hosts = []
+
+        def handler(request):
+            hosts.append(request.url.host)
+            return httpx.Response(200, json={"title": "From primary", "track": 33})
+
+        data = run_hedged(handler)
+        assert data["_source"] == "polkassembly"
+        assert hosts == [POLKASSEMBLY_HOST]
+
+    def test_slow_primary_is_hedged(self):
+        async def handler(request):
+            if request.url.host == POLKASSEMBLY_HOST:
+                await asyncio.sleep(1)
+            return httpx.Response(200, json={"title": "T", "track": 33})
+
+        data = run_hedged(handler)
+        assert data["_source"] == "subsquare"
+
+    def test_failing_primary_falls_back(self):
+        def handler(request):
+            if request.url.host == POLKASSEMBLY_HOST:
+                return httpx.Response(429)
+            return httpx.Response(200, json={"title": "T"})
+
+        assert run_hedged(handler)["_source"] == "subsquare"
+
+    def test_both_failing_raises(self):
+        def handler(request):
+            return httpx.Response(503)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            run_hedged(handler)
+
+    def test_primary_answering_within_grace_is_preferred(self):
+        async def handler(request):
+            if request.url.host == POLKASSEMBLY_HOST:
+                await asyncio.sleep(0.15)
+            return httpx.Response(200, json={"title": "T", "track": 33})
+
+        with patch.object(proposal_sources, "HEDGE_PRIMARY_GRACE_SECONDS", 1.0):
+            data = run_hedged(handler)
+        assert data["_source"] == "polkassembly"
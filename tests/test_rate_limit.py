@@ -0,0 +1,111 @@
+import pytest
+import asyncio
+import time
+import httpx
+from unittest.mock import patch
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils import rate_limit
+from utils.rate_limit import (
+    TokenBucket,
+    RateLimitedTransport,
+    RateLimitedSyncTransport,
+    bucket_for,
+    host_limits,
+    parse_retry_after,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_buckets():
+    rate_limit._buckets.clear()
+    yield
+    rate_limit._buckets.clear()
+
+
+class TestTokenBucket:
+    """Test token accounting"""
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        assert bucket._update(take=True) == 0
+        assert bucket._update(take=True) == 0
+        assert 0 < bucket._update(take=True) <= 0.1
+
+    def test_block_honors_server_hint(self):
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.block(5)
+        assert 4.9 < bucket._update(take=True) <= 5
+
+    def test_shared_state_file(self, tmp_path):
+        state_path = str(tmp_path / "polkassembly.io.json")
+        first = TokenBucket(rate=0.1, capacity=1, state_path=state_path)
+        second = TokenBucket(rate=0.1, capacity=1, state_path=state_path)
+
+        assert first._update(take=True) == 0
+        # Another process holding the same file sees the token is gone
+        assert second._update(take=True) > 0
+
+
+class TestHostLimits:
+    """Test per-host configuration"""
+
+    def test_subdomains_share_their_domain_bucket(self):
+        assert host_limits("polkadot.polkassembly.io")[0] == "polkassembly.io"
+        assert bucket_for("polkadot.polkassembly.io") is bucket_for("kusama.polkassembly.io")
+
+    def test_unknown_host_gets_default(self):
+        assert host_limits("example.org") == ("example.org", rate_limit.RATE_LIMIT_DEFAULT)
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+class TestRateLimitedTransport:
+    """Test Retry-After handling on throttled answers"""
+
+    def test_retries_after_429(self):
+        answers = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json={"ok": True})]
+
+        async def run():
+            transport = RateLimitedTransport(httpx.MockTransport(lambda request: answers.pop(0)))
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await client.get("https://polkadot.polkassembly.io/api")
+
+        assert asyncio.run(run()).json() == {"ok": True}
+
+    def test_gives_up_after_max_retries(self):
+        handler = lambda request: httpx.Response(429, headers={"Retry-After": "0"})
+        with httpx.Client(transport=RateLimitedSyncTransport(httpx.MockTransport(handler))) as client:
+            response = client.get("https://api.subsquare.io/x")
+        assert response.status_code == 429
+
+    def test_503_without_hint_is_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503)
+
+        with httpx.Client(transport=RateLimitedSyncTransport(httpx.MockTransport(handler))) as client:
+            assert client.get("https://api.subsquare.io/x").status_code == 503
+        assert len(calls) == 1
+
+    def test_requests_are_paced(self):
+        with patch.dict(rate_limit.RATE_LIMITS, {"paced.test": (20.0, 1)}):
+            handler = lambda request: httpx.Response(200)
+            with httpx.Client(transport=RateLimitedSyncTransport(httpx.MockTransport(handler))) as client:
+                started = time.monotonic()
+                for _ in range(4):
+                    client.get("https://paced.test/")
+                elapsed = time.monotonic() - started
+
+        # One burst token, then 3 more at 20/s
+        assert elapsed >= 0.14
@@ -0,0 +1,90 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.referenda import (
+    fetch_referendum_infos,
+    referendum_track,
+    referendum_deadline_block,
+    fetch_track_periods,
+)
+
+TRACK_PERIODS = {
+    33: {"prepare_period": 100, "decision_period": 1000, "confirm_period": 50, "undeciding_timeout": 400}
+}
+
+
+class TestFetchReferendumInfos:
+    """Test the multi-key ReferendumInfoFor lookup"""
+
+    def test_single_request_for_all_ids(self):
+        substrate = MagicMock()
+        substrate.create_storage_key.side_effect = (
+            lambda module, storage, params: SimpleNamespace(params=params)
+        )
+        substrate.query_multi.side_effect = lambda keys: [
+            (key, SimpleNamespace(value={"Ongoing": {"track": 33}}) if key.params[0] == 1 else None)
+            for key in keys
+        ]
+
+        infos = fetch_referendum_infos(substrate, [1, 2])
+
+        assert substrate.query_multi.call_count == 1
+        assert infos == {1: {"Ongoing": {"track": 33}}, 2: None}
+
+    def test_no_ids_no_request(self):
+        substrate = MagicMock()
+        assert fetch_referendum_infos(substrate, []) == {}
+        substrate.query_multi.assert_not_called()
+
+
+class TestReferendumTrack:
+    """Test track extraction from ReferendumInfoFor values"""
+
+    def test_ongoing(self):
+        assert referendum_track({"Ongoing": {"track": 34, "submitted": 100}}) == 34
+
+    @pytest.mark.parametrize("info", [None, {"Approved": [1, None, None]}, {"Ongoing": {}}])
+    def test_finished_or_missing(self, info):
+        assert referendum_track(info) is None
+
+
+class TestFetchTrackPeriods:
+    """Test the track constants lookup"""
+
+    def test_undeciding_timeout_is_added_to_every_track(self):
+        constants = {
+            "Tracks": [(33, {"prepare_period": 100, "decision_period": 1000, "confirm_period": 50})],
+            "UndecidingTimeout": 400,
+        }
+        substrate = MagicMock()
+        substrate.get_constant.side_effect = lambda module, name: SimpleNamespace(value=constants[name])
+
+        assert fetch_track_periods(substrate) == TRACK_PERIODS
+
+
+class TestReferendumDeadlineBlock:
+    """Test the last block a vote still counts"""
+
+    def test_preparing(self):
+        info = {"Ongoing": {"track": 33, "submitted": 500, "deciding": None}}
+        # Times out unless it starts deciding, whatever its prepare and decision periods
+        assert referendum_deadline_block(info, TRACK_PERIODS) == 900
+
+    def test_deciding(self):
+        info = {"Ongoing": {"track": 33, "submitted": 500, "deciding": {"since": 700, "confirming": None}}}
+        assert referendum_deadline_block(info, TRACK_PERIODS) == 1700
+
+    def test_confirming_ends_earlier(self):
+        info = {"Ongoing": {"track": 33, "submitted": 500, "deciding": {"since": 700, "confirming": 900}}}
+        assert referendum_deadline_block(info, TRACK_PERIODS) == 900
+
+    def test_unknown_track_or_finished(self):
+        assert referendum_deadline_block({"Ongoing": {"track": 99, "submitted": 1}}, TRACK_PERIODS) is None
+        assert referendum_deadline_block({"Rejected": [1, None, None]}, TRACK_PERIODS) is None
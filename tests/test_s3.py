@@ -0,0 +1,105 @@
+import pytest
+import asyncio
+import time
+import fsspec
+from fsspec.asyn import AsyncFileSystem
+from unittest.mock import patch, MagicMock
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.s3 import (
+    s3_filesystem,
+    check_connection,
+    exists_many,
+    cat_many,
+    pipe_many,
+    reset_s3_filesystems,
+)
+
+
+class SlowAsyncFileSystem(AsyncFileSystem):
+    """Every call takes 0.2s, so concurrent calls finish together."""
+
+    def __init__(self, contents):
+        super().__init__(skip_instance_cache=True)
+        self.contents = contents
+
+    async def _exists(self, path, **kwargs):
+        await asyncio.sleep(0.2)
+        return path in self.contents
+
+    async def _cat_file(self, path, start=None, end=None, **kwargs):
+        await asyncio.sleep(0.2)
+        if path not in self.contents:
+            raise FileNotFoundError(path)
+        return self.contents[path]
+
+
+@pytest.fixture(autouse=True)
+def fresh_filesystems():
+    reset_s3_filesystems()
+    yield
+    reset_s3_filesystems()
+
+
+class TestS3Filesystem:
+    """Test the shared filesystem factory"""
+
+    def test_one_filesystem_per_credential_set(self):
+        with patch("utils.s3.s3fs.S3FileSystem", side_effect=lambda **kwargs: MagicMock()) as mock_s3fs:
+            first = s3_filesystem("key", "secret", "https://s3.example")
+            assert s3_filesystem("key", "secret", "https://s3.example") is first
+            assert s3_filesystem("key", "other-secret", "https://s3.example") is not first
+
+        assert mock_s3fs.call_count == 2
+
+    def test_shared_across_threads(self):
+        with patch("utils.s3.s3fs.S3FileSystem", side_effect=lambda **kwargs: MagicMock()):
+            first = s3_filesystem("key", "secret", "https://s3.example")
+            other_thread = asyncio.run(asyncio.to_thread(s3_filesystem, "key", "secret", "https://s3.example"))
+
+        assert other_thread is first
+
+    def test_connection_check_is_a_head(self):
+        fs = MagicMock()
+        check_connection(fs, "bucket")
+
+        fs.call_s3.assert_called_once_with("head_bucket", Bucket="bucket")
+        fs.ls.assert_not_called()
+
+
+class TestBulkOperations:
+    """Test concurrent multi-key operations"""
+
+    def test_exists_many_is_concurrent(self):
+        fs = SlowAsyncFileSystem({"bucket/a": b"1"})
+        started_at = time.monotonic()
+        result = exists_many(fs, [f"bucket/{name}" for name in "abcde"])
+
+        assert result == {"bucket/a": True, "bucket/b": False, "bucket/c": False, "bucket/d": False, "bucket/e": False}
+        assert time.monotonic() - started_at < 0.6
+
+    def test_cat_many_is_concurrent(self):
+        fs = SlowAsyncFileSystem({f"bucket/{name}": name.encode() for name in "abcde"})
+        started_at = time.monotonic()
+        result = cat_many(fs, [f"bucket/{name}" for name in "abcde"])
+
+        assert result["bucket/c"] == b"c"
+        assert time.monotonic() - started_at < 0.6
+
+    def test_cat_many_missing_key_raises(self):
+        with pytest.raises(FileNotFoundError):
+            cat_many(SlowAsyncFileSystem({}), ["bucket/missing"])
+
+    def test_sync_filesystems_work_too(self):
+        fs = fsspec.filesystem("memory")
+        fs.store.clear()
+        pipe_many(fs, {"bucket/a": b"1", "bucket/b": b"2"})
+
+        assert exists_many(fs, ["bucket/a", "bucket/z"]) == {"bucket/a": True, "bucket/z": False}
+        assert cat_many(fs, ["bucket/a", "bucket/b"]) == {"bucket/a": b"1", "bucket/b": b"2"}
+        fs.store.clear()
@@ -0,0 +1,284 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from prefect.client.schemas.objects import StateType
+from utils import scheduling
+from utils.scheduling import (
+    flow_run_name,
+    idempotency_key,
+    parse_proposal_id,
+    fetch_scheduled_proposal_ids,
+    is_already_scheduled,
+    schedule_flow_runs,
+    deadline_scheduled_time,
+    order_by_deadline,
+    scheduled_state,
+    stage_scheduled_state,
+)
+
+NOW = datetime.datetime(2026, 10, 17, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+def make_client(pages):
+    """Returns a fake Prefect client context manager serving the given pages of run names."""
+    client = MagicMock()
+    client.read_flow_runs = AsyncMock(
+        side_effect=[[SimpleNamespace(name=name) for name in page] for page in pages]
+    )
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=client)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return context, client
+
+
+class TestRunNames:
+    """Test flow run naming helpers"""
+
+    def test_round_trip(self):
+        name = flow_run_name("scrape", "polkadot", 1742)
+        assert name == "scrape-polkadot-1742"
+        assert parse_proposal_id(name, "scrape", "polkadot") == 1742
+
+    def test_other_stage_or_network_is_ignored(self):
+        assert parse_proposal_id("vote-polkadot-12", "scrape", "polkadot") is None
+        assert parse_proposal_id("scrape-kusama-12", "scrape", "polkadot") is None
+
+    def test_non_numeric_suffix_is_ignored(self):
+        assert parse_proposal_id("scrape-polkadot-12-retry", "scrape", "polkadot") is None
+
+
+class TestFetchScheduledProposalIds:
+    """Test the paginated scheduled-run index"""
+
+    def test_single_page(self):
+        context, client = make_client([["scrape-paseo-104", "scrape-paseo-105"]])
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            ids = asyncio.run(fetch_scheduled_proposal_ids("scrape", "paseo"))
+
+        assert ids == {104, 105}
+        assert client.read_flow_runs.await_count == 1
+
+    def test_paginates_until_short_page(self):
+        page_size = 3
+        pages = [
+            ["scrape-paseo-1", "scrape-paseo-2", "scrape-paseo-3"],
+            ["scrape-paseo-4", "scrape-paseo-5", "scrape-paseo-6"],
+            ["scrape-paseo-7"],
+        ]
+        context, client = make_client(pages)
+
+        with patch.object(scheduling, "get_client", return_value=context), \
+             patch.object(scheduling, "FLOW_RUNS_PAGE_SIZE", page_size):
+            ids = asyncio.run(fetch_scheduled_proposal_ids("scrape", "paseo"))
+
+        assert ids == set(range(1, 8))
+        offsets = [call.kwargs["offset"] for call in client.read_flow_runs.await_args_list]
+        assert offsets == [0, 3, 6]
+
+    def test_substring_matches_are_not_counted(self):
+        # The `like_` filter is a substring match, the index must only keep exact ids
+        context, _ = make_client([["scrape-paseo-10", "rescrape-paseo-1"]])
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            ids = asyncio.run(fetch_scheduled_proposal_ids("scrape", "paseo"))
+
+        assert ids == {10}
+        assert 1 not in ids
+
+
+class TestIsAlreadyScheduled:
+    """Test the single-proposal check"""
+
+    def test_queries_the_exact_run_name(self):
+        context, client = make_client([["scrape-paseo-1"]])
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            assert asyncio.run(is_already_scheduled("scrape", "paseo", 1)) is True
+
+        flow_run_filter = client.read_flow_runs.await_args.kwargs["flow_run_filter"]
+        assert flow_run_filter.name.any_ == ["scrape-paseo-1"]
+        assert client.read_flow_runs.await_args.kwargs["limit"] == 1
+
+    def test_no_active_run(self):
+        context, _ = make_client([[]])
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            assert asyncio.run(is_already_scheduled("scrape", "paseo", 1)) is False
+
+
+class TestScheduleFlowRuns:
+    """Test bulk flow run creation"""
+
+    def test_idempotency_key(self):
+        assert idempotency_key("scrape", "kusama", 590) == "scrape-kusama-590"
+        assert idempotency_key("scrape", "kusama", 590, "backfill-20261017") == "scrape-kusama-590-backfill-20261017"
+        assert idempotency_key("scrape", "kusama", 590, attempt=2) == "scrape-kusama-590-retry-2"
+
+    def test_dead_run_is_retried_under_next_key(self):
+        def run_in(state_type):
+            return SimpleNamespace(state=SimpleNamespace(type=state_type))
+
+        runs = {
+            "scrape-paseo-7": run_in(StateType.FAILED),
+            "scrape-paseo-7-retry-1": run_in(StateType.CRASHED),
+        }
+
+        async def create(**kwargs):
+            return runs.get(kwargs["idempotency_key"], run_in(StateType.SCHEDULED))
+
+        context, client = make_client([])
+        client.create_flow_run_from_deployment = AsyncMock(side_effect=create)
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            result = asyncio.run(schedule_flow_runs("scrape", "paseo", [7]))
+
+        assert result == {"scheduled": [7], "failed": {}}
+        keys = [call.kwargs["idempotency_key"] for call in client.create_flow_run_from_deployment.await_args_list]
+        assert keys == ["scrape-paseo-7", "scrape-paseo-7-retry-1", "scrape-paseo-7-retry-2"]
+
+    def test_gives_up_after_max_key_retries(self):
+        context, client = make_client([])
+        client.create_flow_run_from_deployment = AsyncMock(
+            return_value=SimpleNamespace(state=SimpleNamespace(type=StateType.FAILED))
+        )
+
+        with patch.object(scheduling, "get_client", return_value=context), \
+             patch.object(scheduling, "SCHEDULING_MAX_KEY_RETRIES", 2):
+            result = asyncio.run(schedule_flow_runs("scrape", "paseo", [7]))
+
+        assert result["scheduled"] == []
+        assert 7 in result["failed"]
+        assert client.create_flow_run_from_deployment.await_count == 3
+
+    def test_creates_one_keyed_run_per_proposal(self):
+        context, client = make_client([])
+        client.create_flow_run_from_deployment = AsyncMock()
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            result = asyncio.run(schedule_flow_runs("scrape", "paseo", [105, 104]))
+
+        assert result == {"scheduled": [104, 105], "failed": {}}
+        keys = sorted(
+            call.kwargs["idempotency_key"]
+            for call in client.create_flow_run_from_deployment.await_args_list
+        )
+        assert keys == ["scrape-paseo-104", "scrape-paseo-105"]
+
+    def test_concurrency_is_capped(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def create(**kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        context, client = make_client([])
+        client.create_flow_run_from_deployment = AsyncMock(side_effect=create)
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            result = asyncio.run(
+                schedule_flow_runs("scrape", "paseo", range(20), max_concurrency=3)
+            )
+
+        assert len(result["scheduled"]) == 20
+        assert max_in_flight == 3
+
+    def test_failures_are_reported_per_proposal(self):
+        async def create(**kwargs):
+            if kwargs["parameters"]["proposal_id"] == 2:
+                raise RuntimeError("boom")
+
+        context, client = make_client([])
+        client.create_flow_run_from_deployment = AsyncMock(side_effect=create)
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            result = asyncio.run(schedule_flow_runs("scrape", "paseo", [1, 2, 3]))
+
+        assert result["scheduled"] == [1, 3]
+        assert result["failed"] == {2: "boom"}
+
+
+class TestDeadlineScheduling:
+    """Test deadline-aware delays and ordering"""
+
+    def test_far_deadline_keeps_default_delay(self):
+        delay = datetime.timedelta(days=2)
+        deadline = NOW + datetime.timedelta(days=28)
+        assert deadline_scheduled_time(delay, deadline, now=NOW) == NOW + delay
+
+    def test_no_deadline_keeps_default_delay(self):
+        delay = datetime.timedelta(minutes=30)
+        assert deadline_scheduled_time(delay, None, now=NOW) == NOW + delay
+
+    def test_close_deadline_compresses_delay(self):
+        delay = datetime.timedelta(days=2)
+        deadline = NOW + datetime.timedelta(hours=8)
+        assert deadline_scheduled_time(delay, deadline, now=NOW) == NOW + datetime.timedelta(hours=2)
+
+    def test_passed_deadline_runs_now(self):
+        delay = datetime.timedelta(minutes=30)
+        deadline = NOW - datetime.timedelta(minutes=1)
+        assert deadline_scheduled_time(delay, deadline, now=NOW) == NOW
+
+    def test_order_by_deadline(self):
+        deadlines = {
+            1: NOW + datetime.timedelta(days=10),
+            2: None,
+            3: NOW + datetime.timedelta(hours=1),
+        }
+        assert order_by_deadline([4, 2, 1, 3], deadlines) == [3, 1, 2, 4]
+
+    def test_delays_disabled_schedules_right_away(self):
+        with patch.object(scheduling, "SCHEDULE_DELAYS_ENABLED", False):
+            state = scheduled_state(datetime.timedelta(days=2))
+        assert state.state_details.scheduled_time <= datetime.datetime.now(datetime.timezone.utc)
+
+    def test_runs_are_created_closest_deadline_first(self):
+        created = []
+
+        async def create(**kwargs):
+            created.append(kwargs["parameters"]["proposal_id"])
+
+        context, client = make_client([])
+        client.create_flow_run_from_deployment = AsyncMock(side_effect=create)
+        deadlines = {1: NOW + datetime.timedelta(days=5), 2: NOW + datetime.timedelta(hours=3)}
+
+        with patch.object(scheduling, "get_client", return_value=context):
+            asyncio.run(
+                schedule_flow_runs("scrape", "paseo", [1, 2, 3], max_concurrency=1, deadlines=deadlines)
+            )
+
+        assert created == [2, 1, 3]
+
+    def test_deadline_is_not_read_when_delays_are_disabled(self):
+        load_deadline = AsyncMock()
+
+        with patch.object(scheduling, "SCHEDULE_DELAYS_ENABLED", False), \
+             patch.object(scheduling, "load_referendum_deadline", load_deadline):
+            asyncio.run(stage_scheduled_state("paseo", 1, datetime.timedelta(days=2), MagicMock()))
+
+        load_deadline.assert_not_awaited()
+
+    def test_unreadable_deadline_falls_back_to_default_delay(self):
+        load_deadline = AsyncMock(side_effect=ConnectionError("rpc down"))
+        logger = MagicMock()
+        delay = datetime.timedelta(days=2)
+
+        with patch.object(scheduling, "SCHEDULE_DELAYS_ENABLED", True), \
+             patch.object(scheduling, "load_referendum_deadline", load_deadline):
+            state = asyncio.run(stage_scheduled_state("paseo", 1, delay, logger))
+
+        assert state.state_details.scheduled_time > datetime.datetime.now(datetime.timezone.utc) + delay / 2
+        logger.warning.assert_called_once()
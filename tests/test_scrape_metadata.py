@@ -0,0 +1,107 @@
+import pytest
+import fsspec
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.proposal_sources import normalize_proposal_data
+from utils.scrape_metadata import (
+    proposal_content_hash,
+    read_scrape_metadata,
+    write_scrape_metadata,
+    is_unchanged_scrape,
+)
+
+BASE = "bucket/proposals/paseo/42"
+PROPOSAL = {
+    "title": "Fund the thing",
+    "content": "We need money.",
+    "track": 33,
+    "allSpends": [{"amount": "100", "symbol": "DOT"}],
+    "commentsCount": 3,
+}
+
+
+@pytest.fixture
+def memory_s3():
+    fs = fsspec.filesystem("memory")
+    fs.store.clear()
+    yield fs
+    fs.store.clear()
+
+
+class TestProposalContentHash:
+    """Test hashing the prompt-relevant fields of a proposal"""
+
+    def test_ignores_irrelevant_fields(self):
+        assert proposal_content_hash(PROPOSAL) == proposal_content_hash({**PROPOSAL, "commentsCount": 12})
+
+    def test_same_hash_from_either_api(self):
+        from_subsquare = normalize_proposal_data(
+            {**PROPOSAL, "allSpends": [{"amount": "100", "assetKind": {"symbol": "DOT"}, "beneficiary": {"id": "5F"}}]},
+            "subsquare",
+            "polkadot",
+        )
+        from_polkassembly = normalize_proposal_data(
+            {key: value for key, value in PROPOSAL.items() if key != "allSpends"}
+            | {"beneficiaries": [{"address": "5F", "amount": "100"}]},
+            "polkassembly",
+            "polkadot",
+        )
+        assert proposal_content_hash(from_subsquare) == proposal_content_hash(from_polkassembly)
+
+    def test_missing_spends_change_the_hash(self):
+        # A payload without spends (cost 0) must not pass for one with spends
+        assert proposal_content_hash(PROPOSAL) != proposal_content_hash({**PROPOSAL, "allSpends": []})
+
+    def test_ignores_line_endings_and_outer_whitespace(self):
+        edited = {**PROPOSAL, "content": "We need money.\r\n", "title": " Fund the thing"}
+        assert proposal_content_hash(PROPOSAL) == proposal_content_hash(edited)
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            {"title": "Fund another thing"},
+            {"content": "We need more money."},
+            {"track": 34},
+            {"allSpends": [{"amount": "200", "symbol": "DOT"}]},
+        ],
+    )
+    def test_relevant_changes_change_the_hash(self, change):
+        assert proposal_content_hash(PROPOSAL) != proposal_content_hash({**PROPOSAL, **change})
+
+
+class TestIsUnchangedScrape:
+    """Test deciding whether a re-scrape can reuse the stored run"""
+
+    def test_first_scrape(self, memory_s3):
+        assert not is_unchanged_scrape(memory_s3, BASE, proposal_content_hash(PROPOSAL))
+
+    def test_same_hash_with_content(self, memory_s3):
+        content_hash = proposal_content_hash(PROPOSAL)
+        write_scrape_metadata(memory_s3, BASE, content_hash, prompt_generated=True, source="subsquare")
+        with memory_s3.open(f"{BASE}/content.md", "w") as f:
+            f.write("# prompt")
+
+        assert is_unchanged_scrape(memory_s3, BASE, content_hash)
+        assert read_scrape_metadata(memory_s3, BASE)["source"] == "subsquare"
+
+    def test_same_hash_but_content_missing(self, memory_s3):
+        content_hash = proposal_content_hash(PROPOSAL)
+        write_scrape_metadata(memory_s3, BASE, content_hash, prompt_generated=True)
+
+        assert not is_unchanged_scrape(memory_s3, BASE, content_hash)
+
+    def test_same_hash_without_prompt(self, memory_s3):
+        content_hash = proposal_content_hash(PROPOSAL)
+        write_scrape_metadata(memory_s3, BASE, content_hash, prompt_generated=False)
+
+        assert is_unchanged_scrape(memory_s3, BASE, content_hash)
+
+    def test_changed_hash(self, memory_s3):
+        write_scrape_metadata(memory_s3, BASE, "old-hash", prompt_generated=False)
+
+        assert not is_unchanged_scrape(memory_s3, BASE, proposal_content_hash(PROPOSAL))
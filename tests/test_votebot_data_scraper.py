@@ -0,0 +1,144 @@
+import pytest
+import asyncio
+import json
+import logging
+import time
+import httpx
+from unittest.mock import patch, MagicMock
+
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import votebot_data_scraper
+from votebot_data_scraper import (
+    fetch_polkassembly_sources,
+    polkassembly_source_urls,
+    summarize_enrichment,
+    save_enrichment_sources_to_firestore,
+)
+
+
+@pytest.fixture(autouse=True)
+def mock_run_logger():
+    with patch("votebot_data_scraper.get_run_logger", return_value=logging.getLogger("test_logger")):
+        yield
+
+
+def run_sources(handler, timeouts=None):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with patch.object(votebot_data_scraper, "get_http_client", return_value=client):
+                if timeouts:
+                    with patch.dict(votebot_data_scraper.POLKASSEMBLY_SOURCE_TIMEOUT_SECONDS, timeouts):
+                        return await fetch_polkassembly_sources.fn(network="polkadot", proposal_id=1783)
+                return await fetch_polkassembly_sources.fn(network="polkadot", proposal_id=1783)
+
+    return asyncio.run(run())
+
+
+class TestFetchPolkassemblySources:
+    """Test the concurrent enrichment fan-out"""
+
+    def test_source_urls(self):
+        urls = polkassembly_source_urls("polkadot", 1783)
+        assert urls["onchain_metadata"] == "https://polkadot.polkassembly.io/api/v2/ReferendumV2/1783/on-chain-metadata"
+        assert urls["track_counts"] == "https://polkadot.polkassembly.io/api/v2/track-counts"
+
+    def test_all_sources_merged(self):
+        sources = run_sources(lambda request: httpx.Response(200, json={"path": request.url.path}))
+        assert set(sources) == {"onchain_metadata", "votes", "treasury_stats", "track_counts"}
+
+    def test_failed_source_is_left_out(self):
+        def handler(request):
+            if request.url.path.endswith("treasury-stats"):
+                return httpx.Response(500)
+            return httpx.Response(200, json={})
+
+        sources = run_sources(handler)
+        assert "treasury_stats" not in sources
+        assert "votes" in sources
+
+    def test_onchain_metadata_is_retried(self):
+        attempts = []
+
+        def handler(request):
+            if request.url.path.endswith("on-chain-metadata"):
+                attempts.append(request.url.path)
+                if len(attempts) == 1:
+                    return httpx.Response(502)
+                return httpx.Response(200, json={"trackNumber": 33})
+            return httpx.Response(200, json={})
+
+        with patch.object(votebot_data_scraper, "POLKASSEMBLY_SOURCE_RETRY_DELAY_SECONDS", 0):
+            sources = run_sources(handler)
+
+        assert sources["onchain_metadata"] == {"trackNumber": 33}
+        assert len(attempts) == 2
+
+    def test_sources_run_concurrently_with_own_timeout(self):
+        async def handler(request):
+            if request.url.path.endswith("track-counts"):
+                await asyncio.sleep(5)
+            else:
+                await asyncio.sleep(0.2)
+            return httpx.Response(200, json={})
+
+        timeouts = {"onchain_metadata": 1, "votes": 1, "treasury_stats": 1, "track_counts": 0.3}
+        started = time.monotonic()
+        sources = run_sources(handler, timeouts)
+        elapsed = time.monotonic() - started
+
+        assert "track_counts" not in sources
+        assert len(sources) == 3
+        # Three 0.2s sources in parallel, not 0.6s in a row
+        assert elapsed < 0.5
+
+
+class TestEnrichmentStorage:
+    """Test the document summary and the full sources subcollection"""
+
+    def test_summary_keeps_counts_and_this_track_only(self):
+        sources = {
+            "votes": {"votes": [{"decision": "aye"}] * 3000 + [{"decision": "nay"}] * 2, "totalCount": 3002},
+            "track_counts": {"30": 12, "31": 4, "33": 7},
+            "treasury_stats": {"total": "123"},
+        }
+
+        summary = summarize_enrichment(sources, track=33)
+
+        assert summary["votes"] == {"count": 3002, "byDecision": {"aye": 3000, "nay": 2}}
+        assert summary["track_counts"] == {"track": 33, "entry": 7}
+        assert summary["treasury_stats"] == {"total": "123"}
+        assert summary["sources"] == ["track_counts", "treasury_stats", "votes"]
+
+    def test_large_sources_stay_out_of_the_summary(self):
+        sources = {"treasury_stats": [{"month": m, "values": "x" * 100} for m in range(200)]}
+
+        summary = summarize_enrichment(sources, track=None)
+
+        assert "treasury_stats" not in summary
+        assert summary["sources"] == ["treasury_stats"]
+
+    def test_oversized_source_is_split_in_parts(self):
+        db = MagicMock()
+        documents = {}
+        enrichment_col = db.collection.return_value.document.return_value.collection.return_value
+        enrichment_col.document.side_effect = lambda name: MagicMock(
+            set=lambda data: documents.__setitem__(name, data)
+        )
+        sources = {"votes": ["v" * 10] * 30, "track_counts": {"33": 7}}
+
+        with patch.object(votebot_data_scraper, "get_firestore_client", return_value=db), \
+             patch.object(votebot_data_scraper, "FIRESTORE_PAYLOAD_CHUNK_CHARS", 200):
+            save_enrichment_sources_to_firestore.fn(sources, "polkadot", 1783)
+
+        db.collection.return_value.document.assert_called_with("polkadot-1783")
+        enrichment_col_name = db.collection.return_value.document.return_value.collection.call_args.args[0]
+        assert enrichment_col_name == "enrichment"
+        assert documents["track_counts"]["payload"] == '{"33": 7}'
+        parts = documents["votes"]["parts"]
+        assert parts > 1
+        assert "".join(documents[f"votes-{n}"]["payload"] for n in range(parts)) == json.dumps(sources["votes"])